@@ -0,0 +1,196 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import json
+import os
+
+ARTIFACT_PATH = os.environ.get('ALIS_ARTIFACT_PATH', 'backend/analytics/')
+BUNDLE_PATH = f"{ARTIFACT_PATH}bundles/"
+
+ULS_COLUMNS = ['district_id', 'district_name', 'state', 'uls_score', 'risk_classification',
+               'coverage_score', 'biometric_age_score', 'child_vulnerability_score',
+               'demographic_volatility', 'auth_failure_probability']
+PREDICTION_COLUMNS = ['district_id', 'predicted_auth_failure_prob', 'risk_category']
+RISK_LEVELS = ['High Risk', 'Watchlist', 'Stable']
+SORT_COLUMNS = {
+    'ULS score': 'uls_score',
+    'Predicted auth failure': 'predicted_auth_failure_prob',
+    'Child vulnerability': 'child_vulnerability_score',
+    'Coverage': 'coverage_score',
+    'District': 'district_name'
+}
+
+st.set_page_config(page_title="ALIS Dashboard", layout="wide")
+
+
+def artifact_mtime(name):
+    try:
+        return os.stat(f"{ARTIFACT_PATH}{name}").st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def artifact_source():
+    # Every loader is keyed on the current export bundle version, so a re-export or a rollback invalidates
+    # the cache on the next rerun. The flat files are only read when no bundle has been written yet
+    try:
+        with open(f"{BUNDLE_PATH}CURRENT", 'r') as f:
+            return ('bundle', f.read().strip())
+    except FileNotFoundError:
+        return ('legacy', artifact_mtime('uls_scores.csv'), artifact_mtime('ml_predictions.json'))
+
+
+@st.cache_data(show_spinner=False)
+def bundle_manifest(version):
+    with open(f"{BUNDLE_PATH}{version}/manifest.json", 'r') as f:
+        return json.load(f)
+
+
+def read_part(source, name):
+    entry = bundle_manifest(source[1])['parts'].get(name)
+    if entry is None:
+        return None
+    path = f"{BUNDLE_PATH}{source[1]}/{entry['file']}"
+    if entry['format'] == 'parquet':
+        return pd.read_parquet(path)
+    if entry['format'] == 'csv.gz':
+        return pd.read_csv(path, compression='gzip')
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+@st.cache_data(show_spinner=False)
+def load_json(name, source):
+    if source[0] == 'bundle':
+        return read_part(source, name)
+    if artifact_mtime(f"{name}.json") is None:
+        return None
+    with open(f"{ARTIFACT_PATH}{name}.json", 'r') as f:
+        return json.load(f)
+
+
+# One table is live at a time; a new export version evicts the previous one instead of keeping every version
+@st.cache_resource(show_spinner="Loading district scores...", max_entries=1)
+def load_district_table(source):
+    if source[0] == 'bundle':
+        uls = read_part(source, 'uls_scores')
+        predictions = read_part(source, 'ml_predictions')
+    else:
+        uls = pd.read_csv(f"{ARTIFACT_PATH}uls_scores.csv", usecols=lambda c: c in ULS_COLUMNS)
+        predictions = None
+        if source[2] is not None:
+            with open(f"{ARTIFACT_PATH}ml_predictions.json", 'r') as f:
+                predictions = pd.DataFrame(json.load(f))
+    uls = uls[[c for c in ULS_COLUMNS if c in uls.columns]]
+    if predictions is not None:
+        uls = uls.merge(predictions.reindex(columns=PREDICTION_COLUMNS), on='district_id', how='left')
+    else:
+        uls = uls.assign(predicted_auth_failure_prob=np.nan, risk_category=None)
+
+    uls['state'] = uls['state'].astype('category')
+    uls['risk_classification'] = uls['risk_classification'].astype('category')
+    uls['search_key'] = (uls['district_name'].astype(str) + ' ' + uls['district_id'].astype(str)).str.lower()
+    return uls
+
+
+@st.cache_data(show_spinner=False)
+def filter_positions(source, states, risks, search, sort_column, ascending):
+    table = load_district_table(source)
+    mask = np.ones(len(table), dtype=bool)
+    if states:
+        mask &= table['state'].isin(states).to_numpy()
+    if risks:
+        mask &= table['risk_classification'].isin(risks).to_numpy()
+    if search:
+        mask &= table['search_key'].str.contains(search.lower(), regex=False).to_numpy()
+
+    matched = table.iloc[np.flatnonzero(mask)]
+    matched = matched.sort_values(sort_column, ascending=ascending, kind='stable', na_position='last')
+    return matched.index.to_numpy()
+
+
+@st.cache_data(show_spinner=False)
+def filtered_aggregates(source, states, risks, search):
+    positions = filter_positions(source, states, risks, search, 'uls_score', True)
+    table = load_district_table(source).iloc[positions]
+    risk_counts = table['risk_classification'].value_counts().reindex(RISK_LEVELS, fill_value=0)
+    counts, edges = np.histogram(table['uls_score'].dropna(), bins=20, range=(0, 100))
+    histogram = pd.DataFrame({'districts': counts}, index=[f"{edges[i]:.0f}-{edges[i + 1]:.0f}"
+                                                          for i in range(len(counts))])
+    by_state = table.groupby('state', observed=True).agg(
+        districts=('district_id', 'count'),
+        avg_uls_score=('uls_score', 'mean'),
+        high_risk=('risk_classification', lambda r: int((r == 'High Risk').sum())),
+        avg_predicted_failure=('predicted_auth_failure_prob', 'mean')
+    ).round(2).sort_values('avg_uls_score')
+    return risk_counts, histogram, by_state
+
+
+source = artifact_source()
+if source[0] == 'bundle' and 'uls_scores' not in bundle_manifest(source[1])['parts'] or source[1] is None:
+    st.error(f"No analytics outputs found in {ARTIFACT_PATH}. Run lifecycle_analytics.py first.")
+    st.stop()
+
+table = load_district_table(source)
+summary = load_json('summary', source) or {}
+trends = load_json('trends', source) or []
+
+st.markdown(
+    """
+    <div style="background-color:#3b6fb6;padding:20px;border-radius:10px">
+        <h1 style="color:white">Aadhaar Lifecycle Intelligence System</h1>
+        <p style="color:white">Predictive monitoring of Aadhaar quality</p>
+    </div>
+    """,
+    unsafe_allow_html=True
+)
+st.write("")
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Districts", summary.get('total_districts', len(table)))
+col2.metric("Average ULS Score", summary.get('avg_uls_score', '-'))
+col3.metric("High Risk Districts", summary.get('high_risk_count', '-'))
+col4.metric("Avg Auth Failure Probability", f"{summary.get('avg_auth_failure_prob', '-')}%")
+
+with st.sidebar:
+    st.header("Filters")
+    states = st.multiselect("State", sorted(table['state'].cat.categories))
+    risks = st.multiselect("Risk classification", RISK_LEVELS)
+    search = st.text_input("Search district").strip()
+    sort_label = st.selectbox("Sort by", list(SORT_COLUMNS))
+    ascending = st.toggle("Ascending", value=True)
+    page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+positions = filter_positions(source, tuple(states), tuple(risks), search,
+                             SORT_COLUMNS[sort_label], ascending)
+risk_counts, histogram, by_state = filtered_aggregates(source, tuple(states), tuple(risks), search)
+
+st.subheader("District-wise Aadhaar Lifecycle Risk")
+pages = max(1, -(-len(positions) // page_size))
+page = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, step=1,
+                       key=f"page-{states}-{risks}-{search}-{page_size}")
+start = (page - 1) * page_size
+page_rows = table.iloc[positions[start:start + page_size]].drop(columns='search_key')
+st.caption(f"Showing {min(start + 1, len(positions))}-{min(start + page_size, len(positions))} "
+           f"of {len(positions)} districts")
+st.dataframe(page_rows, use_container_width=True, hide_index=True)
+
+col_left, col_right = st.columns(2)
+with col_left:
+    st.subheader("Risk Distribution")
+    st.bar_chart(risk_counts)
+with col_right:
+    st.subheader("ULS Score Distribution")
+    st.bar_chart(histogram)
+
+st.subheader("State Summary")
+st.dataframe(by_state, use_container_width=True)
+
+if trends:
+    st.subheader("Lifecycle Trend Overview")
+    trend_frame = pd.DataFrame(trends).set_index('year')
+    col_updates, col_rates = st.columns(2)
+    with col_updates:
+        st.line_chart(trend_frame[['total_bio_updates', 'child_bio_updates', 'total_demo_updates']])
+    with col_rates:
+        st.line_chart(trend_frame[['avg_failure_rate', 'avg_success_rate', 'avg_churn_rate']])
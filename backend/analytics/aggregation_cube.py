@@ -0,0 +1,266 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from ingestion import RAW_FEEDS, read_shard_chunks
+from data_cache import write_frame_file, read_frame_file, frame_extension
+from export_bundle import write_json_atomic
+
+CUBE_DIR = 'cube/'
+RAW_DIMENSIONS = ['state', 'district', 'pincode', 'period']
+STATISTICS = ['sum', 'count', 'mean', 'std']
+
+
+def period_keys(dates, period='year'):
+    # Raw dates are DD-MM-YYYY, so both keys are plain string slices
+    if period == 'year':
+        return dates.str[-4:].astype('int16')
+    if period == 'month':
+        return dates.str[-4:] + '-' + dates.str[3:5]
+    raise ValueError(f"Unknown period: {period}")
+
+
+def summarize(df, dimensions, measures):
+    keys = []
+    for column in dimensions:
+        key = df[column]
+        if not pd.api.types.is_numeric_dtype(key):
+            key = key.astype(str)
+        keys.append(key.rename(column))
+
+    values = df[measures].astype(np.float64)
+    grouped = values.groupby(keys, observed=True, sort=True)
+    sums = grouped.sum()
+    counts = grouped.count()
+    squares = (values ** 2).groupby(keys, observed=True, sort=True).sum()
+
+    summary = pd.concat([sums.add_suffix('_sum'), squares.add_suffix('_sumsq'), counts.add_suffix('_count')],
+                        axis=1)
+    summary['rows'] = grouped.size()
+    return summary
+
+
+def combine(summaries):
+    summaries = [s for s in summaries if s is not None and len(s)]
+    if not summaries:
+        return None
+    if len(summaries) == 1:
+        return summaries[0]
+    combined = pd.concat(summaries)
+    return combined.groupby(level=list(combined.index.names), observed=True, sort=True).sum()
+
+
+def summarize_chunks(chunks, feed, period):
+    measures = RAW_FEEDS[feed]['measures']
+    partials = []
+    for chunk in chunks:
+        chunk['period'] = period_keys(chunk['date'], period)
+        partials.append(summarize(chunk, RAW_DIMENSIONS, measures))
+    return combine(partials)
+
+
+def summarize_shard(job):
+    shard, feed, period, chunksize = job
+    return shard, summarize_chunks(read_shard_chunks(shard, feed, chunksize), feed, period)
+
+
+def shard_fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class AggregationCube:
+    def __init__(self, dimensions, measures, period=None, feed=None):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.period = period
+        self.feed = feed
+        self.columns = ([f"{m}_sum" for m in self.measures] + [f"{m}_sumsq" for m in self.measures] +
+                        [f"{m}_count" for m in self.measures] + ['rows'])
+        self.cuboids = {}
+        self.sources = {}
+
+    @classmethod
+    def from_frame(cls, df, dimensions, measures):
+        cube = cls(dimensions, measures)
+        cube.add_frame(df)
+        return cube
+
+    @classmethod
+    def for_feed(cls, feed, period='year'):
+        return cls(RAW_DIMENSIONS, RAW_FEEDS[feed]['measures'], period=period, feed=feed)
+
+    @property
+    def base(self):
+        return self.cuboids.get(tuple(self.dimensions))
+
+    def levels(self, levels):
+        unknown = [level for level in levels if level not in self.dimensions]
+        if unknown:
+            raise ValueError(f"Unknown cube dimensions: {unknown}")
+        return tuple(d for d in self.dimensions if d in levels)
+
+    def rolled(self, source, levels):
+        if not levels:
+            return source.sum().to_frame().T
+        return source.groupby(level=list(levels), observed=True, sort=True).sum()
+
+    def add_summary(self, summary):
+        if summary is None or not len(summary):
+            return
+        summary = summary.reindex(columns=self.columns, fill_value=0)
+        if self.base is None:
+            self.cuboids = {tuple(self.dimensions): summary}
+            return
+
+        # Measures are additive, so every materialized cuboid absorbs the delta without a rescan
+        for levels, cuboid in list(self.cuboids.items()):
+            delta = self.rolled(summary, levels)
+            if levels:
+                self.cuboids[levels] = cuboid.add(delta, fill_value=0).sort_index()
+            else:
+                self.cuboids[levels] = cuboid + delta.to_numpy()
+
+    def add_frame(self, df):
+        self.add_summary(summarize(df, self.dimensions, self.measures))
+
+    def cuboid(self, levels=()):
+        levels = self.levels(levels)
+        if self.base is None:
+            return pd.DataFrame(columns=self.columns)
+        if levels not in self.cuboids:
+            parents = [key for key in self.cuboids if set(levels) <= set(key)]
+            source = min(parents, key=lambda key: len(self.cuboids[key]))
+            self.cuboids[levels] = self.rolled(self.cuboids[source], levels)
+        return self.cuboids[levels]
+
+    def select(self, frame, filters):
+        if not filters:
+            return frame
+        levels = [d for d in self.dimensions if d in filters]
+        key = tuple(filters[level] for level in levels)
+        try:
+            if frame.index.nlevels == 1:
+                return frame.loc[[key[0]]]
+            return frame.xs(key, level=levels, drop_level=False)
+        except KeyError:
+            return frame.iloc[0:0]
+
+    def stats(self, levels=(), measures=None, statistics=('mean',), filters=None):
+        filters = filters or {}
+        levels = self.levels(list(levels) + list(filters))
+        frame = self.select(self.cuboid(levels), filters)
+        measures = measures or self.measures
+
+        result = {}
+        for measure in measures:
+            total = frame[f"{measure}_sum"]
+            count = frame[f"{measure}_count"]
+            for statistic in statistics:
+                if statistic == 'sum':
+                    result[f"{measure}_sum"] = total
+                elif statistic == 'count':
+                    result[f"{measure}_count"] = count.astype('int64')
+                elif statistic == 'mean':
+                    result[f"{measure}_mean"] = total / count.where(count > 0)
+                elif statistic == 'std':
+                    spread = (frame[f"{measure}_sumsq"] - total ** 2 / count.where(count > 0)).clip(lower=0)
+                    result[f"{measure}_std"] = np.sqrt(spread / (count - 1).where(count > 1))
+                else:
+                    raise ValueError(f"Unknown statistic: {statistic}; expected one of {STATISTICS}")
+
+        result = pd.DataFrame(result, index=frame.index)
+        result['rows'] = frame['rows'].astype('int64')
+        return result
+
+    def top_n(self, measure, n=10, level=None, filters=None, statistic='mean', ascending=False):
+        level = level or [d for d in self.dimensions if d != 'period'][-1]
+        # Top-N is ranked over the hierarchy prefix ending at `level`, e.g. pincodes within a state
+        hierarchy = self.dimensions[:self.dimensions.index(level) + 1]
+        stats = self.stats(hierarchy, [measure], (statistic,), filters)
+        column = f"{measure}_{statistic}"
+        ranked = stats.nsmallest(n, column) if ascending else stats.nlargest(n, column)
+        return ranked.reset_index()
+
+    def trend(self, measure, filters=None, statistic='mean', period=None):
+        period = period or 'period'
+        return self.stats([period], [measure], (statistic, 'count'), filters).reset_index()
+
+    def ingest_shards(self, ingestor, feed, directory=None):
+        shards = ingestor.shards(feed, directory)
+        fingerprints = {shard: shard_fingerprint(shard) for shard in shards}
+        changed = [s for s, f in self.sources.items() if fingerprints.get(s) != f]
+        if changed:
+            # Shards are append-only; a rewritten or removed shard cannot be subtracted out
+            print(f"{len(changed)} ingested shards changed, rebuilding the cube")
+            self.cuboids = {}
+            self.sources = {}
+            if ingestor.validator is not None:
+                ingestor.validator.reset(feed)
+
+        jobs = [(shard, feed, self.period or 'year', ingestor.chunksize)
+                for shard in shards if shard not in self.sources]
+        if ingestor.validator is not None:
+            results = [(shard, summarize_chunks(ingestor.read_chunks(shard, feed), feed, period))
+                       for shard, feed, period, _ in jobs]
+        elif ingestor.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(ingestor.workers, len(jobs))) as pool:
+                results = list(pool.map(summarize_shard, jobs))
+        else:
+            results = list(map(summarize_shard, jobs))
+
+        self.add_summary(combine([summary for _, summary in results]))
+        for shard, _ in results:
+            self.sources[shard] = fingerprints[shard]
+        print(f"Cube ingested {len(jobs)} new {feed} shards ({len(self.sources)} total, "
+              f"{0 if self.base is None else len(self.base)} cells)")
+        return len(jobs)
+
+    def save(self, output_path="backend/analytics/"):
+        cube_path = f"{output_path}{CUBE_DIR}"
+        os.makedirs(cube_path, exist_ok=True)
+        base = self.base if self.base is not None else pd.DataFrame(columns=self.dimensions + self.columns)
+        write_frame_file(base.reset_index() if self.base is not None else base,
+                         f"{cube_path}base.{frame_extension()}")
+        write_json_atomic(f"{cube_path}meta.json", {
+            'dimensions': self.dimensions,
+            'measures': self.measures,
+            'period': self.period,
+            'feed': self.feed,
+            'format': frame_extension(),
+            'sources': self.sources
+        })
+
+    @classmethod
+    def load(cls, output_path="backend/analytics/"):
+        cube_path = f"{output_path}{CUBE_DIR}"
+        if not os.path.exists(f"{cube_path}meta.json"):
+            return None
+        with open(f"{cube_path}meta.json", 'r') as f:
+            meta = json.load(f)
+        if meta['format'] != frame_extension():
+            return None
+
+        cube = cls(meta['dimensions'], meta['measures'], meta['period'], meta.get('feed'))
+        base = read_frame_file(f"{cube_path}base.{meta['format']}")
+        if len(base):
+            cube.cuboids = {tuple(cube.dimensions): base.set_index(cube.dimensions).sort_index()}
+        cube.sources = meta['sources']
+        return cube
+
+
+if __name__ == "__main__":
+    import sys
+    from ingestion import ShardIngestor
+    from validation import ValidationStage
+    raw_path = sys.argv[1] if len(sys.argv) > 1 else "./"
+    cube = AggregationCube.load()
+    if cube is None or cube.feed != 'demographic':
+        cube = AggregationCube.for_feed('demographic')
+    validator = ValidationStage(f"backend/analytics/{CUBE_DIR}validation/", persist_seen=True)
+    cube.ingest_shards(ShardIngestor(raw_path, validator=validator), 'demographic')
+    cube.save()
+    validator.close()
+    print(cube.stats(['state'], statistics=('sum', 'mean')).head())
+    print(cube.top_n(cube.measures[-1], n=5))
@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from lifecycle_analytics import LifecycleAnalytics
+from ml_predictor import AuthFailurePredictor
+from feature_store import clear_feature_stores
+from instrumentation import max_rss_mb
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'datasets'))
+from generate_datasets import SyntheticDataGenerator
+
+BENCHMARK_VERSION = 1
+
+
+def environment_info():
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+
+class BenchmarkSuite:
+    def __init__(self, districts=700, years=6, pincodes=10, days=12, seed=42,
+                 repeats=1, include_raw=False, trace_memory=True, work_dir=None):
+        self.generator = SyntheticDataGenerator(districts, years, pincodes, days, seed)
+        self.scale = {'districts': districts, 'years': years, 'pincodes': pincodes, 'days': days, 'seed': seed}
+        self.repeats = repeats
+        self.include_raw = include_raw
+        self.trace_memory = trace_memory
+        self.work_dir = work_dir
+        self.timings = {}
+
+    def measure(self, stage, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        result = func(*args, **kwargs)
+
+        sample = {
+            'seconds': time.perf_counter() - wall_start,
+            'cpu_seconds': time.process_time() - cpu_start,
+            'peak_memory_mb': None
+        }
+        if self.trace_memory:
+            sample['peak_memory_mb'] = (tracemalloc.get_traced_memory()[1] - baseline) / (1024 * 1024)
+        self.timings.setdefault(stage, []).append(sample)
+        return result
+
+    def generate(self, data_path, raw_path):
+        rows = self.measure('generate_reference', self.generator.write_reference, data_path)
+        if self.include_raw:
+            rows.update(self.measure('generate_raw', self.generator.write_raw, raw_path))
+        return rows
+
+    def run_once(self, data_path, raw_path, output_path):
+        clear_feature_stores()
+        analytics = LifecycleAnalytics(data_path, use_cache=False)
+        self.measure('load_data', analytics.load_data)
+        if self.include_raw:
+            # Rejects and the district index stay in the scratch tree and start empty on every repeat
+            reject_path = f"{output_path}validation/"
+            index_path = f"{output_path}district_index/"
+            for path in (reject_path, index_path):
+                shutil.rmtree(path, ignore_errors=True)
+            self.measure('load_raw_feeds', analytics.load_raw_feeds, raw_path, reject_path=reject_path,
+                         index_path=index_path)
+        self.measure('compute_coverage_ratio', analytics.compute_coverage_ratio)
+        self.measure('compute_demographic_frequency', analytics.compute_demographic_frequency)
+        self.measure('compute_biometric_freshness', analytics.compute_biometric_freshness)
+        self.measure('detect_anomalies', analytics.detect_anomalies)
+        uls = self.measure('compute_universal_lifecycle_score', analytics.compute_universal_lifecycle_score)
+        self.measure('generate_recommendations', analytics.generate_recommendations, uls)
+        self.measure('export_results', analytics.export_results, output_path)
+
+        predictor = AuthFailurePredictor(data_path, use_cache=False)
+        self.measure('prepare_features', predictor.prepare_features)
+        self.measure('train_model', predictor.train_model)
+        self.measure('predict_all_districts', predictor.predict_all_districts)
+
+    def stage_results(self):
+        stages = []
+        for stage, samples in self.timings.items():
+            seconds = [s['seconds'] for s in samples]
+            peaks = [s['peak_memory_mb'] for s in samples if s['peak_memory_mb'] is not None]
+            stages.append({
+                'stage': stage,
+                'runs': len(samples),
+                'seconds': round(float(np.median(seconds)), 4),
+                'min_seconds': round(min(seconds), 4),
+                'cpu_seconds': round(float(np.median([s['cpu_seconds'] for s in samples])), 4),
+                'peak_memory_mb': round(max(peaks), 2) if peaks else None
+            })
+        return stages
+
+    def run(self):
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix='alis-benchmark-')
+        data_path = os.path.join(work_dir, 'datasets', '')
+        raw_path = os.path.join(work_dir, 'raw')
+        output_path = os.path.join(work_dir, 'output', '')
+        os.makedirs(output_path, exist_ok=True)
+
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            rows = self.generate(data_path, raw_path)
+            for _ in range(self.repeats):
+                self.run_once(data_path, raw_path, output_path)
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+            clear_feature_stores()
+            if self.work_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        stages = self.stage_results()
+        pipeline = [s for s in stages if not s['stage'].startswith('generate')]
+        return {
+            'benchmark_version': BENCHMARK_VERSION,
+            'generated_at': datetime.now().isoformat(),
+            'environment': environment_info(),
+            'scale': {**self.scale, 'repeats': self.repeats, 'include_raw': self.include_raw, 'rows': rows},
+            'stages': stages,
+            'totals': {
+                'seconds': round(sum(s['seconds'] for s in pipeline), 4),
+                'peak_memory_mb': max((s['peak_memory_mb'] or 0) for s in pipeline),
+                'max_rss_mb': max_rss_mb()
+            }
+        }
+
+
+def compare_results(baseline, current, tolerance=0.25, min_seconds=0.05):
+    previous = {s['stage']: s for s in baseline['stages']}
+    regressions = []
+    for stage in current['stages']:
+        before = previous.get(stage['stage'])
+        if before is None:
+            continue
+        if stage['seconds'] > max(before['seconds'] * (1 + tolerance), before['seconds'] + min_seconds):
+            regressions.append({'stage': stage['stage'], 'metric': 'seconds',
+                                'baseline': before['seconds'], 'current': stage['seconds']})
+        if (stage['peak_memory_mb'] is not None and before['peak_memory_mb'] is not None and
+                stage['peak_memory_mb'] > max(before['peak_memory_mb'] * (1 + tolerance),
+                                              before['peak_memory_mb'] + 1)):
+            regressions.append({'stage': stage['stage'], 'metric': 'peak_memory_mb',
+                                'baseline': before['peak_memory_mb'], 'current': stage['peak_memory_mb']})
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the ALIS analytics and prediction stages')
+    parser.add_argument('--districts', type=int, default=700)
+    parser.add_argument('--years', type=int, default=6)
+    parser.add_argument('--pincodes', type=int, default=10)
+    parser.add_argument('--days', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--raw', action='store_true', help='also generate and ingest raw API shards')
+    parser.add_argument('--no-trace-memory', action='store_true', help='skip tracemalloc (lower overhead)')
+    parser.add_argument('--work-dir', default=None, help='keep generated data in this directory')
+    parser.add_argument('--output', default='backend/analytics/benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help='previous results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    suite = BenchmarkSuite(args.districts, args.years, args.pincodes, args.days, args.seed,
+                           repeats=args.repeats, include_raw=args.raw,
+                           trace_memory=not args.no_trace_memory, work_dir=args.work_dir)
+    results = suite.run()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print("\nStage timings:")
+    for stage in results['stages']:
+        print(f"  {stage['stage']:<36} {stage['seconds']:>9.4f}s  peak {stage['peak_memory_mb']} MB")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} {r['metric']}: {r['baseline']} -> {r['current']}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,457 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+from export_bundle import ExportBundle, write_json_atomic, write_csv_atomic
+from risk_levels import ULS_DEFAULT_RISK
+
+# people_per_day is the throughput of one mobile unit for one camp-day. Refresh camps move their lever
+# towards zero in proportion to the eligible population they reach; enrolment drives close the coverage gap
+CAMP_TYPES = {
+    'BIOMETRIC_CAMP': {'lever': 'avg_biometric_age_days', 'mode': 'refresh', 'eligible': 'adult_enrolments',
+                       'people_per_day': 400, 'failure_relief': 0.5,
+                       'pincode_weight': ('biometric', 'bio_age_17_')},
+    'SCHOOL_INITIATIVE': {'lever': 'child_refresh_gap_months', 'mode': 'refresh', 'eligible': 'child_enrolments',
+                          'people_per_day': 300, 'failure_relief': 0.0,
+                          'pincode_weight': ('biometric', 'bio_age_5_17')},
+    'ENROLMENT_DRIVE': {'lever': 'coverage_ratio', 'mode': 'enrol', 'eligible': 'unenrolled',
+                        'people_per_day': 250, 'failure_relief': 0.0,
+                        'pincode_weight': ('enrolment', 'row_count')}
+}
+OBJECTIVE_WEIGHTS = {'uls_gain': 1.0, 'failure_reduction': 1.0}
+# Gains are weighed per 100k estimated residents so large districts are not undervalued
+POPULATION_UNIT = 100000
+
+
+def reached_fraction(rate, days):
+    # Share of the eligible population reached after `days` camp-days; each day reaches `rate` of those left
+    return 1 - (1 - np.clip(rate, 0, 1)) ** days
+
+
+def concave_majorant(values):
+    # values is (items x steps + 1) cumulative gain with values[:, 0] at zero days. Returns the slopes of the
+    # least concave majorant, which are non-increasing, so greedy takes each item's days in order
+    # slope of step k = min over i < k of max over j >= k of the chord slope (values[j] - values[i]) / (j - i)
+    steps = values.shape[1] - 1
+    marginal = np.full((len(values), steps), np.inf)
+    for i in range(steps):
+        right = np.full(len(values), -np.inf)
+        for j in range(steps, i, -1):
+            right = np.maximum(right, (values[:, j] - values[:, i]) / (j - i))
+            marginal[:, j - 1] = np.minimum(marginal[:, j - 1], right)
+    return marginal
+
+
+def group_rank(codes):
+    # Position of each element among the earlier elements of its group
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_codes)) + 1])
+    counts = np.diff(np.concatenate([starts, [len(codes)]]))
+    rank = np.empty(len(codes), dtype=np.int64)
+    rank[order] = np.arange(len(codes)) - np.repeat(starts, counts)
+    return rank
+
+
+def greedy_allocate(marginal, groups, total=None):
+    # marginal is (items x steps) and non-increasing along steps. groups lists (codes per item, capacity per
+    # group) from the finest level to the coarsest, each level nested in the next; with nested caps a step a
+    # full group turns away never frees capacity for a later step, so filtering level by level in gain order
+    # keeps exactly what the sequential greedy would
+    items, steps = np.nonzero(marginal > 0)
+    gains = marginal[items, steps]
+    order = np.lexsort((steps, items, -gains))
+    items = items[order]
+
+    keep = np.arange(len(items))
+    for codes, capacity in groups:
+        group = codes[items[keep]]
+        keep = keep[group_rank(group) < capacity[group]]
+    if total is not None:
+        keep = keep[:int(total)]
+    return np.bincount(items[keep], minlength=len(marginal))
+
+
+def pack_clusters(cluster_days, unit_days, units, max_units=None):
+    # Units stay on whole clusters: a cluster takes a dedicated unit for every full unit of its days, and the
+    # remainders are packed first-fit-decreasing into the remaining units, so a cluster is only spread over
+    # more than one unit when it has more than one unit's days. A remainder no unit has room for goes to the
+    # unit with the most room and the rest is returned as dropped days, as are days beyond max_units.
+    # Returns (unit, cluster, days) pieces in each unit's working order
+    cluster_days = np.asarray(cluster_days, dtype=np.int64)
+    cap = units if max_units is None else max_units
+    pieces = []
+    remainders = []
+    dropped = np.zeros(len(cluster_days), dtype=np.int64)
+    unit = 0
+    for cluster in np.argsort(-cluster_days, kind='stable'):
+        full = int(min(cluster_days[cluster] // unit_days, cap, units - unit))
+        for _ in range(full):
+            pieces.append((unit, int(cluster), int(unit_days)))
+            unit += 1
+        remainder = int(cluster_days[cluster] - full * unit_days)
+        if remainder and full < cap:
+            remainders.append((int(cluster), remainder))
+        else:
+            dropped[cluster] = remainder
+
+    free = np.full(units - unit, unit_days, dtype=np.int64)
+    for cluster, remainder in sorted(remainders, key=lambda r: -r[1]):
+        fits = np.flatnonzero(free >= remainder)
+        shared = fits[0] if len(fits) else int(np.argmax(free)) if len(free) else None
+        if shared is None or free[shared] == 0:
+            dropped[cluster] = remainder
+            continue
+        take = int(min(free[shared], remainder))
+        free[shared] -= take
+        pieces.append((unit + int(shared), cluster, take))
+        dropped[cluster] = remainder - take
+
+    pieces = pd.DataFrame(pieces, columns=['unit', 'cluster', 'camp_days'])
+    return pieces.sort_values('unit', kind='stable').reset_index(drop=True), dropped
+
+
+def trim_steps(marginal, days, groups, drop):
+    # Removes drop[group] of each group's selected steps, lowest gain first; within an item the last steps go
+    # first, so every item keeps a prefix of its days
+    rows = np.repeat(np.arange(len(days)), days)
+    steps = np.arange(len(rows)) - np.repeat(np.cumsum(days) - days, days)
+    gains = marginal[rows, steps]
+    order = np.lexsort((-steps, gains, groups[rows]))
+    removed = group_rank(groups[rows[order]]) < drop[groups[rows[order]]]
+    keep = np.ones(len(rows), dtype=bool)
+    keep[order[removed]] = False
+    return np.bincount(rows[keep], minlength=len(days))
+
+
+class CampAllocator:
+    def __init__(self, engine, units=20, days_per_month=22, months=1, max_days_per_district=10,
+                 max_units_per_cluster=None, cluster_column='state', camp_types=None, objective_weights=None):
+        self.engine = engine
+        self.units = units
+        self.days_per_month = days_per_month
+        self.months = months
+        self.max_days_per_district = max_days_per_district * months
+        self.max_units_per_cluster = max_units_per_cluster
+        self.cluster_column = cluster_column
+        self.camp_types = dict(camp_types or CAMP_TYPES)
+        self.objective_weights = dict(objective_weights or OBJECTIVE_WEIGHTS)
+        self.stats = {}
+        self.assignment = None
+
+        base = engine.base
+        self.district_ids = engine.district_ids
+        if cluster_column in base.columns:
+            self.clusters = base[cluster_column].fillna('').astype(str).to_numpy()
+        else:
+            self.clusters = engine.analytics.district_states(base['district_id']).to_numpy()
+        self.population = self.eligible_population()
+
+    @property
+    def unit_days(self):
+        return self.days_per_month * self.months
+
+    @property
+    def capacity(self):
+        return self.units * self.unit_days
+
+    def eligible_population(self):
+        enrolment = self.engine.analytics.enrolment_df.drop_duplicates('district_id').copy()
+        enrolment['district_id'] = enrolment['district_id'].astype(str)
+        enrolment = enrolment.set_index('district_id').reindex(self.district_ids)
+        coverage = self.engine.inputs['coverage_ratio']
+        enrolled = (enrolment['child_enrolments'] + enrolment['adult_enrolments']).to_numpy(dtype=np.float64)
+        residents = np.where(coverage > 0, enrolled / np.where(coverage > 0, coverage, 1), enrolled)
+        return {
+            'adult_enrolments': enrolment['adult_enrolments'].to_numpy(dtype=np.float64),
+            'child_enrolments': enrolment['child_enrolments'].to_numpy(dtype=np.float64),
+            'unenrolled': np.clip(residents - enrolled, 0, None),
+            'residents': np.nan_to_num(residents)
+        }
+
+    def daily_rate(self, camp):
+        eligible = np.nan_to_num(self.population[self.camp_types[camp]['eligible']])
+        rate = self.camp_types[camp]['people_per_day'] / np.where(eligible > 0, eligible, np.inf)
+        return np.clip(rate, 0, 1)
+
+    def levers_for(self, days):
+        # days maps camp type to (scenarios x districts) camp-days; returns ScenarioEngine perturbations
+        shape = next(iter(days.values())).shape
+        levers = {}
+        failure_scale = np.ones(shape)
+        for camp, camp_days in days.items():
+            spec = self.camp_types[camp]
+            reached = reached_fraction(self.daily_rate(camp)[None, :], camp_days)
+            scale, offset = np.ones(shape), np.zeros(shape)
+            if spec['mode'] == 'refresh':
+                scale = 1 - reached
+            else:
+                offset = (1 - self.engine.inputs[spec['lever']])[None, :].clip(0, None) * reached
+            levers[spec['lever']] = (scale, offset, np.full(shape, np.nan))
+            failure_scale = failure_scale * (1 - spec['failure_relief'] * reached)
+        levers['biometric_failure_rate'] = (failure_scale, np.zeros(shape), np.full(shape, np.nan))
+        return levers
+
+    def outcomes(self, days):
+        n_scenarios = next(iter(days.values())).shape[0]
+        per_batch = max(1, self.engine.batch_rows // max(len(self.district_ids), 1))
+        results = []
+        for start in range(0, n_scenarios, per_batch):
+            batch = {camp: camp_days[start:start + per_batch] for camp, camp_days in days.items()}
+            results.append(self.engine.evaluate_levers(self.levers_for(batch),
+                                                       len(next(iter(batch.values())))))
+        failure = 'predicted_auth_failure_prob' if 'predicted_auth_failure_prob' in results[0] \
+            else 'auth_failure_probability'
+        return {
+            'uls_score': np.concatenate([r['uls_score'] for r in results]),
+            'failure': np.concatenate([r[failure] for r in results]),
+            'risk_classification': np.concatenate([r['risk_classification'] for r in results])
+        }, failure
+
+    def value(self, uls_gain, failure_reduction):
+        weight = self.population['residents'] / POPULATION_UNIT
+        return (self.objective_weights['uls_gain'] * uls_gain +
+                self.objective_weights['failure_reduction'] * failure_reduction) * weight
+
+    def benefit_curves(self):
+        # One scenario per (camp type, k camp-days) with every district at k, evaluated in engine batches
+        steps = np.arange(self.max_days_per_district + 1, dtype=np.float64)
+        shape = (len(steps), len(self.district_ids))
+        curves = {}
+        for camp in self.camp_types:
+            result, failure = self.outcomes({camp: np.broadcast_to(steps[:, None], shape)})
+            uls_gain = result['uls_score'] - result['uls_score'][0]
+            failure_reduction = result['failure'][0] - result['failure']
+            curves[camp] = {
+                'uls_gain': uls_gain.T,
+                'failure_reduction': failure_reduction.T,
+                'value': self.value(uls_gain, failure_reduction).T
+            }
+        self.stats['failure_source'] = failure
+        return curves
+
+    def cluster_capacity(self, n_clusters):
+        if self.max_units_per_cluster is None:
+            return np.full(n_clusters, self.capacity)
+        return np.full(n_clusters, self.max_units_per_cluster * self.unit_days)
+
+    def allocate(self, curves=None):
+        start = time.perf_counter()
+        curves = curves or self.benefit_curves()
+        camps = list(self.camp_types)
+        n_districts = len(self.district_ids)
+        values = np.concatenate([curves[camp]['value'] for camp in camps])
+        marginal = concave_majorant(values)
+
+        district = np.tile(np.arange(n_districts), len(camps))
+        cluster_codes, cluster_names = pd.factorize(pd.Series(self.clusters))
+        cluster = cluster_codes[district]
+        days = greedy_allocate(marginal, [
+            (district, np.full(n_districts, self.max_days_per_district)),
+            (cluster, self.cluster_capacity(len(cluster_names)))
+        ], self.capacity)
+
+        # Cluster totals that cannot be laid out on whole units within the unit cap are trimmed, so the plan
+        # only holds camp-days the schedule can serve
+        cluster_days = np.bincount(cluster, weights=days, minlength=len(cluster_names)).astype(np.int64)
+        pieces, dropped = pack_clusters(cluster_days, self.unit_days, self.units, self.max_units_per_cluster)
+        if dropped.any():
+            days = trim_steps(marginal, days, cluster, dropped)
+        self.assignment = pieces.assign(cluster=np.asarray(cluster_names, dtype=object)[pieces['cluster']])
+
+        rows = np.flatnonzero(days)
+        camp_index, district_index = rows // n_districts, rows % n_districts
+        picked = days[rows]
+        base = self.engine.base
+        plan = pd.DataFrame({
+            'district_id': self.district_ids[district_index],
+            'district_name': base['district_name'].astype(str).to_numpy()[district_index],
+            'cluster': self.clusters[district_index],
+            'camp_type': np.asarray(camps)[camp_index],
+            'camp_days': picked,
+            'people_reached': np.zeros(len(rows)),
+            'uls_gain': np.zeros(len(rows)),
+            'failure_reduction': np.zeros(len(rows)),
+            'value': np.zeros(len(rows))
+        })
+        for c, camp in enumerate(camps):
+            mask = camp_index == c
+            d, k = district_index[mask], picked[mask]
+            eligible = np.nan_to_num(self.population[self.camp_types[camp]['eligible']][d])
+            plan.loc[mask, 'people_reached'] = (eligible * reached_fraction(self.daily_rate(camp)[d], k)).round()
+            for column in ('uls_gain', 'failure_reduction', 'value'):
+                plan.loc[mask, column] = curves[camp][column][d, k].round(4)
+
+        plan = plan.sort_values('value', ascending=False, kind='stable').reset_index(drop=True)
+        self.stats.update({
+            'solve_seconds': round(time.perf_counter() - start, 3),
+            'candidate_steps': int(marginal.size),
+            'camp_days_allocated': int(picked.sum()),
+            'camp_days_trimmed': int(dropped.sum()),
+            'capacity': int(self.capacity)
+        })
+        return plan
+
+    def evaluate_plan(self, plan):
+        # Camp types in one district were valued independently; the joint outcome applies them together
+        columns = {camp: np.zeros((1, len(self.district_ids))) for camp in self.camp_types}
+        positions = pd.Index(self.district_ids).get_indexer(plan['district_id'].astype(str))
+        for camp, frame in plan.groupby('camp_type'):
+            columns[camp][0, positions[frame.index]] = frame['camp_days'].to_numpy()
+        result, failure = self.outcomes({camp: np.vstack([np.zeros_like(d), d]) for camp, d in columns.items()})
+        districts = pd.DataFrame({
+            'district_id': self.district_ids,
+            'cluster': self.clusters,
+            'camp_days': sum(d[0] for d in columns.values()).astype(int),
+            'uls_before': result['uls_score'][0],
+            'uls_after': result['uls_score'][1],
+            'failure_before': result['failure'][0],
+            'failure_after': result['failure'][1],
+            'risk_before': result['risk_classification'][0],
+            'risk_after': result['risk_classification'][1]
+        })
+        return districts[districts['camp_days'] > 0].reset_index(drop=True)
+
+    def schedule(self, plan):
+        # Units work through their clusters in the packed order; inside a cluster the camp-days run district by
+        # district, and a cluster split across units hands each unit a consecutive stretch of that sequence
+        location = ['pincode'] if 'pincode' in plan.columns else []
+        plan = plan.sort_values(['cluster', 'district_id'] + location + ['camp_type'], kind='stable')
+        plan = plan.reset_index(drop=True)
+        totals = plan.groupby('cluster')['camp_days'].sum()
+        assignment = self.assignment
+        if assignment is None or (assignment.groupby('cluster')['camp_days'].sum().to_dict() !=
+                                  totals[totals > 0].to_dict()):
+            names = totals.index
+            pieces, dropped = pack_clusters(totals.to_numpy(), self.unit_days, self.units,
+                                            self.max_units_per_cluster)
+            if dropped.any():
+                raise ValueError(f"{int(dropped.sum())} camp-days do not fit on {self.units} units")
+            assignment = pieces.assign(cluster=np.asarray(names, dtype=object)[pieces['cluster']])
+
+        row = np.repeat(np.arange(len(plan)), plan['camp_days'].to_numpy(dtype=np.int64))
+        cluster = plan['cluster'].to_numpy()[row]
+        position = group_rank(pd.factorize(cluster)[0])
+
+        # Each piece covers positions [piece_start, piece_start + days) of its cluster's sequence and slots
+        # [unit_start, unit_start + days) of its unit's calendar
+        assignment = assignment.assign(
+            piece_start=assignment.groupby('cluster')['camp_days'].cumsum() - assignment['camp_days'],
+            unit_start=assignment.groupby('unit')['camp_days'].cumsum() - assignment['camp_days'])
+        lookup = assignment.sort_values(['cluster', 'piece_start'], kind='stable')
+        piece = np.empty(len(row), dtype=np.int64)
+        for name, group in lookup.groupby('cluster', sort=False):
+            members = np.flatnonzero(cluster == name)
+            found = np.searchsorted(group['piece_start'].to_numpy(), position[members], side='right') - 1
+            piece[members] = group.index.to_numpy()[found]
+        unit = assignment['unit'].to_numpy()[piece]
+        slot = assignment['unit_start'].to_numpy()[piece] + position - assignment['piece_start'].to_numpy()[piece]
+
+        slots = pd.DataFrame({'row': row, 'unit': unit + 1, 'month': slot // self.days_per_month + 1,
+                              'day': slot % self.days_per_month + 1})
+        runs = slots.groupby(['unit', 'month', 'row'], as_index=False, sort=False).agg(
+            start_day=('day', 'min'), end_day=('day', 'max'))
+        details = plan.loc[runs['row'], ['cluster', 'district_id'] + location + ['camp_type']].reset_index(drop=True)
+        schedule = pd.concat([runs.drop(columns='row'), details], axis=1)
+        schedule['camp_days'] = schedule['end_day'] - schedule['start_day'] + 1
+        schedule = schedule.sort_values(['unit', 'month', 'start_day'], kind='stable').reset_index(drop=True)
+
+        moves = schedule['unit'].eq(schedule['unit'].shift()) & schedule['cluster'].ne(schedule['cluster'].shift())
+        units_per_cluster = schedule.groupby('cluster')['unit'].nunique()
+        self.stats['units_used'] = int(schedule['unit'].nunique())
+        self.stats['cluster_relocations'] = int(moves.sum())
+        self.stats['clusters_split'] = int((units_per_cluster > 1).sum())
+        self.stats['max_units_in_cluster'] = int(units_per_cluster.max()) if len(units_per_cluster) else 0
+        return schedule
+
+    def split_pincodes(self, plan, raw_feeds):
+        # Each district's camp-days go to its pincodes by the same saturating curve, with a pincode's eligible
+        # population taken as its share of the district's rows in the matching raw feed
+        frames = []
+        for camp, spec in self.camp_types.items():
+            feed, column = spec['pincode_weight']
+            allocated = plan[plan['camp_type'] == camp]
+            if feed not in raw_feeds or not len(allocated):
+                continue
+            pincodes = raw_feeds[feed].dropna(subset=['district_id'])
+            pincodes = pincodes.assign(district_id=pincodes['district_id'].astype(str))
+            pincodes = pincodes.groupby(['district_id', 'pincode'], as_index=False, observed=True)[column].sum()
+            pincodes = pincodes.merge(allocated[['district_id', 'cluster', 'camp_days']], on='district_id')
+            pincodes = pincodes[pincodes[column] > 0].reset_index(drop=True)
+            if not len(pincodes):
+                continue
+
+            share = pincodes[column] / pincodes.groupby('district_id')[column].transform('sum')
+            positions = pd.Index(self.district_ids).get_indexer(pincodes['district_id'])
+            rate = self.daily_rate(camp)[positions] / share.to_numpy()
+            steps = np.arange(int(pincodes['camp_days'].max()) + 1)
+            reached = share.to_numpy()[:, None] * reached_fraction(rate[:, None], steps[None, :])
+
+            district_codes = pd.factorize(pincodes['district_id'])[0]
+            capacity = pincodes.groupby(district_codes)['camp_days'].first().to_numpy()
+            days = greedy_allocate(np.diff(reached, axis=1), [(district_codes, capacity)])
+            pincodes = pincodes.assign(camp_type=camp, camp_days=days, share=share.round(4))
+            frames.append(pincodes.loc[days > 0, ['cluster', 'district_id', 'pincode', 'camp_type',
+                                                  'camp_days', 'share']])
+        if not frames:
+            return pd.DataFrame(columns=['cluster', 'district_id', 'pincode', 'camp_type', 'camp_days', 'share'])
+        return pd.concat(frames, ignore_index=True)
+
+    def summary(self, plan, districts):
+        high_risk_before = int((districts['risk_before'] == ULS_DEFAULT_RISK).sum())
+        high_risk_after = int((districts['risk_after'] == ULS_DEFAULT_RISK).sum())
+        by_type = plan.groupby('camp_type')[['camp_days', 'people_reached']].sum()
+        by_cluster = plan.groupby('cluster')['camp_days'].sum().sort_values(ascending=False)
+        return {
+            **self.stats,
+            'units': self.units,
+            'days_per_month': self.days_per_month,
+            'months': self.months,
+            'max_days_per_district': self.max_days_per_district,
+            'max_units_per_cluster': self.max_units_per_cluster,
+            'districts_served': int(districts['district_id'].nunique()),
+            'people_reached': int(plan['people_reached'].sum()),
+            'total_value': round(float(plan['value'].sum()), 4),
+            'avg_uls_gain_served': round(float((districts['uls_after'] - districts['uls_before']).mean()), 4)
+            if len(districts) else 0.0,
+            'failure_reduction_served': round(float((districts['failure_before'] -
+                                                     districts['failure_after']).sum()), 4),
+            'high_risk_before': high_risk_before,
+            'high_risk_after': high_risk_after,
+            'by_camp_type': {camp: {'camp_days': int(row['camp_days']), 'people_reached': int(row['people_reached'])}
+                             for camp, row in by_type.iterrows()},
+            'by_cluster': {str(cluster): int(days) for cluster, days in by_cluster.items()}
+        }
+
+    def export_plan(self, output_path="backend/analytics/", raw_feeds=None):
+        plan = self.allocate()
+        districts = self.evaluate_plan(plan)
+        pincodes = self.split_pincodes(plan, raw_feeds) if raw_feeds else None
+        schedule = self.schedule(pincodes if pincodes is not None and len(pincodes) else plan)
+        summary = self.summary(plan, districts)
+
+        parts = {'camp_allocation': plan, 'camp_schedule': schedule, 'camp_plan': summary}
+        os.makedirs(output_path, exist_ok=True)
+        write_csv_atomic(plan, f"{output_path}camp_allocation.csv")
+        write_csv_atomic(districts.round(4), f"{output_path}camp_district_outcomes.csv")
+        write_csv_atomic(schedule, f"{output_path}camp_schedule.csv")
+        if pincodes is not None:
+            write_csv_atomic(pincodes, f"{output_path}camp_pincode_allocation.csv")
+            parts['camp_pincode_allocation'] = pincodes
+        write_json_atomic(f"{output_path}camp_plan.json", summary)
+        ExportBundle(output_path).write(parts, component='camps')
+
+        print(f"Allocated {summary['camp_days_allocated']}/{summary['capacity']} camp-days across "
+              f"{summary['districts_served']} districts in {summary['solve_seconds']}s")
+        print(f"High risk districts: {summary['high_risk_before']} -> {summary['high_risk_after']}")
+        return summary
+
+
+if __name__ == "__main__":
+    import sys
+    from lifecycle_analytics import LifecycleAnalytics
+    from scenarios import ScenarioEngine
+    analytics = LifecycleAnalytics()
+    analytics.load_data()
+    allocator = CampAllocator(ScenarioEngine(analytics), units=int(sys.argv[1]) if len(sys.argv) > 1 else 20)
+    allocator.export_plan()
@@ -0,0 +1,389 @@
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules each subcommand needs; anything else stays unimported
+COMMAND_MODULES = {
+    'score': ['lifecycle_analytics'],
+    'incremental': ['lifecycle_analytics', 'incremental_uls'],
+    'train': ['ml_predictor'],
+    'export': ['ml_predictor'],
+    'predict': ['tree_export', 'risk_levels'],
+    'serve': ['inference_server'],
+    'cube': ['lifecycle_analytics'],
+    'scenarios': ['scenarios'],
+    'forecast': ['forecasting', 'validation'],
+    'drift': ['drift_monitor'],
+    'camps': ['camp_allocation', 'scenarios']
+}
+HEAVY_MODULES = ['pandas', 'sklearn', 'joblib', 'pyarrow']
+
+
+def load_command(name):
+    for module in COMMAND_MODULES.get(name, []):
+        importlib.import_module(module)
+    return COMMANDS[name]
+
+
+def command_score(args):
+    from lifecycle_analytics import LifecycleAnalytics
+    analytics = LifecycleAnalytics(args.data_path, use_cache=not args.no_cache)
+    analytics.load_data()
+    if args.raw_path:
+        analytics.detect_pincode_anomalies(args.raw_path, validate=not args.no_validate,
+                                           reject_path=f"{args.output}validation/",
+                                           index_path=f"{args.output}district_index/")
+    if args.workers > 1:
+        from parallel_pipeline import ParallelPipeline
+        ParallelPipeline(analytics, args.workers).run()
+    else:
+        analytics.compute_universal_lifecycle_score()
+    analytics.export_results(args.output, write_legacy=args.legacy_files)
+
+
+def command_incremental(args):
+    from lifecycle_analytics import LifecycleAnalytics
+    from incremental_uls import IncrementalULS
+    from ingestion import ShardIngestor
+    from validation import ValidationStage
+    analytics = LifecycleAnalytics(args.data_path, use_cache=not args.no_cache)
+    analytics.load_data()
+    incremental = IncrementalULS(analytics, f"{args.output}uls_state/")
+    incremental.initialize(rebuild=args.rebuild)
+
+    validator = None if args.no_validate else ValidationStage(f"{incremental.state_path}validation/",
+                                                               persist_seen=True)
+    if validator is not None and args.rebuild:
+        validator.reset('demographic')
+    index = analytics.load_district_index(f"{args.output}district_index/")
+    incremental.ingest_shards(ShardIngestor(args.raw_path, validator=validator, district_index=index))
+    if validator is not None:
+        validator.close()
+    if index.changed or index.unresolved:
+        index.save()
+
+    if len(incremental.changed_ids):
+        incremental.export_changes(args.output, write_legacy=args.legacy_files)
+    else:
+        incremental.save_state()
+
+
+def command_train(args):
+    from ml_predictor import AuthFailurePredictor
+    predictor = AuthFailurePredictor(args.data_path, use_cache=not args.no_cache)
+    predictor.train_model(args.model_type)
+    predictor.save_model(args.output)
+
+
+def command_export(args):
+    from ml_predictor import AuthFailurePredictor
+    from tree_export import stale_tree_model
+    backend = args.backend
+    if backend == 'auto':
+        # The NumPy arrays are only used when they were exported from the model model_config.json describes
+        stale = stale_tree_model(args.model_path)
+        if stale is not None:
+            print(f"Using the sklearn backend: {stale}")
+        backend = 'numpy' if stale is None else 'sklearn'
+    predictor = AuthFailurePredictor(args.data_path, use_cache=not args.no_cache, backend=backend)
+    predictor.load_model(args.model_path)
+    predictor.export_predictions(args.output, write_legacy=args.legacy_files)
+
+
+def command_predict(args):
+    import numpy as np
+    from tree_export import TreeEnsemblePredictor
+    from risk_levels import categorize_risk
+
+    model = TreeEnsemblePredictor.load(args.model_path)
+    if args.input == '-':
+        payload = json.load(sys.stdin)
+    else:
+        with open(args.input, 'r') as f:
+            payload = json.load(f)
+
+    instances = payload if isinstance(payload, list) else payload.get('instances', payload.get('features'))
+    if isinstance(instances, dict) or (instances and not isinstance(instances[0], (dict, list))):
+        instances = [instances]
+    rows = [[instance.get(c) or 0 for c in model.feature_columns] if isinstance(instance, dict) else instance
+            for instance in instances]
+
+    probabilities = np.clip(model.predict(np.asarray(rows, dtype=float)), 0, 100).round(2)
+    predictions = [{'auth_failure_prob': float(p), 'risk_category': str(c)}
+                   for p, c in zip(probabilities, categorize_risk(probabilities))]
+    json.dump({'predictions': predictions}, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def command_serve(args):
+    from inference_server import serve
+    serve(args.model_path, args.host, args.port, backend=args.backend)
+
+
+def command_cube(args):
+    from lifecycle_analytics import LifecycleAnalytics
+    analytics = LifecycleAnalytics(args.data_path)
+    cube = analytics.update_feed_cube(args.raw_path, args.feed, args.output, args.period, workers=args.workers,
+                                      validate=not args.no_validate)
+    print(cube.stats(['state'], statistics=('sum',)).to_string())
+
+
+def command_scenarios(args):
+    from lifecycle_analytics import LifecycleAnalytics
+    from scenarios import ScenarioEngine, load_scenarios
+    analytics = LifecycleAnalytics(args.data_path, use_cache=not args.no_cache)
+    analytics.load_data()
+    predictor = None
+    if args.model_path:
+        from ml_predictor import AuthFailurePredictor
+        predictor = AuthFailurePredictor(args.data_path, use_cache=not args.no_cache, backend=args.backend)
+        predictor.load_model(args.model_path)
+
+    engine = ScenarioEngine(analytics, predictor)
+    summary, districts = engine.evaluate(load_scenarios(args.scenarios), details=True)
+    print(summary.to_string(index=False))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+        print(f"Scenario summary written to {args.output}")
+    if args.details:
+        districts.to_csv(args.details, index=False)
+        print(f"Per-district deltas written to {args.details}")
+
+
+def command_forecast(args):
+    from forecasting import ForecastEngine
+    from ingestion import ShardIngestor
+    from validation import ValidationStage
+    engine = ForecastEngine(f"{args.output}forecast_state/")
+    engine.load_sources()
+    if args.data_path:
+        from feature_store import get_feature_store
+        engine.update_yearly(get_feature_store(args.data_path, not args.no_cache).dataset('biometric'))
+    if args.raw_path:
+        validator = None if args.no_validate else ValidationStage(f"{engine.state_path}validation/",
+                                                                   persist_seen=True)
+        engine.update_daily(ShardIngestor(args.raw_path, validator=validator), level=args.level)
+        if validator is not None:
+            validator.close()
+    engine.save()
+    engine.export_forecasts(args.output, args.months)
+
+
+def command_drift(args):
+    from drift_monitor import DriftMonitor
+    monitor = DriftMonitor(retrain_psi=args.retrain_psi)
+    if monitor.load_reference(args.model_path) is None:
+        raise SystemExit(f"No drift reference in {args.model_path}; train and save a model first")
+    current = monitor.merged_runs(args.output, last=args.last)
+    if current is None:
+        raise SystemExit("No scoring runs recorded against the current reference")
+    report = monitor.compare(current)
+    for column, stats in {**report['features'], 'prediction': report['prediction']}.items():
+        print(f"{column:<28} psi {stats['psi']:>8.4f}  ks {stats['ks']:>6.4f}  {stats['status']}")
+    monitor.write_report(report, args.output)
+
+
+def command_camps(args):
+    from lifecycle_analytics import LifecycleAnalytics
+    from scenarios import ScenarioEngine
+    from camp_allocation import CampAllocator
+    analytics = LifecycleAnalytics(args.data_path, use_cache=not args.no_cache)
+    analytics.load_data()
+    predictor = None
+    if args.model_path:
+        from ml_predictor import AuthFailurePredictor
+        predictor = AuthFailurePredictor(args.data_path, use_cache=not args.no_cache, backend=args.backend)
+        predictor.load_model(args.model_path)
+    raw_feeds = None
+    if args.raw_path:
+        raw_feeds = analytics.load_raw_feeds(args.raw_path, validate=not args.no_validate,
+                                             reject_path=f"{args.output}validation/", level='pincode',
+                                             index_path=f"{args.output}district_index/")
+
+    allocator = CampAllocator(ScenarioEngine(analytics, predictor), units=args.units,
+                              days_per_month=args.days_per_month, months=args.months,
+                              max_days_per_district=args.max_days_per_district,
+                              max_units_per_cluster=args.max_units_per_cluster)
+    allocator.export_plan(args.output, raw_feeds)
+
+
+def measure_startup(command, repeats=5):
+    analytics_dir = os.path.dirname(os.path.abspath(__file__))
+    probe = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"sys.path.insert(0, {analytics_dir!r})\n"
+        "import cli\n"
+        f"cli.load_command({command!r})\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'import_seconds': elapsed, 'modules': len(sys.modules), 'heavy': heavy}))\n"
+    )
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+        sample = json.loads(output.stdout)
+        sample['process_seconds'] = time.perf_counter() - start
+        samples.append(sample)
+
+    return {
+        'command': command,
+        'repeats': repeats,
+        'import_ms': round(statistics.median(s['import_seconds'] for s in samples) * 1000, 1),
+        'process_ms': round(statistics.median(s['process_seconds'] for s in samples) * 1000, 1),
+        'modules_loaded': samples[-1]['modules'],
+        'heavy_modules': samples[-1]['heavy']
+    }
+
+
+def command_startup(args):
+    commands = args.commands or list(COMMAND_MODULES)
+    unknown = [c for c in commands if c not in COMMAND_MODULES]
+    if unknown:
+        raise SystemExit(f"Unknown commands: {', '.join(unknown)}")
+    results = [measure_startup(command, args.repeats) for command in commands]
+    for r in results:
+        print(f"{r['command']:<8} import {r['import_ms']:>8.1f} ms  process {r['process_ms']:>8.1f} ms  "
+              f"heavy: {', '.join(r['heavy_modules']) or '-'}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"Startup results written to {args.output}")
+
+
+COMMANDS = {
+    'score': command_score,
+    'incremental': command_incremental,
+    'train': command_train,
+    'export': command_export,
+    'predict': command_predict,
+    'serve': command_serve,
+    'cube': command_cube,
+    'scenarios': command_scenarios,
+    'forecast': command_forecast,
+    'drift': command_drift,
+    'camps': command_camps,
+    'startup': command_startup
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='alis', description='ALIS analytics command line')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    score = subparsers.add_parser('score', help='compute ULS scores and export analytics results')
+    score.add_argument('--data-path', default='datasets/')
+    score.add_argument('--output', default='backend/analytics/')
+    score.add_argument('--workers', type=int, default=1)
+    score.add_argument('--raw-path', default=None,
+                       help='raw API shard root; blends pincode-level spike detection into the anomaly score')
+    score.add_argument('--no-validate', action='store_true', help='skip raw row validation and deduplication')
+    score.add_argument('--no-cache', action='store_true')
+    score.add_argument('--legacy-files', action='store_true',
+                       help='also write the flat uls_scores.csv/*.json files next to the export bundle')
+
+    incremental = subparsers.add_parser('incremental',
+                                        help='apply new raw demographic shards and rescore only changed districts')
+    incremental.add_argument('--data-path', default='datasets/')
+    incremental.add_argument('--raw-path', default='./', help='raw API shard root; unapplied shards form the delta')
+    incremental.add_argument('--output', default='backend/analytics/')
+    incremental.add_argument('--rebuild', action='store_true',
+                             help='rescore every district from --data-path and reapply all shards')
+    incremental.add_argument('--no-validate', action='store_true', help='skip raw row validation and deduplication')
+    incremental.add_argument('--no-cache', action='store_true')
+    incremental.add_argument('--legacy-files', action='store_true',
+                             help='also write the flat uls_scores.csv/*.json files next to the export bundle')
+
+    train = subparsers.add_parser('train', help='train and save the authentication failure model')
+    train.add_argument('--data-path', default='datasets/')
+    train.add_argument('--output', default='backend/analytics/')
+    train.add_argument('--model-type', default='gradient_boosting',
+                       choices=['gradient_boosting', 'hist_gradient_boosting', 'random_forest', 'ridge', 'search'])
+    train.add_argument('--no-cache', action='store_true')
+
+    export = subparsers.add_parser('export', help='export predictions for every district from a saved model')
+    export.add_argument('--data-path', default='datasets/')
+    export.add_argument('--model-path', default='backend/analytics/')
+    export.add_argument('--output', default='backend/analytics/')
+    export.add_argument('--backend', default='auto', choices=['auto', 'numpy', 'sklearn'],
+                        help='auto uses the NumPy tree arrays when they match the saved model')
+    export.add_argument('--no-cache', action='store_true')
+    export.add_argument('--legacy-files', action='store_true',
+                        help='also write the flat ml_predictions.csv/*.json files next to the export bundle')
+
+    predict = subparsers.add_parser('predict', help='score feature vectors from JSON with the NumPy tree model')
+    predict.add_argument('--model-path', default='backend/analytics/')
+    predict.add_argument('--input', default='-', help="JSON file with 'instances', or - for stdin")
+
+    serve = subparsers.add_parser('serve', help='run the warm inference server')
+    serve.add_argument('--model-path', default='backend/analytics/')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=int(os.environ.get('INFERENCE_PORT', 8765)))
+    serve.add_argument('--backend', default='sklearn', choices=['numpy', 'sklearn'])
+
+    cube = subparsers.add_parser('cube', help='incrementally ingest new raw shards into the aggregation cube')
+    cube.add_argument('--raw-path', default='./')
+    cube.add_argument('--feed', default='demographic', choices=['demographic', 'enrolment', 'biometric'])
+    cube.add_argument('--period', default='year', choices=['year', 'month'])
+    cube.add_argument('--output', default='backend/analytics/')
+    cube.add_argument('--workers', type=int, default=1)
+    cube.add_argument('--data-path', default='datasets/')
+    cube.add_argument('--no-validate', action='store_true', help='skip raw row validation and deduplication')
+
+    scenarios = subparsers.add_parser('scenarios', help='evaluate a batch of what-if scenarios')
+    scenarios.add_argument('scenarios', help="JSON list of scenarios, or {'scenarios': [...]}")
+    scenarios.add_argument('--data-path', default='datasets/')
+    scenarios.add_argument('--model-path', default=None, help='also project predicted failure with this model')
+    scenarios.add_argument('--backend', default='numpy', choices=['numpy', 'sklearn'])
+    scenarios.add_argument('--output', default=None)
+    scenarios.add_argument('--details', default=None, help='CSV for per-district deltas of targeted districts')
+    scenarios.add_argument('--no-cache', action='store_true')
+
+    forecast = subparsers.add_parser('forecast', help='update cached forecast state and export 1-12 month forecasts')
+    forecast.add_argument('--data-path', default='datasets/')
+    forecast.add_argument('--raw-path', default=None, help='raw API shard root for daily demand forecasts')
+    forecast.add_argument('--level', default='district', choices=['district', 'pincode'])
+    forecast.add_argument('--months', type=int, default=12)
+    forecast.add_argument('--no-validate', action='store_true', help='skip raw row validation and deduplication')
+    forecast.add_argument('--output', default='backend/analytics/')
+    forecast.add_argument('--no-cache', action='store_true')
+
+    drift = subparsers.add_parser('drift', help='compare recent scoring runs with the training distribution')
+    drift.add_argument('--model-path', default='backend/analytics/')
+    drift.add_argument('--output', default='backend/analytics/')
+    drift.add_argument('--last', type=int, default=1, help='merge the sketches of this many recent runs')
+    drift.add_argument('--retrain-psi', type=float, default=0.25)
+
+    camps = subparsers.add_parser('camps', help='allocate mobile camp-days to districts under unit capacity')
+    camps.add_argument('--data-path', default='datasets/')
+    camps.add_argument('--model-path', default=None, help='value failure reduction with this model')
+    camps.add_argument('--backend', default='numpy', choices=['numpy', 'sklearn'])
+    camps.add_argument('--units', type=int, default=20, help='mobile units available')
+    camps.add_argument('--days-per-month', type=int, default=22)
+    camps.add_argument('--months', type=int, default=1)
+    camps.add_argument('--max-days-per-district', type=int, default=10, help='camp-days per district per month')
+    camps.add_argument('--max-units-per-cluster', type=int, default=None,
+                       help='units one state can hold; states are the travel clusters')
+    camps.add_argument('--raw-path', default=None, help='raw API shard root; splits district camp-days by pincode')
+    camps.add_argument('--no-validate', action='store_true', help='skip raw row validation and deduplication')
+    camps.add_argument('--output', default='backend/analytics/')
+    camps.add_argument('--no-cache', action='store_true')
+
+    startup = subparsers.add_parser('startup', help='benchmark import time of each subcommand')
+    startup.add_argument('commands', nargs='*', help=f"subset of: {', '.join(COMMAND_MODULES)}")
+    startup.add_argument('--repeats', type=int, default=5)
+    startup.add_argument('--output', default=None)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    load_command(args.command)(args)
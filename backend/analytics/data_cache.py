@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+import glob
+import hashlib
+import json
+import os
+from lazy_imports import lazy_import, module_available
+
+feather = lazy_import('pyarrow.feather') if module_available('pyarrow') else None
+
+BOOL_COLUMNS = ['update_spike_detected', 'anomaly_detected']
+CATEGORY_MAX_RATIO = 0.5
+
+
+def file_digest(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_frame_file(df, path):
+    tmp_path = f"{path}.tmp"
+    if feather is not None:
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_frame_file(path):
+    if feather is not None:
+        # split_blocks keeps each column in its own block, so null-free numeric columns are views on the
+        # memory map rather than copies; strings, categoricals and columns with nulls are still materialized
+        return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    return pd.read_pickle(path)
+
+
+def frame_extension():
+    return 'feather' if feather is not None else 'pkl'
+
+
+def optimize_dtypes(df, downcast_floats=False):
+    for column in df.columns:
+        series = df[column]
+
+        if column in BOOL_COLUMNS or pd.api.types.is_bool_dtype(series):
+            # A missing flag is an unflagged row; astype(bool) alone would turn NaN into True
+            df[column] = series.fillna(False).astype(bool)
+        elif pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            if downcast_floats:
+                df[column] = series.astype(np.float32)
+        elif series.nunique(dropna=False) <= len(series) * CATEGORY_MAX_RATIO:
+            df[column] = series.astype('category')
+
+    return df
+
+
+class DatasetCache:
+    def __init__(self, cache_dir="backend/analytics/.cache/", downcast_floats=False, source=None):
+        self.cache_dir = cache_dir
+        self.downcast_floats = downcast_floats
+        self.source = source
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.index = None
+
+    def _load_index(self):
+        if self.index is None:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r') as f:
+                    self.index = json.load(f)
+            else:
+                self.index = {}
+        return self.index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def fingerprint(self, path):
+        index = self._load_index()
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+
+        entry = index.get(source)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['digest']
+
+        digest = file_digest(source)
+        index[source] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'digest': digest}
+        self._save_index()
+        return digest
+
+    def cache_file(self, name, key, source=None):
+        # Entries are scoped by their source directory, so two data paths sharing a cache never prune each other
+        source = source or self.source
+        if source is not None:
+            name = f"{name}_{hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:8]}"
+        extension = frame_extension()
+        suffix = 'f32' if self.downcast_floats else 'f64'
+        return os.path.join(self.cache_dir, f"{name}-{key[:16]}-{suffix}.{extension}")
+
+    def read_csv(self, path, **kwargs):
+        name = os.path.splitext(os.path.basename(path))[0]
+        source = os.path.dirname(os.path.abspath(path))
+        cached = self.read_frame(name, self.fingerprint(path), source)
+        if cached is not None:
+            return cached
+
+        df = optimize_dtypes(pd.read_csv(path, **kwargs), self.downcast_floats)
+        self.write_frame(df, name, self.fingerprint(path), source)
+        return df
+
+    def read_frame(self, name, key, source=None):
+        cached = self.cache_file(name, key, source)
+        if not os.path.exists(cached):
+            return None
+        return read_frame_file(cached)
+
+    def write_frame(self, df, name, key, source=None):
+        cached = self.cache_file(name, key, source)
+        self._prune(cached)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_frame_file(df, cached)
+
+    def _prune(self, cached):
+        name, _, suffix = os.path.basename(cached).rsplit('-', 2)
+        stale = glob.glob(os.path.join(glob.escape(self.cache_dir), f"{glob.escape(name)}-*-{suffix}"))
+        for path in stale:
+            os.remove(path)
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            os.remove(os.path.join(self.cache_dir, name))
+        self.index = None
@@ -0,0 +1,204 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+from export_bundle import write_json_atomic, write_csv_atomic
+
+INDEX_FILES = ['pincodes', 'pincode_codes', 'pincode_weights']
+UNRESOLVED_FILE = 'unresolved_districts.csv'
+# Keys are already normalized (lowercase, '&' as 'and', alphanumerics only)
+STATE_ALIASES = {
+    'orissa': 'odisha',
+    'pondicherry': 'puducherry',
+    'westbangal': 'westbengal',
+    'uttaranchal': 'uttarakhand',
+    'dadraandnagarhaveli': 'dadraandnagarhavelianddamananddiu',
+    'damananddiu': 'dadraandnagarhavelianddamananddiu'
+}
+
+
+def normalize_keys(names):
+    return (names.astype(str).str.lower().str.replace('&', 'and', regex=False)
+            .str.replace(r'[^a-z0-9]', '', regex=True))
+
+
+def name_keys(state, district, state_aliases=STATE_ALIASES):
+    states = normalize_keys(pd.Series(state))
+    states = states.map(lambda key: state_aliases.get(key, key))
+    return (states + '|' + normalize_keys(pd.Series(district))).to_numpy()
+
+
+class DistrictIndex:
+    def __init__(self, index_path="backend/analytics/district_index/", alias_share=0.8, min_alias_rows=10):
+        self.index_path = index_path
+        self.alias_share = alias_share
+        self.min_alias_rows = min_alias_rows
+        self.version = None
+        self.district_ids = np.array([], dtype=object)
+        self.master_keys = {}
+        self.aliases = {}
+        self.pincodes = np.array([], dtype=np.int64)
+        self.pincode_codes = np.array([], dtype=np.int32)
+        self.pincode_weights = np.array([], dtype=np.float64)
+        self.unresolved = {}
+        self.changed = False
+        self.lookup = None
+
+    @classmethod
+    def from_frame(cls, master, version=None, index_path="backend/analytics/district_index/", **kwargs):
+        index = cls(index_path, **kwargs)
+        index.version = version
+        master = master.drop_duplicates('district_id')
+        index.district_ids = master['district_id'].astype(str).to_numpy(dtype=object)
+        keys = name_keys(master['state'], master['district_name'])
+        # The first district wins when two master rows normalize to the same key
+        index.master_keys = {key: code for code, key in reversed(list(enumerate(keys)))}
+        index.changed = True
+        return index
+
+    @classmethod
+    def load_or_build(cls, master, version, index_path="backend/analytics/district_index/", **kwargs):
+        index = cls(index_path, **kwargs)
+        loaded = index.load()
+        if loaded and index.version == version:
+            return index
+        print("District master changed, rebuilding the district index" if loaded else "Building the district index")
+        index = cls.from_frame(master, version, index_path, **kwargs)
+        index.save()
+        return index
+
+    def key_codes(self):
+        if self.lookup is None:
+            keys = {**self.aliases, **self.master_keys}
+            self.lookup = (pd.Index(list(keys)), np.fromiter(keys.values(), dtype=np.int32, count=len(keys)))
+        return self.lookup
+
+    def name_codes(self, state, district):
+        # Raw feeds repeat a few thousand spellings across millions of rows, so only the distinct
+        # (state, district) pairs are normalized and looked up
+        state_codes, states = pd.factorize(pd.Series(state), use_na_sentinel=False)
+        district_codes, districts = pd.factorize(pd.Series(district), use_na_sentinel=False)
+        width = max(len(districts), 1)
+        pair_codes, pairs = pd.factorize(state_codes.astype(np.int64) * width + district_codes)
+        keys = name_keys(np.asarray(states, dtype=object)[pairs // width],
+                         np.asarray(districts, dtype=object)[pairs % width])
+
+        index, codes = self.key_codes()
+        positions = index.get_indexer(keys)
+        resolved = np.where(positions >= 0, codes[positions], -1).astype(np.int32)
+        return resolved[pair_codes], keys[pair_codes]
+
+    def codes_for_pincodes(self, pincodes):
+        pincodes = np.asarray(pincodes, dtype=np.int64)
+        if not len(self.pincodes):
+            return np.full(len(pincodes), -1, dtype=np.int32)
+        positions = np.searchsorted(self.pincodes, pincodes).clip(max=len(self.pincodes) - 1)
+        return np.where(self.pincodes[positions] == pincodes, self.pincode_codes[positions], -1).astype(np.int32)
+
+    def learn(self, pincodes, codes, keys, weights):
+        # Pincodes take the district their rows name most often; an unmatched spelling becomes an
+        # alias once its pincodes point at one district often enough
+        votes = pd.DataFrame({'pincode': np.asarray(pincodes, dtype=np.int64), 'code': codes,
+                              'weight': np.asarray(weights, dtype=np.float64)})
+        named = votes[votes['code'] >= 0]
+        if len(self.pincodes):
+            named = pd.concat([named, pd.DataFrame({'pincode': self.pincodes, 'code': self.pincode_codes,
+                                                    'weight': self.pincode_weights})])
+        if len(named):
+            totals = named.groupby(['pincode', 'code'], as_index=False)['weight'].sum()
+            best = totals.sort_values(['pincode', 'weight'], ascending=[True, False], kind='stable')
+            best = best.drop_duplicates('pincode')
+            self.pincodes = best['pincode'].to_numpy(dtype=np.int64)
+            self.pincode_codes = best['code'].to_numpy(dtype=np.int32)
+            self.pincode_weights = best['weight'].to_numpy(dtype=np.float64)
+            self.changed = True
+
+        unmatched = votes['code'].to_numpy() < 0
+        if unmatched.any():
+            candidates = pd.DataFrame({'key': keys[unmatched],
+                                       'code': self.codes_for_pincodes(votes['pincode'].to_numpy()[unmatched]),
+                                       'weight': votes['weight'].to_numpy()[unmatched]})
+            totals = candidates.groupby('key')['weight'].sum()
+            backed = candidates[candidates['code'] >= 0].groupby(['key', 'code'], as_index=False)['weight'].sum()
+            backed = backed.sort_values(['key', 'weight'], ascending=[True, False], kind='stable')
+            backed = backed.drop_duplicates('key')
+            share = backed['weight'].to_numpy() / totals.reindex(backed['key']).to_numpy()
+            accepted = backed[(share >= self.alias_share) & (backed['weight'].to_numpy() >= self.min_alias_rows)]
+            for key, code in zip(accepted['key'], accepted['code']):
+                self.aliases[key] = int(code)
+            if len(accepted):
+                self.lookup = None
+                self.changed = True
+                print(f"Learned {len(accepted)} district name aliases from pincode evidence")
+
+    def resolve(self, state, district, pincodes=None, weights=None, learn=True):
+        codes, keys = self.name_codes(state, district)
+        weights = np.ones(len(codes)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if pincodes is not None:
+            if learn:
+                self.learn(pincodes, codes, keys, weights)
+                codes, keys = self.name_codes(state, district)
+            codes = np.where(codes >= 0, codes, self.codes_for_pincodes(pincodes)).astype(np.int32)
+
+        missing = codes < 0
+        if missing.any():
+            counts = pd.Series(weights[missing]).groupby(keys[missing]).sum()
+            for key, count in counts.items():
+                self.unresolved[key] = self.unresolved.get(key, 0) + float(count)
+        return codes
+
+    def district_id(self, codes):
+        return pd.Categorical.from_codes(np.asarray(codes), categories=pd.Index(self.district_ids, dtype=str))
+
+    def assign(self, frame, weight_column=None, learn=True):
+        pincodes = frame['pincode'] if 'pincode' in frame.columns else None
+        weights = frame[weight_column].to_numpy() if weight_column else None
+        codes = self.resolve(frame['state'], frame['district'], pincodes, weights, learn)
+        resolved = codes >= 0
+        print(f"Resolved {int(resolved.sum())}/{len(frame)} rows to districts")
+        return frame.assign(district_id=self.district_id(codes))
+
+    def report(self):
+        rows = sorted(self.unresolved.items(), key=lambda item: -item[1])
+        return pd.DataFrame({'key': [key for key, _ in rows], 'rows': [count for _, count in rows]})
+
+    def save(self):
+        os.makedirs(self.index_path, exist_ok=True)
+        for name in INDEX_FILES:
+            np.save(os.path.join(self.index_path, f"{name}.npy"), getattr(self, name))
+        write_json_atomic(os.path.join(self.index_path, 'meta.json'), {
+            'version': self.version,
+            'district_ids': [str(i) for i in self.district_ids],
+            'master_keys': self.master_keys,
+            'aliases': self.aliases
+        })
+        if self.unresolved:
+            write_csv_atomic(self.report(), os.path.join(self.index_path, UNRESOLVED_FILE))
+        self.changed = False
+
+    def load(self):
+        meta_path = os.path.join(self.index_path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        self.version = meta['version']
+        self.district_ids = np.array(meta['district_ids'], dtype=object)
+        self.master_keys = meta['master_keys']
+        self.aliases = meta['aliases']
+        for name in INDEX_FILES:
+            setattr(self, name, np.load(os.path.join(self.index_path, f"{name}.npy")))
+        self.lookup = None
+        return True
+
+
+if __name__ == "__main__":
+    import sys
+    from feature_store import get_feature_store
+    from ingestion import ShardIngestor
+    store = get_feature_store()
+    index = DistrictIndex.load_or_build(store.dataset('district_master'), store.file_version('district_master'))
+    rolled = ShardIngestor(sys.argv[1] if len(sys.argv) > 1 else "./").rollup('demographic', level='pincode')
+    rolled = index.assign(rolled, 'row_count')
+    index.save()
+    print(index.report().head(20))
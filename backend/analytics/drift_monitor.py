@@ -0,0 +1,254 @@
+import numpy as np
+import json
+import os
+from datetime import datetime
+from export_bundle import write_json_atomic
+from risk_levels import classify_scores
+
+REFERENCE_FILE = 'drift_reference.json'
+REPORT_FILE = 'drift_report.json'
+DRIFT_DIR = 'drift/'
+PREDICTION_COLUMN = 'predicted_auth_failure_prob'
+# Conventional PSI cut-offs: below 0.1 no meaningful shift, above 0.25 the model needs attention
+DRIFT_BANDS = [(0.25, 'significant'), (0.1, 'moderate')]
+DRIFT_DEFAULT = 'stable'
+
+
+class HistogramSketch:
+    # Fixed-bin counts per column plus running moments; sketches over the same edges merge by addition
+    def __init__(self, columns, edges):
+        self.columns = list(columns)
+        self.edges = [np.asarray(e, dtype=np.float64) for e in edges]
+        self.counts = [np.zeros(len(e) + 1, dtype=np.int64) for e in self.edges]
+        self.rows = 0
+        self.missing = np.zeros(len(self.columns), dtype=np.int64)
+        self.total = np.zeros(len(self.columns))
+        self.squares = np.zeros(len(self.columns))
+        self.low = np.full(len(self.columns), np.inf)
+        self.high = np.full(len(self.columns), -np.inf)
+
+    @classmethod
+    def from_reference(cls, columns, X, bins=20):
+        # Interior edges sit at the reference quantiles, so each bin holds about 1/bins of training rows;
+        # repeated quantiles of discrete features collapse into fewer bins
+        X = np.asarray(X, dtype=np.float64)
+        quantiles = np.nanquantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0)
+        sketch = cls(columns, [np.unique(quantiles[:, j]) for j in range(X.shape[1])])
+        sketch.add(X)
+        return sketch
+
+    def empty(self):
+        return HistogramSketch(self.columns, self.edges)
+
+    def add(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        observed = ~np.isnan(X)
+        for j, edges in enumerate(self.edges):
+            values = X[observed[:, j], j]
+            self.counts[j] += np.bincount(np.searchsorted(edges, values, side='left'), minlength=len(edges) + 1)
+        self.rows += len(X)
+        self.missing += (~observed).sum(axis=0)
+        self.total += np.nansum(X, axis=0)
+        self.squares += np.nansum(X ** 2, axis=0)
+        if len(X):
+            self.low = np.fmin(self.low, np.nanmin(np.where(observed, X, np.inf), axis=0))
+            self.high = np.fmax(self.high, np.nanmax(np.where(observed, X, -np.inf), axis=0))
+        return self
+
+    def merge(self, other):
+        if other.columns != self.columns or any(len(a) != len(b) or (a != b).any()
+                                                for a, b in zip(self.edges, other.edges)):
+            raise ValueError("Sketches over different columns or bin edges cannot be merged")
+        merged = self.empty()
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        merged.rows = self.rows + other.rows
+        merged.missing = self.missing + other.missing
+        merged.total = self.total + other.total
+        merged.squares = self.squares + other.squares
+        merged.low = np.fmin(self.low, other.low)
+        merged.high = np.fmax(self.high, other.high)
+        return merged
+
+    def means(self):
+        observed = self.rows - self.missing
+        return np.where(observed > 0, self.total / np.maximum(observed, 1), np.nan)
+
+    def stds(self):
+        observed = self.rows - self.missing
+        variance = self.squares / np.maximum(observed, 1) - self.means() ** 2
+        return np.where(observed > 1, np.sqrt(np.clip(variance, 0, None)), np.nan)
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'edges': [e.tolist() for e in self.edges],
+            'counts': [c.tolist() for c in self.counts],
+            'rows': int(self.rows),
+            'missing': self.missing.tolist(),
+            'total': self.total.tolist(),
+            'squares': self.squares.tolist(),
+            'low': [float(v) if np.isfinite(v) else None for v in self.low],
+            'high': [float(v) if np.isfinite(v) else None for v in self.high]
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        sketch = cls(payload['columns'], payload['edges'])
+        sketch.counts = [np.asarray(c, dtype=np.int64) for c in payload['counts']]
+        sketch.rows = payload['rows']
+        sketch.missing = np.asarray(payload['missing'], dtype=np.int64)
+        sketch.total = np.asarray(payload['total'], dtype=np.float64)
+        sketch.squares = np.asarray(payload['squares'], dtype=np.float64)
+        sketch.low = np.asarray([np.inf if v is None else v for v in payload['low']], dtype=np.float64)
+        sketch.high = np.asarray([-np.inf if v is None else v for v in payload['high']], dtype=np.float64)
+        return sketch
+
+
+def bin_shares(counts, smoothing=0.5):
+    # Additive smoothing keeps empty bins from sending PSI to infinity
+    counts = np.asarray(counts, dtype=np.float64)
+    return (counts + smoothing) / (counts.sum() + smoothing * len(counts))
+
+
+def population_stability(expected, actual):
+    expected, actual = bin_shares(expected), bin_shares(actual)
+    return float(((actual - expected) * np.log(actual / expected)).sum())
+
+
+def ks_distance(expected, actual):
+    # Evaluated at the bin edges only, so it is a lower bound on the exact two-sample statistic
+    expected = np.cumsum(expected) / max(np.sum(expected), 1)
+    actual = np.cumsum(actual) / max(np.sum(actual), 1)
+    return float(np.abs(expected - actual).max())
+
+
+def compare_sketches(reference, current):
+    if current.columns != reference.columns:
+        raise ValueError("Current sketch columns do not match the reference")
+    psi = np.array([population_stability(r, c) for r, c in zip(reference.counts, current.counts)])
+    ks = np.array([ks_distance(r, c) for r, c in zip(reference.counts, current.counts)])
+    status = classify_scores(psi, DRIFT_BANDS, DRIFT_DEFAULT)
+    reference_means, current_means = reference.means(), current.means()
+    reference_stds = reference.stds()
+    shift = (current_means - reference_means) / np.where(reference_stds > 0, reference_stds, np.nan)
+
+    return {
+        column: {
+            'psi': round(float(psi[j]), 4),
+            'ks': round(float(ks[j]), 4),
+            'reference_mean': round(float(reference_means[j]), 4),
+            'current_mean': round(float(current_means[j]), 4),
+            'mean_shift_std': None if np.isnan(shift[j]) else round(float(shift[j]), 4),
+            'status': str(status[j])
+        }
+        for j, column in enumerate(reference.columns)
+    }
+
+
+class DriftMonitor:
+    def __init__(self, bins=20, retrain_psi=0.25, retrain_features=1, keep=50):
+        self.bins = bins
+        self.retrain_psi = retrain_psi
+        self.retrain_features = retrain_features
+        self.keep = keep
+        self.reference = None
+        self.created_at = None
+
+    def fit_reference(self, feature_columns, X, predictions):
+        X = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(predictions, dtype=np.float64)])
+        self.reference = HistogramSketch.from_reference(list(feature_columns) + [PREDICTION_COLUMN], X, self.bins)
+        self.created_at = datetime.now().isoformat()
+        return self.reference
+
+    def sketch(self, X, predictions):
+        X = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(predictions, dtype=np.float64)])
+        return self.reference.empty().add(X)
+
+    def compare(self, current):
+        columns = compare_sketches(self.reference, current)
+        prediction = columns.pop(PREDICTION_COLUMN)
+        drifted = [c for c, stats in columns.items() if stats['psi'] >= self.retrain_psi]
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'reference_created_at': self.created_at,
+            'reference_rows': int(self.reference.rows),
+            'current_rows': int(current.rows),
+            'max_feature_psi': max((stats['psi'] for stats in columns.values()), default=0.0),
+            'drifted_features': drifted,
+            'prediction': prediction,
+            'features': columns,
+            'retrain_recommended': (len(drifted) >= self.retrain_features or
+                                    prediction['psi'] >= self.retrain_psi)
+        }
+
+    def save_reference(self, output_path="backend/analytics/"):
+        write_json_atomic(f"{output_path}{REFERENCE_FILE}", {
+            'created_at': self.created_at,
+            'bins': self.bins,
+            'sketch': self.reference.to_dict()
+        }, indent=None)
+
+    def load_reference(self, model_path="backend/analytics/"):
+        path = f"{model_path}{REFERENCE_FILE}"
+        if not os.path.exists(path):
+            self.reference = None
+            return None
+        with open(path, 'r') as f:
+            payload = json.load(f)
+        self.created_at = payload['created_at']
+        self.bins = payload['bins']
+        self.reference = HistogramSketch.from_dict(payload['sketch'])
+        return self.reference
+
+    def record_run(self, current, output_path="backend/analytics/"):
+        run_dir = f"{output_path}{DRIFT_DIR}"
+        os.makedirs(run_dir, exist_ok=True)
+        name = f"run-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.json"
+        write_json_atomic(os.path.join(run_dir, name), {'reference_created_at': self.created_at,
+                                                        'sketch': current.to_dict()}, indent=None)
+        runs = self.runs(output_path)
+        for stale in runs[:-self.keep]:
+            os.remove(os.path.join(run_dir, stale))
+
+    def runs(self, output_path="backend/analytics/"):
+        run_dir = f"{output_path}{DRIFT_DIR}"
+        if not os.path.isdir(run_dir):
+            return []
+        return sorted(name for name in os.listdir(run_dir) if name.startswith('run-') and name.endswith('.json'))
+
+    def merged_runs(self, output_path="backend/analytics/", last=1):
+        # Runs scored against an older reference have different edges and are left out
+        merged = self.reference.empty()
+        used = 0
+        for name in reversed(self.runs(output_path)):
+            if used >= last:
+                break
+            with open(os.path.join(f"{output_path}{DRIFT_DIR}", name), 'r') as f:
+                payload = json.load(f)
+            if payload['reference_created_at'] != self.created_at:
+                continue
+            merged = merged.merge(HistogramSketch.from_dict(payload['sketch']))
+            used += 1
+        return merged if used else None
+
+    def write_report(self, report, output_path="backend/analytics/"):
+        write_json_atomic(f"{output_path}{REPORT_FILE}", report)
+        flagged = ', '.join(report['drifted_features']) or 'none'
+        print(f"Drift: max feature PSI {report['max_feature_psi']}, prediction PSI {report['prediction']['psi']}, "
+              f"drifted features: {flagged}")
+        if report['retrain_recommended']:
+            print("Drift exceeds the retraining threshold; retraining is recommended")
+
+
+if __name__ == "__main__":
+    import sys
+    monitor = DriftMonitor()
+    output_path = sys.argv[1] if len(sys.argv) > 1 else "backend/analytics/"
+    if monitor.load_reference(output_path) is None:
+        raise SystemExit(f"No drift reference in {output_path}; train and save a model first")
+    current = monitor.merged_runs(output_path, last=int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    if current is None:
+        raise SystemExit("No scoring runs recorded against the current reference")
+    monitor.write_report(monitor.compare(current), output_path)
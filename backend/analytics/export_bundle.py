@@ -0,0 +1,200 @@
+import pandas as pd
+from datetime import datetime
+import hashlib
+import json
+import os
+import shutil
+from lazy_imports import lazy_import, module_available
+
+orjson = lazy_import('orjson') if module_available('orjson') else None
+PARQUET_AVAILABLE = module_available('pyarrow')
+
+BUNDLES_DIR = 'bundles/'
+CURRENT_FILE = 'CURRENT'
+CURRENT_LINK = 'current'
+MANIFEST_FILE = 'manifest.json'
+
+
+def dump_json(payload, indent=None):
+    if orjson is not None and indent is None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=lambda v: v.item())
+    if indent is None:
+        return json.dumps(payload, separators=(',', ':'), default=lambda v: v.item()).encode()
+    return json.dumps(payload, indent=indent, default=lambda v: v.item()).encode()
+
+
+def write_bytes_atomic(path, body):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, payload, indent=2):
+    write_bytes_atomic(path, dump_json(payload, indent))
+
+
+def write_csv_atomic(df, path):
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_part(directory, name, data):
+    if isinstance(data, pd.DataFrame):
+        if PARQUET_AVAILABLE:
+            filename = f"{name}.parquet"
+            data.to_parquet(os.path.join(directory, filename), index=False, compression='zstd')
+            part_format = 'parquet'
+        else:
+            filename = f"{name}.csv.gz"
+            data.to_csv(os.path.join(directory, filename), index=False, compression='gzip')
+            part_format = 'csv.gz'
+        rows = len(data)
+    else:
+        filename = f"{name}.json"
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(dump_json(data))
+        part_format = 'json'
+        rows = len(data) if isinstance(data, list) else None
+
+    path = os.path.join(directory, filename)
+    return {'file': filename, 'format': part_format, 'rows': rows,
+            'bytes': os.path.getsize(path), 'sha256': file_sha256(path)}
+
+
+class ExportBundle:
+    def __init__(self, output_path="backend/analytics/", keep=5):
+        self.root = f"{output_path}{BUNDLES_DIR}"
+        self.keep = keep
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if entry != CURRENT_LINK and os.path.exists(os.path.join(self.root, entry, MANIFEST_FILE)))
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version=None):
+        version = version or self.current_version()
+        if version is None:
+            return None
+        with open(os.path.join(self.root, version, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+
+    def write(self, parts, component):
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        staging = os.path.join(self.root, f".staging-{version}")
+        os.makedirs(staging)
+
+        previous = self.manifest()
+        parts_meta = {}
+        if previous is not None:
+            # Unchanged parts from the other components are hard-linked into the new version
+            for name, entry in previous['parts'].items():
+                if entry['component'] != component and name not in parts:
+                    source = os.path.join(self.root, previous['version'], entry['file'])
+                    target = os.path.join(staging, entry['file'])
+                    try:
+                        os.link(source, target)
+                    except OSError:
+                        shutil.copy2(source, target)
+                    parts_meta[name] = entry
+
+        for name, data in parts.items():
+            parts_meta[name] = {**write_part(staging, name, data), 'component': component}
+
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(),
+            'component': component,
+            'previous_version': previous['version'] if previous is not None else None,
+            'parts': parts_meta
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        os.rename(staging, os.path.join(self.root, version))
+        self.activate(version)
+        self.prune()
+        return manifest
+
+    def activate(self, version):
+        if not os.path.exists(os.path.join(self.root, version, MANIFEST_FILE)):
+            raise ValueError(f"Unknown bundle version: {version}")
+
+        link_path = os.path.join(self.root, CURRENT_LINK)
+        tmp_link = f"{link_path}.tmp"
+        try:
+            if os.path.lexists(tmp_link):
+                os.remove(tmp_link)
+            os.symlink(version, tmp_link, target_is_directory=True)
+            os.replace(tmp_link, link_path)
+        except (OSError, NotImplementedError):
+            pass  # platforms without symlinks rely on the CURRENT pointer file alone
+        write_bytes_atomic(os.path.join(self.root, CURRENT_FILE), version.encode())
+
+    def rollback(self, version=None):
+        versions = self.versions()
+        current = self.current_version()
+        if version is None:
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                raise ValueError("No earlier bundle to roll back to")
+            version = older[-1]
+        self.activate(version)
+        print(f"Rolled back export bundle from {current} to {version}")
+        return version
+
+    def prune(self):
+        # Keep the last `keep` versions written by each component, so frequent prediction or camp exports
+        # cannot push every analytics export out of the rollback window
+        current = self.current_version()
+        by_component = {}
+        for version in self.versions():
+            by_component.setdefault(self.manifest(version).get('component'), []).append(version)
+        for versions in by_component.values():
+            for version in versions[:-self.keep]:
+                if version != current:
+                    shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+
+    def read(self, name, version=None, verify=True):
+        manifest = self.manifest(version)
+        if manifest is None or name not in manifest['parts']:
+            raise KeyError(f"Part {name} not found in export bundle")
+        entry = manifest['parts'][name]
+        path = os.path.join(self.root, manifest['version'], entry['file'])
+        if verify and file_sha256(path) != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {path}")
+
+        if entry['format'] == 'parquet':
+            return pd.read_parquet(path)
+        if entry['format'] == 'csv.gz':
+            return pd.read_csv(path, compression='gzip')
+        with open(path, 'rb') as f:
+            return json.loads(f.read())
+
+
+if __name__ == "__main__":
+    import sys
+    bundle = ExportBundle()
+    if len(sys.argv) > 1 and sys.argv[1] == 'rollback':
+        bundle.rollback(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print(f"Current bundle: {bundle.current_version()}")
+        for version in bundle.versions():
+            print(f"  {version}")
@@ -0,0 +1,210 @@
+import pandas as pd
+import numpy as np
+import hashlib
+from math import factorial
+from tree_export import ensemble_trees, flatten_trees
+
+ATTRIBUTION_ARRAYS = ['feature', 'threshold', 'children', 'value', 'cover', 'roots']
+TOP_FACTORS = 3
+
+
+def tree_paths(arrays):
+    # Walks every tree level by level; each leaf ends up with its root-to-leaf edges as
+    # (feature, threshold, went_left, cover ratio) rows padded to the deepest path
+    feature = np.asarray(arrays['feature'])
+    threshold = np.asarray(arrays['threshold'])
+    children = np.asarray(arrays['children'])
+    cover = np.asarray(arrays['cover'], dtype=np.float64)
+
+    nodes = np.asarray(arrays['roots'], dtype=np.int64)
+    edges = np.empty((len(nodes), 0, 4))
+    leaves = []
+    leaf_edges = []
+    while len(nodes):
+        is_leaf = children[nodes, 0] == nodes
+        leaves.append(nodes[is_leaf])
+        leaf_edges.append(edges[is_leaf])
+        nodes, edges = nodes[~is_leaf], edges[~is_leaf]
+        if not len(nodes):
+            break
+
+        left, right = children[nodes, 0], children[nodes, 1]
+        step = np.column_stack([feature[nodes], threshold[nodes]])
+        left_edge = np.column_stack([step, np.ones(len(nodes)), cover[left] / cover[nodes]])
+        right_edge = np.column_stack([step, np.zeros(len(nodes)), cover[right] / cover[nodes]])
+        edges = np.concatenate([np.concatenate([edges, left_edge[:, None, :]], axis=1),
+                                np.concatenate([edges, right_edge[:, None, :]], axis=1)])
+        nodes = np.concatenate([left, right])
+
+    depth = max(e.shape[1] for e in leaf_edges)
+    padded = []
+    for e in leaf_edges:
+        # Padding edges use feature -1 and ratio 1 and belong to no slot, so they never weigh in
+        pad = np.tile([-1.0, 0.0, 1.0, 1.0], (len(e), depth - e.shape[1], 1))
+        padded.append(np.concatenate([e, pad], axis=1))
+    return np.concatenate(leaves), np.concatenate(padded)
+
+
+def shapley_weights(depth):
+    # weights[d, k] = k! (d - k - 1)! / d!, the share of orderings where k other path features come first
+    weights = np.zeros((depth + 1, max(depth, 1)))
+    for d in range(1, depth + 1):
+        for k in range(d):
+            weights[d, k] = factorial(k) * factorial(d - k - 1) / factorial(d)
+    return weights
+
+
+class TreeExplainer:
+    def __init__(self, arrays, baseline, feature_columns, chunk_elements=4000000, max_table_elements=32000000):
+        self.feature_columns = list(feature_columns)
+        self.baseline = baseline
+        self.chunk_elements = chunk_elements
+        self.version = hashlib.sha1(b''.join(np.ascontiguousarray(arrays[name]).tobytes()
+                                             for name in ATTRIBUTION_ARRAYS) +
+                                    repr(baseline).encode()).hexdigest()
+
+        leaves, edges = tree_paths(arrays)
+        self.leaf_value = np.asarray(arrays['value'], dtype=np.float64)[leaves]
+        self.edge_feature = edges[:, :, 0].astype(np.int64)
+        self.edge_threshold = edges[:, :, 1]
+        self.edge_left = edges[:, :, 2].astype(bool)
+
+        # A feature split on twice along a path is one player: its edges share a slot whose zero
+        # fraction is the product of their cover ratios
+        n_leaves, depth = self.edge_feature.shape
+        slot = np.full((n_leaves, depth), -1, dtype=np.int64)
+        slot_feature = np.full((n_leaves, depth), -1, dtype=np.int64)
+        n_slots = np.zeros(n_leaves, dtype=np.int64)
+        rows = np.arange(n_leaves)
+        for e in range(depth):
+            current = self.edge_feature[:, e]
+            earlier = (self.edge_feature[:, :e] == current[:, None]) & (current[:, None] >= 0)
+            repeat = earlier.any(axis=1)
+            fresh = (current >= 0) & ~repeat
+            slot[fresh, e] = n_slots[fresh]
+            slot_feature[rows[fresh], n_slots[fresh]] = current[fresh]
+            n_slots += fresh
+            if repeat.any():
+                first = earlier.argmax(axis=1)
+                slot[repeat, e] = slot[rows[repeat], first[repeat]]
+
+        assigned = slot >= 0
+        self.depth = depth
+        self.edge_bits = np.where(assigned, np.left_shift(1, slot.clip(min=0)), 0)
+        self.valid_slot = slot_feature >= 0
+        self.valid_bits = np.left_shift(self.valid_slot.astype(np.int64), np.arange(depth)).sum(axis=1)
+        self.zero_fraction = np.ones((n_leaves, depth))
+        np.multiply.at(self.zero_fraction, (np.nonzero(assigned)[0], slot[assigned]), edges[:, :, 3][assigned])
+        self.slot_features = np.zeros((n_leaves, depth, len(self.feature_columns)))
+        valid_rows, valid_slots = np.nonzero(self.valid_slot)
+        self.slot_features[valid_rows, valid_slots, slot_feature[self.valid_slot]] = 1
+        self.leaf_weights = shapley_weights(depth)[n_slots]
+
+        self.expected_value = baseline + float((self.leaf_value * self.zero_fraction.prod(axis=1)).sum())
+
+        # A sample only enters a leaf's attribution through which of its path features it agrees with,
+        # so for shallow ensembles every agreement pattern is scored once up front and samples gather
+        self.patterns = 1 << depth
+        self.table = None
+        if self.patterns * n_leaves * depth * depth <= max_table_elements:
+            bits = (np.arange(self.patterns)[:, None] >> np.arange(depth)) & 1
+            one = bits.astype(bool)[:, None, :] & self.valid_slot[None]
+            table = np.einsum('pls,lsf->lpf', self.slot_contributions(one), self.slot_features)
+            self.table = table.reshape(n_leaves * self.patterns, -1)
+
+    @classmethod
+    def from_model(cls, model, scaler, feature_columns, **kwargs):
+        trees, learning_rate, baseline = ensemble_trees(model)
+        if scaler is not None:
+            arrays = flatten_trees(trees, learning_rate, np.asarray(scaler.mean_, dtype=np.float64),
+                                   np.asarray(scaler.scale_, dtype=np.float64))
+        else:
+            arrays = flatten_trees(trees, learning_rate)
+        return cls(arrays, baseline, feature_columns, **kwargs)
+
+    @classmethod
+    def from_predictor(cls, predictor, **kwargs):
+        if 'cover' not in predictor.arrays:
+            raise ValueError("Tree model was exported without node cover; re-save the model to explain it")
+        return cls(predictor.arrays, predictor.baseline, predictor.feature_columns, **kwargs)
+
+    def agreement(self, X):
+        # Bit s of a leaf's pattern is set when the sample follows every edge of path slot s
+        values = X[:, np.where(self.edge_feature >= 0, self.edge_feature, 0)]
+        follows = (values <= self.edge_threshold) == self.edge_left
+        misses = np.bitwise_or.reduce(np.where(follows, 0, self.edge_bits), axis=2)
+        return self.valid_bits & ~misses
+
+    def slot_contributions(self, one):
+        # For each slot i, the polynomial prod_{j != i} (zero_j + one_j t); coefficient k sums the
+        # path weight over every set of k other features taking the sample's branch
+        zero = self.zero_fraction
+        depth = self.depth
+        coefficients = np.zeros(one.shape + (depth,))
+        coefficients[..., 0] = 1
+        others = ~np.eye(depth, dtype=bool)
+        for j in range(depth):
+            shifted = np.zeros_like(coefficients)
+            shifted[..., 1:] = coefficients[..., :-1]
+            extended = zero[:, j, None, None] * coefficients + one[..., j, None, None] * shifted
+            coefficients = np.where(others[j][:, None], extended, coefficients)
+
+        paths = (coefficients * self.leaf_weights[:, None, :]).sum(axis=-1)
+        return self.leaf_value[:, None] * (one - zero) * paths * self.valid_slot
+
+    def explain(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected {len(self.feature_columns)} features, got {X.shape[1]}")
+
+        width = len(self.feature_columns) if self.table is not None else self.depth * self.depth
+        chunk = max(1, self.chunk_elements // max(len(self.leaf_value) * width, 1))
+        contributions = np.empty(X.shape, dtype=np.float64)
+        for start in range(0, len(X), chunk):
+            contributions[start:start + chunk] = self._explain_chunk(X[start:start + chunk])
+        return contributions
+
+    def _explain_chunk(self, X):
+        pattern = self.agreement(X)
+        if self.table is not None:
+            rows = np.arange(len(self.leaf_value)) * self.patterns + pattern
+            return self.table[rows].sum(axis=1)
+        one = ((pattern[:, :, None] >> np.arange(self.depth)) & 1).astype(bool)
+        return np.einsum('nls,lsf->nf', self.slot_contributions(one), self.slot_features)
+
+
+def attribution_key(explainer, X):
+    digest = hashlib.sha1(explainer.version.encode())
+    digest.update(','.join(explainer.feature_columns).encode())
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def attribution_frame(district_ids, X, contributions, explainer):
+    frame = pd.DataFrame(contributions.round(6), columns=explainer.feature_columns)
+    frame.insert(0, 'district_id', np.asarray(district_ids))
+    frame.insert(1, 'base_value', round(explainer.expected_value, 6))
+    frame.insert(2, 'model_output', (explainer.expected_value + contributions.sum(axis=1)).round(6))
+    return frame
+
+
+def top_factors(attributions, features, n=TOP_FACTORS):
+    columns = [c for c in attributions.columns if c not in ('district_id', 'base_value', 'model_output')]
+    contributions = attributions[columns].to_numpy()
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :n]
+    rows = np.arange(len(contributions))[:, None]
+    values = features[columns].to_numpy()[rows, order]
+    names = np.asarray(columns)[order]
+    picked = contributions[rows, order]
+
+    explanations = {}
+    for i, district_id in enumerate(attributions['district_id'].astype(str)):
+        explanations[district_id] = {
+            'base_value': float(attributions['base_value'].iat[i]),
+            'model_output': float(attributions['model_output'].iat[i]),
+            'top_factors': [{'feature': str(names[i, k]), 'value': round(float(values[i, k]), 4),
+                             'contribution': round(float(picked[i, k]), 4)} for k in range(order.shape[1])]
+        }
+    return explanations
@@ -0,0 +1,150 @@
+import pandas as pd
+import hashlib
+import os
+from data_cache import DatasetCache
+
+DATASET_FILES = {
+    'enrolment': 'aadhaar_enrolment_data.csv',
+    'demographic': 'demographic_update_logs.csv',
+    'biometric': 'biometric_update_records.csv',
+    'district_master': 'district_master.csv'
+}
+
+FEATURE_DATASETS = ['enrolment', 'demographic', 'biometric']
+
+_stores = {}
+
+
+def get_feature_store(data_path="datasets/", use_cache=True):
+    key = (os.path.abspath(data_path), use_cache)
+    if key not in _stores:
+        _stores[key] = FeatureStore(data_path, use_cache)
+    return _stores[key]
+
+
+def clear_feature_stores():
+    _stores.clear()
+
+
+def latest_year_rows(df):
+    return df[df['year'] == df['year'].max()]
+
+
+def aggregate_demographic(demographic):
+    demo_agg = demographic.groupby('district_id', observed=True).agg({
+        'total_demographic_updates': ['mean', 'std', 'max'],
+        'churn_rate': 'mean',
+        'update_spike_detected': 'sum'
+    }).reset_index()
+    demo_agg.columns = ['district_id', 'demo_update_mean', 'demo_update_std',
+                        'demo_update_max', 'avg_churn_rate', 'total_spikes']
+    return demo_agg
+
+
+def aggregate_biometric(biometric):
+    bio_agg = biometric.groupby('district_id', observed=True).agg({
+        'avg_biometric_age_days': 'mean',
+        'biometric_failure_rate': 'mean',
+        'child_refresh_gap_months': 'mean',
+        'anomaly_detected': 'sum'
+    }).reset_index()
+    bio_agg.columns = ['district_id', 'avg_bio_age', 'avg_failure_rate',
+                       'avg_child_gap', 'total_anomalies']
+    return bio_agg
+
+
+def build_district_features(enrolment, demo_agg, bio_agg, latest_bio):
+    features = enrolment[['district_id', 'coverage_ratio', 'rejection_rate',
+                          'child_enrolments', 'adult_enrolments']].copy()
+    features['child_ratio'] = features['child_enrolments'] / (features['child_enrolments'] + features['adult_enrolments'])
+
+    features = features.merge(demo_agg, on='district_id')
+    features = features.merge(bio_agg, on='district_id')
+    latest_bio_subset = latest_bio[['district_id', 'biometric_failure_rate']].copy()
+    latest_bio_subset.columns = ['district_id', 'biometric_failure_rate_current']
+    features = features.merge(latest_bio_subset, on='district_id')
+
+    features['auth_failure_prob'] = features['biometric_failure_rate_current'] * 100
+
+    features['demo_volatility'] = features['demo_update_std'] / features['demo_update_mean'].replace(0, 1)
+    features['bio_age_normalized'] = features['avg_bio_age'] / 2500
+    features['spike_rate'] = features['total_spikes'] / 6
+    features['anomaly_rate'] = features['total_anomalies'] / 6
+
+    return features
+
+
+class FeatureStore:
+    def __init__(self, data_path="datasets/", use_cache=True):
+        self.data_path = data_path
+        self.cache = DatasetCache(source=data_path) if use_cache else None
+        self.frames = {}
+        self.versions = {}
+        self.memo = {}
+        self.scans = {}
+
+    def file_version(self, name):
+        path = f"{self.data_path}{DATASET_FILES[name]}"
+        if self.cache is not None:
+            return self.cache.fingerprint(path)
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def dataset(self, name):
+        version = self.file_version(name)
+        if self.versions.get(name) != version:
+            path = f"{self.data_path}{DATASET_FILES[name]}"
+            if self.cache is not None:
+                self.frames[name] = self.cache.read_csv(path)
+            else:
+                self.frames[name] = pd.read_csv(path)
+            self.versions[name] = version
+            self.scans[name] = self.scans.get(name, 0) + 1
+        return self.frames[name]
+
+    def dataset_version(self, names=FEATURE_DATASETS):
+        digest = hashlib.sha1()
+        for name in names:
+            digest.update(f"{name}:{self.file_version(name)};".encode())
+        return digest.hexdigest()
+
+    def _memoize(self, key, names, compute):
+        version = self.dataset_version(names)
+        cached = self.memo.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        result = compute()
+        self.memo[key] = (version, result)
+        return result
+
+    def latest_demographic(self):
+        return self._memoize('latest_demographic', ['demographic'],
+                             lambda: latest_year_rows(self.dataset('demographic')))
+
+    def latest_biometric(self):
+        return self._memoize('latest_biometric', ['biometric'],
+                             lambda: latest_year_rows(self.dataset('biometric')))
+
+    def demographic_by_district(self):
+        return self._memoize('demographic_by_district', ['demographic'],
+                             lambda: aggregate_demographic(self.dataset('demographic')))
+
+    def biometric_by_district(self):
+        return self._memoize('biometric_by_district', ['biometric'],
+                             lambda: aggregate_biometric(self.dataset('biometric')))
+
+    def district_features(self):
+        return self._memoize('district_features', FEATURE_DATASETS, self._load_district_features)
+
+    def _load_district_features(self):
+        version = self.dataset_version()
+        if self.cache is not None:
+            cached = self.cache.read_frame('district_features', version)
+            if cached is not None:
+                return cached
+
+        features = build_district_features(self.dataset('enrolment'), self.demographic_by_district(),
+                                           self.biometric_by_district(), self.latest_biometric())
+        if self.cache is not None:
+            self.cache.write_frame(features, 'district_features', version)
+        return features
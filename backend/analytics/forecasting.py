@@ -0,0 +1,271 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+from ingestion import ShardIngestor
+from pincode_anomalies import daily_pincode_series
+from aggregation_cube import shard_fingerprint
+from export_bundle import write_json_atomic, write_csv_atomic
+
+FORECAST_STATE_DIR = 'forecast_state/'
+STATE_ARRAYS = ['level', 'trend', 'season', 'error_var', 'n_obs']
+YEARLY_TARGETS = {
+    'total_biometric_updates': 'volume',
+    'biometric_failure_rate': 'rate'
+}
+DAYS_PER_MONTH = 30
+
+
+# Additive Holt-Winters with a damped trend, held as arrays so each time step updates every series at once
+class SeriesForecaster:
+    def __init__(self, alpha=0.3, beta=0.1, gamma=0.1, phi=0.98, season_length=1):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.phi = phi
+        self.season_length = season_length
+        self.ids = np.array([], dtype=object)
+        self.level = np.empty(0)
+        self.trend = np.empty(0)
+        self.season = np.empty((0, season_length))
+        self.error_var = np.empty(0)
+        self.n_obs = np.empty(0, dtype=np.int64)
+        self.last_period = None
+
+    def add_series(self, ids):
+        new_ids = np.setdiff1d(np.asarray(ids, dtype=object), self.ids)
+        if len(new_ids):
+            n = len(new_ids)
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.level = np.concatenate([self.level, np.full(n, np.nan)])
+            self.trend = np.concatenate([self.trend, np.zeros(n)])
+            self.season = np.vstack([self.season, np.zeros((n, self.season_length))])
+            self.error_var = np.concatenate([self.error_var, np.full(n, np.nan)])
+            self.n_obs = np.concatenate([self.n_obs, np.zeros(n, dtype=np.int64)])
+        return pd.Index(self.ids).get_indexer(ids)
+
+    def step(self, y, period):
+        slot = period % self.season_length
+        season = self.season[:, slot]
+        observed = ~np.isnan(y)
+        started = ~np.isnan(self.level)
+        projected = self.level + self.phi * self.trend
+
+        error = y - (projected + season)
+        update = observed & started
+        level = np.where(update, self.alpha * (y - season) + (1 - self.alpha) * projected, projected)
+        trend = np.where(update, self.beta * (level - self.level) + (1 - self.beta) * self.phi * self.trend,
+                         self.phi * self.trend)
+        self.season[:, slot] = np.where(update, self.gamma * (y - level) + (1 - self.gamma) * season, season)
+        self.error_var = np.where(update, np.where(np.isnan(self.error_var), error ** 2,
+                                                   0.9 * self.error_var + 0.1 * error ** 2), self.error_var)
+
+        # A series' first observation seeds its level; until then it carries no state
+        first = observed & ~started
+        self.level = np.where(first, y, np.where(started, level, np.nan))
+        self.trend = np.where(first | ~started, 0.0, trend)
+        self.n_obs = self.n_obs + observed
+
+    def update(self, ids, values, periods, zero_fill=False):
+        # values is (series x periods); only periods after the last one seen are applied. With zero_fill, a
+        # period that other series report but this one does not counts as zero rather than missing, from the
+        # series' first observation onwards (from the batch start once it has state). Periods no series
+        # reports stay missing
+        periods = np.asarray(periods, dtype=np.int64)
+        keep = periods > self.last_period if self.last_period is not None else np.ones(len(periods), dtype=bool)
+        if not keep.any():
+            return 0
+        periods = periods[keep]
+        values = np.asarray(values, dtype=np.float64)[:, keep]
+
+        rows = self.add_series(ids)
+        first = periods[0] if self.last_period is None else self.last_period + 1
+        matrix = np.full((len(self.ids), periods[-1] - first + 1), np.nan)
+        matrix[rows[:, None], (periods - first)[None, :]] = values
+        if zero_fill:
+            observed = ~np.isnan(matrix)
+            started = np.where(self.n_obs > 0, 0, np.where(observed.any(axis=1), observed.argmax(axis=1),
+                                                           matrix.shape[1]))
+            active = np.arange(matrix.shape[1])[None, :] >= started[:, None]
+            matrix[active & observed.any(axis=0)[None, :] & ~observed] = 0
+        for offset in range(matrix.shape[1]):
+            self.step(matrix[:, offset], first + offset)
+        self.last_period = int(periods[-1])
+        return int(keep.sum())
+
+    def forecast(self, horizon):
+        steps = np.arange(1, horizon + 1)
+        # Damped trend: sum of phi^1..phi^h
+        damping = np.cumsum(self.phi ** steps)
+        slots = (self.last_period + steps) % self.season_length
+        point = self.level[:, None] + self.trend[:, None] * damping[None, :] + self.season[:, slots]
+        spread = 1.96 * np.sqrt(np.nan_to_num(self.error_var)[:, None] * steps[None, :])
+        return point, point - spread, point + spread
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in STATE_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        write_json_atomic(os.path.join(path, 'meta.json'), {
+            'ids': [str(i) for i in self.ids],
+            'last_period': self.last_period,
+            'params': {'alpha': self.alpha, 'beta': self.beta, 'gamma': self.gamma, 'phi': self.phi,
+                       'season_length': self.season_length}
+        })
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            return None
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        model = cls(**meta['params'])
+        for name in STATE_ARRAYS:
+            setattr(model, name, np.load(os.path.join(path, f"{name}.npy")))
+        model.ids = np.array(meta['ids'], dtype=object)
+        model.last_period = meta['last_period']
+        return model
+
+
+def pivot_series(frame, id_column, period_column, value_column):
+    ids, id_codes = np.unique(frame[id_column].astype(str).to_numpy(), return_inverse=True)
+    periods, period_codes = np.unique(frame[period_column].to_numpy(dtype=np.int64), return_inverse=True)
+    values = np.full((len(ids), len(periods)), np.nan)
+    values[id_codes, period_codes] = 0
+    np.add.at(values, (id_codes, period_codes), frame[value_column].to_numpy(dtype=np.float64))
+    return ids, values, periods
+
+
+class ForecastEngine:
+    def __init__(self, state_path="backend/analytics/forecast_state/", alpha=0.3, beta=0.1, gamma=0.1,
+                 phi=0.98, weekly_season=7):
+        self.state_path = state_path
+        self.params = {'alpha': alpha, 'beta': beta, 'gamma': gamma, 'phi': phi}
+        self.weekly_season = weekly_season
+        self.models = {}
+        self.sources = {}
+
+    def model(self, name, season_length=1):
+        if name not in self.models:
+            loaded = SeriesForecaster.load(os.path.join(self.state_path, name))
+            self.models[name] = loaded or SeriesForecaster(season_length=season_length, **self.params)
+        return self.models[name]
+
+    def update_yearly(self, biometric_df):
+        applied = {}
+        for target in YEARLY_TARGETS:
+            ids, values, years = pivot_series(biometric_df, 'district_id', 'year', target)
+            applied[target] = self.model(target).update(ids, values, years)
+        return applied
+
+    def update_daily(self, ingestor, feed='demographic', level='district', directory=None):
+        name = f"daily_{feed}_{level}"
+        model = self.model(name, self.weekly_season)
+        seen = self.sources.setdefault(name, {})
+        shards = [s for s in ingestor.shards(feed, directory) if seen.get(s) != shard_fingerprint(s)]
+        if not shards:
+            return 0
+
+        series, locations = daily_pincode_series(ingestor.iter_chunks(feed, shards=shards), feed,
+                                                 ingestor.max_partials)
+        if level == 'district':
+            keys = locations.set_index('pincode')
+            series = series.assign(series_id=(keys['state'] + '|' + keys['district']).reindex(
+                series['pincode']).to_numpy())
+            series = series.groupby(['series_id', 'day'], as_index=False)['count'].sum()
+        else:
+            series = series.assign(series_id=series['pincode'].astype(str))
+
+        late = int((series['day'] <= model.last_period).sum()) if model.last_period is not None else 0
+        if late:
+            print(f"Skipping {late} {name} series-days at or before the fitted horizon")
+        ids, values, days = pivot_series(series, 'series_id', 'day', 'count')
+        # Raw feeds only carry days with updates, so a quiet day inside a series' span is zero demand
+        applied = model.update(ids, values, days, zero_fill=True)
+        for shard in shards:
+            seen[shard] = shard_fingerprint(shard)
+        print(f"Updated {name} with {applied} new days across {len(ids)} series")
+        return applied
+
+    def forecast_yearly(self, months=12):
+        frames = []
+        for target, kind in YEARLY_TARGETS.items():
+            model = self.models.get(target)
+            if model is None or model.last_period is None:
+                continue
+            # Annual models are read at fractional horizons: month m sits m/12 of a year ahead
+            fraction = np.arange(1, months + 1) / 12
+            damping = model.phi * (1 - model.phi ** fraction) / (1 - model.phi) if model.phi != 1 else fraction
+            point = model.level[:, None] + model.trend[:, None] * damping[None, :]
+            spread = 1.96 * np.sqrt(np.nan_to_num(model.error_var)[:, None] * fraction[None, :])
+            if kind == 'volume':
+                point, spread = point / 12, spread / 12
+            else:
+                point = point.clip(0, 1)
+            frames.append(pd.DataFrame({
+                'district_id': np.repeat(model.ids, months),
+                'month_ahead': np.tile(np.arange(1, months + 1), len(model.ids)),
+                'target': target,
+                'forecast': point.ravel(),
+                'lower': (point - spread).ravel(),
+                'upper': (point + spread).ravel()
+            }))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def forecast_daily(self, name, months=12):
+        model = self.models.get(name)
+        if model is None or model.last_period is None:
+            return pd.DataFrame()
+        point, lower, upper = model.forecast(months * DAYS_PER_MONTH)
+        shape = (len(model.ids), months, DAYS_PER_MONTH)
+        # Monthly demand is the sum of 30 daily forecasts; daily errors are treated as independent
+        monthly = np.clip(point, 0, None).reshape(shape).sum(axis=2)
+        spread = ((upper - point) ** 2).reshape(shape).sum(axis=2) ** 0.5
+        return pd.DataFrame({
+            'series_id': np.repeat(model.ids, months),
+            'month_ahead': np.tile(np.arange(1, months + 1), len(model.ids)),
+            'forecast': monthly.ravel().round(1),
+            'lower': np.clip(monthly - spread, 0, None).ravel().round(1),
+            'upper': (monthly + spread).ravel().round(1),
+            'last_day': str(np.datetime64(model.last_period, 'D'))
+        })
+
+    def save(self):
+        for name, model in self.models.items():
+            model.save(os.path.join(self.state_path, name))
+        write_json_atomic(os.path.join(self.state_path, 'sources.json'), self.sources)
+
+    def load_sources(self):
+        path = os.path.join(self.state_path, 'sources.json')
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.sources = json.load(f)
+        return self.sources
+
+    def export_forecasts(self, output_path="backend/analytics/", months=12):
+        yearly = self.forecast_yearly(months)
+        if len(yearly):
+            write_csv_atomic(yearly.round(4), f"{output_path}district_forecasts.csv")
+        daily = [self.forecast_daily(name, months).assign(model=name)
+                 for name in self.models if name.startswith('daily_')]
+        daily = [frame for frame in daily if len(frame)]
+        if daily:
+            write_csv_atomic(pd.concat(daily, ignore_index=True), f"{output_path}demand_forecasts.csv")
+        print(f"Forecasts exported to {output_path}")
+
+
+if __name__ == "__main__":
+    import sys
+    from validation import ValidationStage
+    from lifecycle_analytics import LifecycleAnalytics
+    analytics = LifecycleAnalytics()
+    analytics.load_data()
+    engine = ForecastEngine()
+    engine.load_sources()
+    engine.update_yearly(analytics.biometric_df)
+    if len(sys.argv) > 1:
+        validator = ValidationStage(f"{engine.state_path}validation/", persist_seen=True)
+        engine.update_daily(ShardIngestor(sys.argv[1], validator=validator))
+        validator.close()
+    engine.save()
+    engine.export_forecasts()
@@ -0,0 +1,265 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+from data_cache import read_frame_file, write_frame_file, frame_extension
+from aggregation_cube import shard_fingerprint
+from export_bundle import ExportBundle, write_csv_atomic
+from serving_artifacts import build_serving_artifacts, patch_serving_artifacts
+
+YEARLY_COLUMNS = ['total_demographic_updates', 'churn_rate', 'update_spike_detected']
+STATS_COLUMNS = ['update_count', 'update_sum', 'update_sumsq', 'spike_count']
+DEMOGRAPHIC_OUTPUT_COLUMNS = ['total_demographic_updates', 'churn_rate', 'update_spike_detected',
+                              'demographic_volatility', 'spike_flag']
+PATCHED_PARTS = ['uls_scores', 'recommendations', 'trends', 'state_summary']
+
+
+def running_stats(yearly):
+    values = yearly['total_demographic_updates'].astype('int64')
+    frame = pd.DataFrame({
+        'district_id': yearly.index.get_level_values('district_id'),
+        'update_count': 1,
+        'update_sum': values.to_numpy(),
+        'update_sumsq': (values * values).to_numpy(),
+        'spike_count': yearly['update_spike_detected'].astype('int64').to_numpy()
+    })
+    return frame.groupby('district_id', observed=True)[STATS_COLUMNS].sum()
+
+
+def stats_moments(stats):
+    n = stats['update_count'].astype('float64')
+    mean = stats['update_sum'] / n
+    numerator = (stats['update_count'] * stats['update_sumsq'] - stats['update_sum'] ** 2).astype('float64')
+    variance = (numerator / (n * (n - 1))).where(n > 1)
+    return pd.DataFrame({
+        'district_id': stats.index,
+        'update_mean': mean.to_numpy(),
+        'update_std': np.sqrt(variance.clip(lower=0)).to_numpy(),
+        'spike_count': stats['spike_count'].to_numpy()
+    })
+
+
+class IncrementalULS:
+    def __init__(self, analytics, state_path="backend/analytics/uls_state/"):
+        self.analytics = analytics
+        self.state_path = state_path
+        self.yearly = None
+        self.stats = None
+        self.uls = None
+        self.latest_year = None
+        self.changed_ids = pd.Index([])
+        self.changed_years = []
+        self.sources = {}
+
+    def _state_file(self, name):
+        return os.path.join(self.state_path, f"{name}.{frame_extension()}")
+
+    def initialize(self, rebuild=False):
+        if not rebuild and os.path.exists(os.path.join(self.state_path, 'meta.json')):
+            self.load_state()
+        else:
+            demographic = self.analytics.demographic_df.astype({
+                'district_id': str, 'year': 'int64', 'total_demographic_updates': 'int64',
+                'churn_rate': 'float64', 'update_spike_detected': bool
+            })
+            self.yearly = demographic.set_index(['district_id', 'year'])[YEARLY_COLUMNS].sort_index()
+            self.stats = running_stats(self.yearly)
+            self.latest_year = int(demographic['year'].max())
+            self.uls = self._index_uls(self.analytics.compute_universal_lifecycle_score())
+            self.changed_ids = pd.Index(self.uls.index)
+            self.sources = {}
+            self.save_state()
+
+        self.analytics.demographic_df = self.yearly.reset_index()
+        self.analytics.uls_results = self.uls.reset_index(drop=True)
+
+    def _index_uls(self, uls):
+        widened = {}
+        for column, dtype in uls.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                widened[column] = str
+            elif pd.api.types.is_integer_dtype(dtype):
+                widened[column] = 'int64'
+            elif pd.api.types.is_float_dtype(dtype):
+                widened[column] = 'float64'
+        uls = uls.astype(widened).set_index('district_id', drop=False)
+        uls.index.name = None
+        return uls
+
+    def load_state(self):
+        self.yearly = read_frame_file(self._state_file('yearly')).set_index(['district_id', 'year'])
+        self.stats = read_frame_file(self._state_file('stats')).set_index('district_id')
+        self.uls = self._index_uls(read_frame_file(self._state_file('uls')))
+        with open(os.path.join(self.state_path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        self.latest_year = meta['latest_year']
+        self.sources = meta.get('sources', {})
+
+    def save_state(self):
+        os.makedirs(self.state_path, exist_ok=True)
+        write_frame_file(self.yearly.reset_index(), self._state_file('yearly'))
+        write_frame_file(self.stats.reset_index(), self._state_file('stats'))
+        write_frame_file(self.uls.reset_index(drop=True), self._state_file('uls'))
+        with open(os.path.join(self.state_path, 'meta.json'), 'w') as f:
+            json.dump({'latest_year': self.latest_year, 'districts': len(self.uls), 'sources': self.sources}, f,
+                      indent=2)
+
+    def ingest_shards(self, ingestor, feed='demographic', directory=None):
+        # Raw shards not yet applied to this state become one demographic delta; the ingestor needs a
+        # DistrictIndex so rows resolve to district ids
+        shards = ingestor.shards(feed, directory)
+        fingerprints = {shard: shard_fingerprint(shard) for shard in shards}
+        rewritten = [s for s, f in self.sources.items() if s in fingerprints and fingerprints[s] != f]
+        if rewritten:
+            # Shards are append-only; a rewritten shard cannot be subtracted out of the running totals
+            raise ValueError(f"{len(rewritten)} applied {feed} shards changed; rebuild the ULS state")
+        new = [shard for shard in shards if shard not in self.sources]
+        if not new:
+            print(f"No new {feed} shards to apply")
+            self.changed_ids = pd.Index([])
+            return self.changed_ids
+
+        rolled = ingestor.rollup(feed, shards=new)
+        if 'district_id' not in rolled.columns:
+            raise ValueError("Incremental ingestion needs a ShardIngestor with a district_index")
+        resolved = rolled[rolled['district_id'].notna()]
+        delta = pd.DataFrame({
+            'district_id': resolved['district_id'].astype(str).to_numpy(),
+            'year': resolved['year'].astype('int64').to_numpy(),
+            'total_demographic_updates': resolved['total_demographic_updates'].astype('int64').to_numpy()
+        })
+        if len(delta):
+            affected = self.apply_demographic_delta(delta)
+        else:
+            affected = self.changed_ids = pd.Index([])
+        self.sources.update({shard: fingerprints[shard] for shard in new})
+        print(f"Applied {len(new)} new {feed} shards: {len(delta)} district-years, "
+              f"{len(affected)} districts rescored")
+        return affected
+
+    def apply_demographic_delta(self, delta):
+        aggregations = {'total_demographic_updates': 'sum'}
+        if 'update_spike_detected' in delta:
+            aggregations['update_spike_detected'] = 'max'
+        if 'churn_rate' in delta:
+            aggregations['churn_rate'] = 'last'
+        delta = delta.groupby(['district_id', 'year'], observed=True).agg(aggregations)
+
+        existing = delta.index.isin(self.yearly.index)
+        old = self.yearly.reindex(delta.index)
+        old_total = old['total_demographic_updates'].fillna(0).astype('int64')
+        old_spike = old['update_spike_detected'].fillna(False).astype(bool)
+
+        new = pd.DataFrame(index=delta.index)
+        new['total_demographic_updates'] = old_total + delta['total_demographic_updates'].astype('int64')
+        new['update_spike_detected'] = old_spike | delta.get('update_spike_detected', False)
+        new['churn_rate'] = delta['churn_rate'] if 'churn_rate' in delta else old['churn_rate']
+        if new['churn_rate'].isna().any():
+            carried = self.yearly['churn_rate'].groupby(level='district_id', observed=True).last()
+            districts = new.index.get_level_values('district_id')
+            new['churn_rate'] = new['churn_rate'].fillna(pd.Series(carried.reindex(districts).to_numpy(),
+                                                                    index=new.index))
+
+        district_ids = delta.index.get_level_values('district_id')
+        increments = pd.DataFrame({
+            'update_count': (~existing).astype('int64'),
+            'update_sum': (new['total_demographic_updates'] - old_total).to_numpy(),
+            'update_sumsq': (new['total_demographic_updates'] ** 2 - old_total ** 2).to_numpy(),
+            'spike_count': (new['update_spike_detected'].astype('int64') - old_spike.astype('int64')).to_numpy()
+        }, index=district_ids).groupby(level=0, observed=True).sum()
+        self.stats = self.stats.add(increments, fill_value=0).astype('int64')
+
+        self.yearly.loc[delta.index[existing], YEARLY_COLUMNS] = new.loc[existing, YEARLY_COLUMNS].to_numpy()
+        if (~existing).any():
+            self.yearly = pd.concat([self.yearly, new.loc[~existing, YEARLY_COLUMNS]]).sort_index()
+
+        self.changed_years = sorted(int(year) for year in delta.index.get_level_values('year').unique())
+        delta_latest = int(delta.index.get_level_values('year').max())
+        if delta_latest > self.latest_year:
+            self.latest_year = delta_latest
+            affected = self.uls.index
+        else:
+            affected = self.uls.index.intersection(pd.Index(district_ids.unique()))
+
+        self._rescore(affected)
+        self.analytics.demographic_df = self.yearly.reset_index()
+        self.analytics.uls_results = self.uls.reset_index(drop=True)
+        return affected
+
+    def _rescore(self, affected):
+        self.changed_ids = affected
+        if not len(affected):
+            return
+
+        latest = self.yearly.xs(self.latest_year, level='year', drop_level=False).reset_index()
+        latest = latest[latest['district_id'].isin(affected)]
+        demo_freq = self.analytics.demographic_components(latest).set_index('district_id')
+
+        anomaly = self.analytics.anomaly_components(stats_moments(self.stats.reindex(affected)))
+        anomaly = anomaly.set_index('district_id')
+
+        rows = self.uls.loc[affected].copy()
+        for column in DEMOGRAPHIC_OUTPUT_COLUMNS:
+            rows[column] = demo_freq[column].reindex(affected).to_numpy()
+        rows['anomaly_score_anomaly'] = anomaly['anomaly_score'].to_numpy()
+        rows['spike_count'] = anomaly['spike_count'].to_numpy()
+
+        scored = self.analytics.score_lifecycle(rows)
+        self.uls = pd.concat([self.uls.drop(affected), scored]).reindex(self.uls.index)
+
+    def export_changes(self, output_path="backend/analytics/", write_legacy=False):
+        changed = self.uls.loc[self.changed_ids].reset_index(drop=True)
+        write_csv_atomic(changed, f"{output_path}uls_changes.csv")
+
+        bundle = ExportBundle(output_path)
+        manifest = bundle.manifest()
+        if manifest is None or not all(name in manifest['parts'] for name in PATCHED_PARTS):
+            summary = self.analytics.export_results(output_path, write_legacy=write_legacy)
+        else:
+            summary = self._patch_results(bundle, changed, output_path, write_legacy)
+        self.save_state()
+        print(f"Rescored {len(self.changed_ids)} districts incrementally")
+        return summary
+
+    def _patch_results(self, bundle, changed, output_path, write_legacy):
+        # Only the changed districts, their states and the delta years are recomputed;
+        # every other row is carried over from the current export bundle
+        uls = self.analytics.uls_results
+
+        recommendations = bundle.read('recommendations')
+        position = {rec['district_id']: i for i, rec in enumerate(recommendations)}
+        for rec in self.analytics.generate_recommendations(changed):
+            if rec['district_id'] in position:
+                recommendations[position[rec['district_id']]] = rec
+            else:
+                recommendations.append(rec)
+
+        states = set(changed['state'].astype(str))
+        affected = self.analytics.state_summary_frame(uls[uls['state'].astype(str).isin(states)])
+        by_state = {s['state']: s for s in bundle.read('state_summary')}
+        by_state.update({s['state']: s for s in affected.round(2).to_dict(orient='records')})
+        state_summary = [by_state[state] for state in sorted(by_state)]
+
+        trends = bundle.read('trends')
+        for trend in trends:
+            if trend['year'] in self.changed_years:
+                rows = self.yearly.xs(trend['year'], level='year')
+                trend['total_demo_updates'] = int(rows['total_demographic_updates'].sum())
+                trend['avg_churn_rate'] = float(rows['churn_rate'].mean())
+
+        summary = self.analytics.results_summary(uls)
+        parts = {
+            'uls_scores': uls,
+            'recommendations': recommendations,
+            'trends': trends,
+            'state_summary': state_summary,
+            'high_risk_districts': self.analytics.high_risk_records(uls),
+            'summary': summary
+        }
+        serving = patch_serving_artifacts(uls, changed, output_path, recommendations, state_summary)
+        if serving is None:
+            serving = build_serving_artifacts(uls, output_path, recommendations=recommendations,
+                                              state_summary=state_summary, cube=self.analytics.feed_cube)
+        parts.update(serving)
+        self.analytics.write_result_parts(output_path, parts, write_legacy)
+        return summary
@@ -0,0 +1,158 @@
+import numpy as np
+import json
+import os
+import queue
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from ml_predictor import AuthFailurePredictor, categorize_risk
+
+
+class InferenceService:
+    def __init__(self, model_path="backend/analytics/", max_batch_size=512, max_wait_ms=2, backend='sklearn'):
+        self.predictor = AuthFailurePredictor(backend=backend)
+        self.predictor.load_model(model_path, verbose=False)
+        self.feature_columns = self.predictor.feature_columns
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.batches_scored = 0
+        self.rows_scored = 0
+
+        self.worker = threading.Thread(target=self._run_batches, daemon=True)
+        self.worker.start()
+
+    def to_matrix(self, instances):
+        if isinstance(instances, dict) or (instances and not isinstance(instances[0], (dict, list, tuple))):
+            instances = [instances]
+
+        X = np.empty((len(instances), len(self.feature_columns)), dtype=float)
+        for i, instance in enumerate(instances):
+            if isinstance(instance, dict):
+                missing = [c for c in self.feature_columns if c not in instance]
+                if missing:
+                    raise ValueError(f"Instance {i} is missing features: {', '.join(missing)}")
+                X[i] = [instance[c] if instance[c] is not None else 0 for c in self.feature_columns]
+            else:
+                if len(instance) != len(self.feature_columns):
+                    raise ValueError(f"Instance {i} has {len(instance)} values, "
+                                     f"expected {len(self.feature_columns)}")
+                X[i] = [v if v is not None else 0 for v in instance]
+        # Checked per request, before batching, so one bad request cannot fail the others in its micro-batch
+        bad_rows = np.flatnonzero(~np.isfinite(X).all(axis=1))
+        if len(bad_rows):
+            raise ValueError(f"Instance {bad_rows[0]} has non-finite feature values")
+        return X
+
+    def score(self, X):
+        probabilities = self.predictor.predict_features(X).round(2)
+        return probabilities, categorize_risk(probabilities)
+
+    def predict(self, instances):
+        X = self.to_matrix(instances)
+        done = threading.Event()
+        pending = {'X': X, 'done': done, 'result': None, 'error': None}
+        self.requests.put(pending)
+        done.wait()
+
+        if pending['error'] is not None:
+            raise pending['error']
+
+        probabilities, categories = pending['result']
+        return [{'auth_failure_prob': float(p), 'risk_category': str(c)}
+                for p, c in zip(probabilities, categories)]
+
+    def _collect_batch(self):
+        batch = [self.requests.get()]
+        rows = len(batch[0]['X'])
+        while rows < self.max_batch_size:
+            try:
+                pending = self.requests.get(timeout=self.max_wait)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += len(pending['X'])
+        return batch
+
+    def _run_batches(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                probabilities, categories = self.score(np.vstack([p['X'] for p in batch]))
+                offset = 0
+                for pending in batch:
+                    rows = len(pending['X'])
+                    pending['result'] = (probabilities[offset:offset + rows], categories[offset:offset + rows])
+                    offset += rows
+                self.batches_scored += 1
+                self.rows_scored += offset
+            except Exception:
+                # Rescore one request at a time so the error only reaches the request that caused it
+                for pending in batch:
+                    try:
+                        pending['result'] = self.score(pending['X'])
+                        self.rows_scored += len(pending['X'])
+                    except Exception as error:
+                        pending['error'] = error
+                self.batches_scored += 1
+            for pending in batch:
+                pending['done'].set()
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {
+                'status': 'healthy',
+                'batches_scored': self.service.batches_scored,
+                'rows_scored': self.service.rows_scored
+            })
+        elif self.path == '/metadata':
+            self._send_json(200, {'feature_columns': self.service.feature_columns})
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            return self._send_json(404, {'error': 'Not found'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if isinstance(payload, list):
+                instances = payload
+            elif isinstance(payload, dict):
+                instances = payload.get('instances', payload.get('features'))
+            else:
+                raise ValueError("Request body must be a JSON object or a list of instances")
+            if instances is None:
+                raise ValueError("Request body needs 'instances' or 'features'")
+            predictions = self.service.predict(instances)
+        except (ValueError, TypeError) as error:
+            return self._send_json(400, {'error': str(error)})
+
+        self._send_json(200, {'predictions': predictions})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(model_path="backend/analytics/", host="127.0.0.1", port=8765, backend='sklearn'):
+    InferenceRequestHandler.service = InferenceService(model_path, backend=backend)
+    server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+    print(f"ALIS inference server running on {host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve(port=int(os.environ.get('INFERENCE_PORT', 8765)),
+          backend=os.environ.get('INFERENCE_BACKEND', 'sklearn'))
@@ -0,0 +1,178 @@
+import pandas as pd
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+RAW_FEEDS = {
+    'demographic': {
+        'directory': 'api_data_aadhar_demographic',
+        'pattern': 'api_data_aadhar_demographic_*.csv',
+        'measures': ['demo_age_5_17', 'demo_age_17_'],
+        'derived': {
+            'total_demographic_updates': ['demo_age_5_17', 'demo_age_17_']
+        }
+    },
+    'enrolment': {
+        'directory': 'api_data_aadhar_enrolment',
+        'pattern': 'api_data_aadhar_enrolment_*.csv',
+        'measures': ['age_0_5', 'age_5_17', 'age_18_greater'],
+        'derived': {
+            'child_enrolments': ['age_0_5', 'age_5_17'],
+            'adult_enrolments': ['age_18_greater']
+        }
+    },
+    'biometric': {
+        'directory': 'api_data_aadhar_biometric',
+        'pattern': 'api_data_aadhar_biometric_*.csv',
+        'measures': ['bio_age_5_17', 'bio_age_17_'],
+        'derived': {
+            'total_biometric_updates': ['bio_age_5_17', 'bio_age_17_'],
+            'child_biometric_updates': ['bio_age_5_17']
+        }
+    }
+}
+
+KEY_COLUMNS = ['date', 'state', 'district', 'pincode']
+GROUP_COLUMNS = ['state', 'district', 'year']
+
+SHARD_RANGE = re.compile(r'_(\d+)_(\d+)\.csv$')
+
+
+def shard_sort_key(path):
+    match = SHARD_RANGE.search(os.path.basename(path))
+    if match:
+        return (int(match.group(1)), int(match.group(2)), path)
+    return (float('inf'), 0, path)
+
+
+def list_shards(directory, pattern):
+    shards = glob.glob(os.path.join(directory, '**', pattern), recursive=True)
+    return sorted(shards, key=shard_sort_key)
+
+
+def read_shard_chunks(shard, feed, chunksize):
+    spec = RAW_FEEDS[feed]
+    dtypes = {'date': 'string', 'state': 'category', 'district': 'category', 'pincode': 'int32'}
+    dtypes.update({col: 'int32' for col in spec['measures']})
+    return pd.read_csv(shard, usecols=KEY_COLUMNS + spec['measures'], dtype=dtypes, chunksize=chunksize)
+
+
+def reduce_partials(partials, group_columns):
+    combined = pd.concat(partials)
+    return combined.groupby(level=group_columns, observed=True).sum().astype('int64')
+
+
+def rollup_chunks(chunks, feed, group_columns, max_partials):
+    measures = RAW_FEEDS[feed]['measures']
+
+    partials = []
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        chunk['year'] = chunk['date'].str[-4:].astype('int16')
+        partial = chunk.groupby(group_columns, observed=True)[measures].sum()
+        partial['row_count'] = chunk.groupby(group_columns, observed=True).size()
+        partials.append(partial)
+
+        if len(partials) >= max_partials:
+            partials = [reduce_partials(partials, group_columns)]
+
+    if not partials:
+        return None, rows
+    return reduce_partials(partials, group_columns), rows
+
+
+def rollup_shard(job):
+    shard, feed, group_columns, chunksize, max_partials = job
+    return rollup_chunks(read_shard_chunks(shard, feed, chunksize), feed, group_columns, max_partials)
+
+
+class ShardIngestor:
+    def __init__(self, raw_path="./", chunksize=500000, max_partials=32, workers=1, validator=None,
+                 district_index=None):
+        self.raw_path = raw_path
+        self.validator = validator
+        self.district_index = district_index
+        self.chunksize = chunksize
+        self.max_partials = max_partials
+        self.workers = workers
+        self.rows_read = {}
+
+    def feed_directory(self, feed, directory=None):
+        if directory is not None:
+            return directory
+        return os.path.join(self.raw_path, RAW_FEEDS[feed]['directory'])
+
+    def shards(self, feed, directory=None):
+        return list_shards(self.feed_directory(feed, directory), RAW_FEEDS[feed]['pattern'])
+
+    def read_chunks(self, shard, feed):
+        if self.validator is not None:
+            return self.validator.read_chunks(shard, feed, self.chunksize)
+        return read_shard_chunks(shard, feed, self.chunksize)
+
+    def iter_chunks(self, feed, directory=None, shards=None):
+        for shard in shards if shards is not None else self.shards(feed, directory):
+            for chunk in self.read_chunks(shard, feed):
+                yield chunk
+
+    def rollup(self, feed, directory=None, level='district', shards=None):
+        spec = RAW_FEEDS[feed]
+        group_columns = GROUP_COLUMNS + (['pincode'] if level == 'pincode' else [])
+        jobs = [(shard, feed, group_columns, self.chunksize, self.max_partials)
+                for shard in (shards if shards is not None else self.shards(feed, directory))]
+
+        if self.validator is not None:
+            # Cross-shard dedup needs one seen-set, so validated shards are read in order in-process
+            results = (rollup_chunks(self.read_chunks(shard, feed), feed, group_columns, self.max_partials)
+                       for shard, *_ in jobs)
+        elif self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                results = list(pool.map(rollup_shard, jobs))
+        else:
+            results = map(rollup_shard, jobs)
+
+        partials = []
+        rows = 0
+        for partial, shard_rows in results:
+            rows += shard_rows
+            if partial is not None:
+                partials.append(partial)
+            if len(partials) >= self.max_partials:
+                partials = [reduce_partials(partials, group_columns)]
+
+        self.rows_read[feed] = rows
+
+        if not partials:
+            return pd.DataFrame(columns=group_columns + spec['measures'] + ['row_count'] +
+                                list(spec['derived']))
+
+        rolled = reduce_partials(partials, group_columns).reset_index()
+        rolled[['state', 'district']] = rolled[['state', 'district']].astype(str)
+        for column, parts in spec['derived'].items():
+            rolled[column] = rolled[parts].sum(axis=1).astype('int64')
+        if self.district_index is not None:
+            rolled = self.district_index.assign(rolled, 'row_count')
+
+        return rolled.sort_values(group_columns).reset_index(drop=True)
+
+    def load_all(self, directories=None, level='district'):
+        directories = directories or {}
+        rollups = {}
+        for feed in RAW_FEEDS:
+            if not self.shards(feed, directories.get(feed)):
+                continue
+            rollups[feed] = self.rollup(feed, directories.get(feed), level=level)
+            print(f"Ingested {self.rows_read[feed]} {feed} rows into {len(rollups[feed])} groups")
+        return rollups
+
+
+if __name__ == "__main__":
+    ingestor = ShardIngestor()
+    rollups = ingestor.load_all({
+        'enrolment': 'datasets/api_data_aadhar_biometric/api_data_aadhar_enrolment'
+    })
+    for feed, frame in rollups.items():
+        print(f"\n{feed}:")
+        print(frame.head())
@@ -0,0 +1,186 @@
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import warnings
+from export_bundle import write_json_atomic
+
+REPORT_FILE = 'run_report.json'
+
+
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+
+def row_count(value):
+    if isinstance(value, dict):
+        counts = [len(v) for v in value.values() if isinstance(v, (pd.DataFrame, pd.Series))]
+        return sum(counts) if counts else None
+    if isinstance(value, (pd.DataFrame, pd.Series, list)):
+        return len(value)
+    return None
+
+
+def total_rows(values):
+    counts = [row_count(v) for v in values]
+    counts = [c for c in counts if c is not None]
+    return sum(counts) if counts else None
+
+
+def frame_memory_mb(value, deep=False):
+    if isinstance(value, dict):
+        sizes = [frame_memory_mb(v, deep) for v in value.values()]
+        sizes = [s for s in sizes if s is not None]
+        return round(sum(sizes), 3) if sizes else None
+    if isinstance(value, pd.DataFrame):
+        return round(value.memory_usage(index=True, deep=deep).sum() / (1024 * 1024), 3)
+    if isinstance(value, pd.Series):
+        return round(value.memory_usage(index=True, deep=deep) / (1024 * 1024), 3)
+    return None
+
+
+class PipelineProfiler:
+    def __init__(self, component, profile_dir=None, deep_memory=False):
+        self.component = component
+        self.profile_dir = profile_dir if profile_dir is not None else os.environ.get('ALIS_PROFILE_DIR')
+        self.deep_memory = deep_memory
+        self.started_at = datetime.now().isoformat()
+        self.stages = []
+        self.warnings = {}
+        self.depth = 0
+        self.parents = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = {
+            'stage': name,
+            'parent': self.parents[-1] if self.parents else None,
+            'rows_in': rows_in,
+            'rows_out': None,
+            'frame_memory_mb': None
+        }
+        outermost = self.depth == 0
+        profile = cProfile.Profile() if outermost and self.profile_dir else None
+        caught = warnings.catch_warnings(record=True) if outermost else None
+
+        self.depth += 1
+        self.parents.append(name)
+        rss_before = current_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if caught is not None:
+            captured = caught.__enter__()
+            warnings.simplefilter('always')
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            if caught is not None:
+                caught.__exit__(None, None, None)
+                self._record_warnings(name, captured)
+            self.depth -= 1
+            self.parents.pop()
+
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 4)
+            rss_after = current_rss_mb()
+            record['rss_mb'] = rss_after
+            record['rss_delta_mb'] = (round(rss_after - rss_before, 1)
+                                      if rss_after is not None and rss_before is not None else None)
+            record['max_rss_mb'] = max_rss_mb()
+            if profile is not None:
+                record['profile'] = self._dump_profile(name, profile)
+            self.stages.append(record)
+
+    def output(self, record, result):
+        record['rows_out'] = row_count(result)
+        record['frame_memory_mb'] = frame_memory_mb(result, self.deep_memory)
+
+    def _record_warnings(self, stage, captured):
+        for w in captured:
+            key = (stage, w.category.__name__, str(w.message))
+            if key not in self.warnings:
+                self.warnings[key] = {'stage': stage, 'category': w.category.__name__,
+                                      'message': str(w.message), 'location': f"{w.filename}:{w.lineno}",
+                                      'count': 0}
+            self.warnings[key]['count'] += 1
+
+    def _dump_profile(self, name, profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{self.component}-{name}-{len(self.stages)}.prof")
+        profile.dump_stats(path)
+        return path
+
+    def report(self):
+        top_level = [s for s in self.stages if s['parent'] is None]
+        return {
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(),
+            'total_wall_seconds': round(sum(s['wall_seconds'] for s in top_level), 4),
+            'total_cpu_seconds': round(sum(s['cpu_seconds'] for s in top_level), 4),
+            'max_rss_mb': max_rss_mb(),
+            'stages': self.stages,
+            'warnings': list(self.warnings.values())
+        }
+
+    def write_report(self, output_path="backend/analytics/"):
+        path = f"{output_path}{REPORT_FILE}"
+        report = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    report = json.load(f)
+            except ValueError:
+                report = {}
+        report.setdefault('components', {})[self.component] = self.report()
+        report['generated_at'] = datetime.now().isoformat()
+        write_json_atomic(path, report)
+        if self.warnings:
+            print(f"Captured {len(self.warnings)} distinct warnings, see {path}")
+        return path
+
+
+def instrumented(stage=None, inputs=(), outputs=()):
+    def decorator(method):
+        name = stage or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = getattr(self, 'profiler', None)
+            if profiler is None:
+                return method(self, *args, **kwargs)
+
+            rows_in = total_rows(list(args) + list(kwargs.values()) +
+                                 [getattr(self, attr, None) for attr in inputs])
+            with profiler.stage(name, rows_in) as record:
+                result = method(self, *args, **kwargs)
+                if outputs:
+                    profiler.output(record, {attr: getattr(self, attr, None) for attr in outputs})
+                else:
+                    profiler.output(record, result)
+            return result
+        return wrapper
+    return decorator
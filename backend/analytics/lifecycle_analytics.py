@@ -1,250 +1,369 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import json
-import warnings
-warnings.filterwarnings('ignore')
+from ingestion import ShardIngestor
+from validation import ValidationStage
+from district_index import DistrictIndex
+from pincode_anomalies import PincodeAnomalyDetector
+from aggregation_cube import AggregationCube, CUBE_DIR
+from feature_store import get_feature_store, aggregate_demographic
+from recommendation_rules import RecommendationEngine
+from serving_artifacts import build_serving_artifacts
+from export_bundle import ExportBundle, write_json_atomic, write_csv_atomic
+from instrumentation import PipelineProfiler, instrumented
+from risk_levels import (ULS_WEIGHTS, ULS_RISK_BANDS, ULS_DEFAULT_RISK, STATE_RISK_BANDS, STATE_DEFAULT_RISK,
+                         weighted_uls_score, classify_scores)
+
+STATE_SUMMARY_MEASURES = ['uls_score', 'auth_failure_probability', 'coverage_score', 'biometric_age_score']
+BIO_TREND_MEASURES = ['biometric_failure_rate', 'authentication_success_rate',
+                      'total_biometric_updates', 'child_biometric_updates']
+DEMO_TREND_MEASURES = ['total_demographic_updates', 'churn_rate']
+LEGACY_RESULT_FILES = ['recommendations', 'trends', 'state_summary', 'high_risk_districts', 'summary']
+
+def coverage_score(coverage_ratio):
+    return coverage_ratio * 100
+
+def demographic_volatility(churn_rate):
+    return churn_rate * 100
+
+def biometric_age_score(avg_biometric_age_days):
+    return (100 - (avg_biometric_age_days / 25)).clip(0, 100)
+
+def child_vulnerability_score(child_refresh_gap_months):
+    return ((child_refresh_gap_months / 60) * 100).clip(0, 100)
+
+def auth_failure_probability(uls_score, biometric_failure_rate):
+    return ((100 - uls_score) / 100 * biometric_failure_rate * 100).round(2).clip(0, 100)
 
 class LifecycleAnalytics:
-    def __init__(self, data_path="datasets/"):
+    def __init__(self, data_path="datasets/", use_cache=True, rules_path=None, profiler=None,
+                 uls_weights=None, risk_bands=None):
         self.data_path = data_path
+        self.uls_weights = dict(uls_weights or ULS_WEIGHTS)
+        self.risk_bands = list(risk_bands or ULS_RISK_BANDS)
+        self.profiler = profiler if profiler is not None else PipelineProfiler('lifecycle_analytics')
+        self.recommendation_engine = RecommendationEngine(rules_path=rules_path)
+        self.use_cache = use_cache
+        self.store = None
         self.enrolment_df = None
         self.demographic_df = None
         self.biometric_df = None
         self.district_master = None
         self.uls_results = None
+        self.latest_years = {}
+        self.merged_partials = None
+        self.raw_feeds = {}
+        self.validation_report = None
+        self.district_index = None
+        self.pincode_anomalies = None
+        self.pincode_anomaly_weight = 0.5
+        self.feed_cube = None
         
+    @instrumented(outputs=('enrolment_df', 'demographic_df', 'biometric_df', 'district_master'))
     def load_data(self):
-        self.enrolment_df = pd.read_csv(f"{self.data_path}aadhaar_enrolment_data.csv")
-        self.demographic_df = pd.read_csv(f"{self.data_path}demographic_update_logs.csv")
-        self.biometric_df = pd.read_csv(f"{self.data_path}biometric_update_records.csv")
-        self.district_master = pd.read_csv(f"{self.data_path}district_master.csv")
+        self.store = get_feature_store(self.data_path, self.use_cache)
+        self.enrolment_df = self.store.dataset('enrolment')
+        self.demographic_df = self.store.dataset('demographic')
+        self.biometric_df = self.store.dataset('biometric')
+        self.district_master = self.store.dataset('district_master')
         print(f"Loaded data for {len(self.enrolment_df)} districts")
+    
+    def load_district_index(self, index_path="backend/analytics/district_index/"):
+        if self.district_index is None or self.district_index.index_path != index_path:
+            master = self.district_master if self.district_master is not None else self.enrolment_df
+            version = self.store.file_version('district_master' if self.district_master is not None
+                                              else 'enrolment')
+            self.district_index = DistrictIndex.load_or_build(master, version, index_path)
+        return self.district_index
+    
+    @instrumented()
+    def load_raw_feeds(self, raw_path="./", directories=None, chunksize=500000, workers=1, validate=True,
+                       reject_path="backend/analytics/validation/", level='district',
+                       index_path="backend/analytics/district_index/"):
+        validator = ValidationStage(reject_path) if validate else None
+        index = self.load_district_index(index_path)
+        ingestor = ShardIngestor(raw_path, chunksize=chunksize, workers=workers, validator=validator,
+                                 district_index=index)
+        self.raw_feeds = ingestor.load_all(directories, level=level)
+        if validator is not None:
+            self.validation_report = validator.close()
+        if index.changed or index.unresolved:
+            index.save()
+        return self.raw_feeds
+
+    @instrumented(inputs=('enrolment_df',), outputs=('pincode_anomalies',))
+    def detect_pincode_anomalies(self, raw_path="./", directory=None, feed='demographic', chunksize=500000,
+                                 validate=True, reject_path="backend/analytics/validation/",
+                                 index_path="backend/analytics/district_index/", **detector_options):
+        validator = ValidationStage(reject_path) if validate else None
+        ingestor = ShardIngestor(raw_path, chunksize=chunksize, validator=validator)
+        detector = PincodeAnomalyDetector(**detector_options)
+        index = self.load_district_index(index_path)
+        self.pincode_anomalies = detector.detect(ingestor, self.enrolment_df, feed, directory, index)
+        if validator is not None:
+            self.validation_report = validator.close()
+        if index.changed or index.unresolved:
+            index.save()
+        return self.pincode_anomalies
+
+    @instrumented()
+    def update_feed_cube(self, raw_path="./", feed='demographic', output_path="backend/analytics/",
+                         period='year', chunksize=500000, workers=1, validate=True):
+        cube = AggregationCube.load(output_path)
+        if cube is None or cube.feed != feed or cube.period != period:
+            cube = AggregationCube.for_feed(feed, period)
+        # The seen-set persists next to the cube so newly arrived shards are deduplicated against ingested ones
+        validator = ValidationStage(f"{output_path}{CUBE_DIR}validation/", persist_seen=True) if validate else None
+        cube.ingest_shards(ShardIngestor(raw_path, chunksize=chunksize, workers=workers, validator=validator), feed)
+        cube.save(output_path)
+        if validator is not None:
+            self.validation_report = validator.close()
+        self.feed_cube = cube
+        return cube
         
+    @instrumented(inputs=('enrolment_df',))
     def compute_coverage_ratio(self):
-        coverage = self.enrolment_df[['district_id', 'district_name', 'state', 'coverage_ratio']].copy()
-        coverage['coverage_score'] = coverage['coverage_ratio'] * 100
-        return coverage
+        coverage = self.enrolment_df[['district_id', 'district_name', 'state', 'coverage_ratio']]
+        return coverage.assign(coverage_score=coverage_score(coverage['coverage_ratio']))
     
+    @instrumented(inputs=('demographic_df',))
     def compute_demographic_frequency(self):
-        latest_demo = self.demographic_df[self.demographic_df['year'] == self.demographic_df['year'].max()].copy()
-        demo_freq = latest_demo[['district_id', 'total_demographic_updates', 'churn_rate', 'update_spike_detected']].copy()
-        demo_freq['demographic_volatility'] = demo_freq['churn_rate'] * 100
-        demo_freq['spike_flag'] = demo_freq['update_spike_detected'].astype(int)
-        return demo_freq
+        latest_year = self.latest_years.get('demographic', self.demographic_df['year'].max())
+        latest_demo = self.demographic_df[self.demographic_df['year'] == latest_year]
+        return self.demographic_components(latest_demo)
+    
+    def demographic_components(self, latest_demo):
+        demo_freq = latest_demo[['district_id', 'total_demographic_updates', 'churn_rate', 'update_spike_detected']]
+        return demo_freq.assign(demographic_volatility=demographic_volatility(demo_freq['churn_rate']),
+                                spike_flag=demo_freq['update_spike_detected'].astype(int))
     
+    @instrumented(inputs=('biometric_df',))
     def compute_biometric_freshness(self):
-        latest_bio = self.biometric_df[self.biometric_df['year'] == self.biometric_df['year'].max()].copy()
+        latest_year = self.latest_years.get('biometric', self.biometric_df['year'].max())
+        latest_bio = self.biometric_df[self.biometric_df['year'] == latest_year]
         bio_fresh = latest_bio[['district_id', 'avg_biometric_age_days', 'biometric_freshness_score', 
-                                 'biometric_failure_rate', 'child_refresh_gap_months', 'anomaly_detected']].copy()
-        
-        bio_fresh['biometric_age_score'] = 100 - (bio_fresh['avg_biometric_age_days'] / 25)
-        bio_fresh['biometric_age_score'] = bio_fresh['biometric_age_score'].clip(0, 100)
-        
-        bio_fresh['child_vulnerability_score'] = (bio_fresh['child_refresh_gap_months'] / 60) * 100
-        bio_fresh['child_vulnerability_score'] = bio_fresh['child_vulnerability_score'].clip(0, 100)
-        
-        bio_fresh['anomaly_score'] = bio_fresh['anomaly_detected'].astype(int) * 50
+                                'biometric_failure_rate', 'child_refresh_gap_months', 'anomaly_detected']]
         
-        return bio_fresh
+        return bio_fresh.assign(
+            biometric_age_score=biometric_age_score(bio_fresh['avg_biometric_age_days']),
+            child_vulnerability_score=child_vulnerability_score(bio_fresh['child_refresh_gap_months']),
+            anomaly_score=bio_fresh['anomaly_detected'].astype(int) * 50
+        )
     
+    @instrumented(inputs=('demographic_df',))
     def detect_anomalies(self):
-        demo_by_district = self.demographic_df.groupby('district_id').agg({
-            'total_demographic_updates': ['mean', 'std'],
-            'update_spike_detected': 'sum'
-        }).reset_index()
-        demo_by_district.columns = ['district_id', 'update_mean', 'update_std', 'spike_count']
+        if self.store is not None:
+            demo_agg = self.store.demographic_by_district()
+        else:
+            demo_agg = aggregate_demographic(self.demographic_df)
         
-        demo_by_district['update_cv'] = demo_by_district['update_std'] / demo_by_district['update_mean']
-        demo_by_district['anomaly_score'] = (demo_by_district['update_cv'] * 50 + 
-                                              demo_by_district['spike_count'] * 10)
-        demo_by_district['anomaly_score'] = demo_by_district['anomaly_score'].clip(0, 100)
-        
-        return demo_by_district[['district_id', 'anomaly_score', 'spike_count']]
+        demo_by_district = demo_agg[['district_id', 'demo_update_mean', 'demo_update_std', 'total_spikes']]
+        demo_by_district = demo_by_district.set_axis(['district_id', 'update_mean', 'update_std', 'spike_count'],
+                                                     axis=1)
+        return self.anomaly_components(demo_by_district)
+    
+    def anomaly_components(self, demo_by_district):
+        update_cv = demo_by_district['update_std'] / demo_by_district['update_mean']
+        anomaly_score = (update_cv * 50 + demo_by_district['spike_count'] * 10).clip(0, 100)
+        return pd.DataFrame({
+            'district_id': demo_by_district['district_id'],
+            'anomaly_score': anomaly_score,
+            'spike_count': demo_by_district['spike_count']
+        })
     
+    def align_components(self, coverage, components):
+        # Every component is keyed by district_id and laid side by side on the enrolment index;
+        # frames already in enrolment order are reused as-is instead of being reindexed
+        index = pd.Index(coverage['district_id'], name='district_id')
+        aligned = [coverage.set_index('district_id', drop=False)]
+        for component in components:
+            component = component.set_index('district_id')
+            if not component.index.equals(index):
+                component = component.reindex(index)
+            aligned.append(component)
+        return pd.concat(aligned, axis=1).reset_index(drop=True)
+    
+    @instrumented(inputs=('enrolment_df',))
     def compute_universal_lifecycle_score(self):
-        coverage = self.compute_coverage_ratio()
-        demo_freq = self.compute_demographic_frequency()
-        bio_fresh = self.compute_biometric_freshness()
         anomaly = self.detect_anomalies()
+        uls = self.align_components(self.compute_coverage_ratio(), [
+            self.compute_demographic_frequency(),
+            self.compute_biometric_freshness(),
+            anomaly.rename(columns={'anomaly_score': 'anomaly_score_anomaly'})
+        ])
+        uls = self.blend_pincode_anomalies(uls)
         
-        uls = coverage.merge(demo_freq, on='district_id', how='left')
-        uls = uls.merge(bio_fresh, on='district_id', how='left')
-        uls = uls.merge(anomaly, on='district_id', how='left', suffixes=('', '_anomaly'))
-        
-        uls['uls_score'] = (
-            uls['coverage_score'] * 0.30 +
-            (100 - uls['demographic_volatility']) * 0.15 +
-            uls['biometric_age_score'] * 0.25 +
-            (100 - uls['child_vulnerability_score']) * 0.15 +
-            (100 - uls['anomaly_score']) * 0.15
-        )
-        
-        uls['uls_score'] = uls['uls_score'].clip(0, 100).round(2)
-        
-        def classify_risk(score):
-            if score >= 70:
-                return 'Stable'
-            elif score >= 50:
-                return 'Watchlist'
-            else:
-                return 'High Risk'
-        
-        uls['risk_classification'] = uls['uls_score'].apply(classify_risk)
+        self.uls_results = self.score_lifecycle(uls)
+        self.merged_partials = None
+        return self.uls_results
+    
+    def blend_pincode_anomalies(self, uls):
+        if self.pincode_anomalies is None:
+            return uls
+        scores = self.pincode_anomalies.set_index('district_id')['pincode_anomaly_score']
+        uls['pincode_anomaly_score'] = uls['district_id'].astype(str).map(scores)
+        # Pincode spikes add a capped penalty on top of the existing anomaly signal and can never dilute it,
+        # so a district without spikes keeps exactly the score it had before
+        penalty = uls['pincode_anomaly_score'].fillna(0) * self.pincode_anomaly_weight
+        uls['anomaly_score'] = (uls['anomaly_score'] + penalty).clip(upper=100)
+        return uls
+    
+    def score_lifecycle(self, uls):
+        uls['uls_score'] = weighted_uls_score(uls, self.uls_weights).clip(0, 100).round(2)
+        uls['risk_classification'] = classify_scores(uls['uls_score'], self.risk_bands, ULS_DEFAULT_RISK)
         
-        uls['auth_failure_probability'] = ((100 - uls['uls_score']) / 100 * 
-                                            uls['biometric_failure_rate'] * 100).round(2)
-        uls['auth_failure_probability'] = uls['auth_failure_probability'].clip(0, 100)
+        uls['auth_failure_probability'] = auth_failure_probability(uls['uls_score'], uls['biometric_failure_rate'])
         
-        self.uls_results = uls
         return uls
     
+    @instrumented()
     def generate_recommendations(self, uls_df):
-        recommendations = []
-        
-        for _, row in uls_df.iterrows():
-            district_recs = {
-                'district_id': row['district_id'],
-                'district_name': row['district_name'],
-                'state': row['state'],
-                'uls_score': row['uls_score'],
-                'risk_classification': row['risk_classification'],
-                'recommendations': []
-            }
-            
-            if row['biometric_age_score'] < 50:
-                district_recs['recommendations'].append({
-                    'type': 'BIOMETRIC_CAMP',
-                    'priority': 'HIGH',
-                    'action': 'Organize district-level biometric update camps',
-                    'reason': f"High biometric ageing detected (avg age: {row['avg_biometric_age_days']:.0f} days)"
-                })
-            
-            if row['demographic_volatility'] > 20:
-                district_recs['recommendations'].append({
-                    'type': 'AWARENESS_DRIVE',
-                    'priority': 'MEDIUM',
-                    'action': 'Launch demographic data correction awareness campaign',
-                    'reason': f"High demographic churn rate ({row['demographic_volatility']:.1f}%)"
-                })
-            
-            if row['child_vulnerability_score'] > 60:
-                district_recs['recommendations'].append({
-                    'type': 'SCHOOL_INITIATIVE',
-                    'priority': 'HIGH',
-                    'action': 'Initiate school-based Aadhaar update program for children',
-                    'reason': f"Child biometric refresh gap: {row['child_refresh_gap_months']:.0f} months"
-                })
-            
-            if row['spike_flag'] == 1 or row['anomaly_score'] > 50:
-                district_recs['recommendations'].append({
-                    'type': 'FRAUD_AUDIT',
-                    'priority': 'CRITICAL',
-                    'action': 'Flag for fraud investigation and detailed audit',
-                    'reason': 'Abnormal update spike or anomaly pattern detected'
-                })
-            
-            if row['coverage_score'] < 85:
-                district_recs['recommendations'].append({
-                    'type': 'ENROLMENT_DRIVE',
-                    'priority': 'MEDIUM',
-                    'action': 'Conduct special enrolment drive in low-coverage areas',
-                    'reason': f"Coverage ratio below target ({row['coverage_score']:.1f}%)"
-                })
-            
-            if not district_recs['recommendations']:
-                district_recs['recommendations'].append({
-                    'type': 'MONITORING',
-                    'priority': 'LOW',
-                    'action': 'Continue regular monitoring',
-                    'reason': 'District lifecycle health is stable'
-                })
-            
-            recommendations.append(district_recs)
-        
-        return recommendations
+        return self.recommendation_engine.generate(uls_df)
     
-    def get_trend_data(self):
-        yearly_stats = self.biometric_df.groupby('year').agg({
-            'biometric_failure_rate': 'mean',
-            'authentication_success_rate': 'mean',
-            'total_biometric_updates': 'sum',
-            'child_biometric_updates': 'sum'
+    def district_states(self, district_ids):
+        states = self.enrolment_df.drop_duplicates('district_id')
+        states = pd.Series(states['state'].astype(str).to_numpy(), index=states['district_id'].astype(str))
+        return district_ids.astype(str).map(states).fillna('').rename('state')
+    
+    def trend_partials(self):
+        biometric = self.biometric_df.assign(state=self.district_states(self.biometric_df['district_id']))
+        bio = AggregationCube.from_frame(biometric, ['state', 'year'], BIO_TREND_MEASURES).cuboid(['state', 'year'])
+        bio_partial = pd.DataFrame({
+            'failure_rate_sum': bio['biometric_failure_rate_sum'],
+            'failure_rate_count': bio['biometric_failure_rate_count'].astype('int64'),
+            'success_rate_sum': bio['authentication_success_rate_sum'],
+            'success_rate_count': bio['authentication_success_rate_count'].astype('int64'),
+            'total_bio_updates': bio['total_biometric_updates_sum'].astype('int64'),
+            'child_bio_updates': bio['child_biometric_updates_sum'].astype('int64')
         }).reset_index()
         
-        demo_yearly = self.demographic_df.groupby('year').agg({
-            'total_demographic_updates': 'sum',
-            'churn_rate': 'mean'
+        demographic = self.demographic_df.assign(state=self.district_states(self.demographic_df['district_id']))
+        demo = AggregationCube.from_frame(demographic, ['state', 'year'], DEMO_TREND_MEASURES).cuboid(['state', 'year'])
+        demo_partial = pd.DataFrame({
+            'total_demo_updates': demo['total_demographic_updates_sum'].astype('int64'),
+            'churn_rate_sum': demo['churn_rate_sum'],
+            'churn_rate_count': demo['churn_rate_count'].astype('int64')
         }).reset_index()
         
-        trends = yearly_stats.merge(demo_yearly, on='year')
-        trends.columns = ['year', 'avg_failure_rate', 'avg_success_rate', 
-                         'total_bio_updates', 'child_bio_updates',
-                         'total_demo_updates', 'avg_churn_rate']
+        return bio_partial, demo_partial
+    
+    @staticmethod
+    def merge_trend_partials(partials):
+        bio = pd.concat([p[0] for p in partials]).sort_values(['year', 'state'], kind='stable')
+        demo = pd.concat([p[1] for p in partials]).sort_values(['year', 'state'], kind='stable')
+        bio = bio.drop(columns='state').groupby('year').sum().reset_index()
+        demo = demo.drop(columns='state').groupby('year').sum().reset_index()
+        
+        yearly_stats = pd.DataFrame({
+            'year': bio['year'],
+            'avg_failure_rate': bio['failure_rate_sum'] / bio['failure_rate_count'],
+            'avg_success_rate': bio['success_rate_sum'] / bio['success_rate_count'],
+            'total_bio_updates': bio['total_bio_updates'],
+            'child_bio_updates': bio['child_bio_updates']
+        })
+        demo_yearly = pd.DataFrame({
+            'year': demo['year'],
+            'total_demo_updates': demo['total_demo_updates'],
+            'avg_churn_rate': demo['churn_rate_sum'] / demo['churn_rate_count']
+        })
+        
+        return yearly_stats.merge(demo_yearly, on='year')
+    
+    @instrumented(inputs=('demographic_df', 'biometric_df'))
+    def get_trend_data(self):
+        if self.merged_partials is not None:
+            trends = self.merged_partials['trends']
+        else:
+            trends = self.merge_trend_partials([self.trend_partials()])
         
         return trends.to_dict(orient='records')
     
+    def state_summary_frame(self, uls):
+        cube = AggregationCube.from_frame(uls, ['state', 'district_id'], STATE_SUMMARY_MEASURES)
+        stats = cube.stats(['state']).reset_index()
+        state_summary = pd.DataFrame({
+            'state': stats['state'],
+            'avg_uls_score': stats['uls_score_mean'],
+            'avg_auth_failure_prob': stats['auth_failure_probability_mean'],
+            'district_count': stats['rows'],
+            'avg_coverage': stats['coverage_score_mean'],
+            'avg_bio_freshness': stats['biometric_age_score_mean']
+        })
+        
+        state_summary['risk_level'] = classify_scores(state_summary['avg_uls_score'], STATE_RISK_BANDS,
+                                                      STATE_DEFAULT_RISK)
+        
+        return state_summary
+    
+    @instrumented(inputs=('uls_results',))
     def get_state_summary(self):
         if self.uls_results is None:
             self.compute_universal_lifecycle_score()
-            
-        state_summary = self.uls_results.groupby('state').agg({
-            'uls_score': 'mean',
-            'auth_failure_probability': 'mean',
-            'district_id': 'count',
-            'coverage_score': 'mean',
-            'biometric_age_score': 'mean'
-        }).reset_index()
-        
-        state_summary.columns = ['state', 'avg_uls_score', 'avg_auth_failure_prob', 
-                                 'district_count', 'avg_coverage', 'avg_bio_freshness']
         
-        state_summary['risk_level'] = state_summary['avg_uls_score'].apply(
-            lambda x: 'Low' if x >= 70 else ('Medium' if x >= 50 else 'High')
-        )
+        if self.merged_partials is not None:
+            state_summary = self.merged_partials['state_summary']
+        else:
+            state_summary = self.state_summary_frame(self.uls_results)
         
         return state_summary.round(2).to_dict(orient='records')
     
-    def export_results(self, output_path="backend/analytics/"):
+    def export_results(self, output_path="backend/analytics/", recommendations=None, write_legacy=False):
         if self.uls_results is None:
             self.compute_universal_lifecycle_score()
         
-        self.uls_results.to_csv(f"{output_path}uls_scores.csv", index=False)
+        with self.profiler.stage('export_results', len(self.uls_results)):
+            summary = self._write_results(output_path, recommendations, write_legacy)
+        self.profiler.write_report(output_path)
         
-        recommendations = self.generate_recommendations(self.uls_results)
-        with open(f"{output_path}recommendations.json", 'w') as f:
-            json.dump(recommendations, f, indent=2)
+        print(f"Results exported to {output_path}")
+        print(f"Summary: {summary}")
         
+        return summary
+    
+    def _write_results(self, output_path, recommendations, write_legacy):
+        if recommendations is None:
+            recommendations = self.generate_recommendations(self.uls_results)
         trends = self.get_trend_data()
-        with open(f"{output_path}trends.json", 'w') as f:
-            json.dump(trends, f, indent=2)
-        
         state_summary = self.get_state_summary()
-        with open(f"{output_path}state_summary.json", 'w') as f:
-            json.dump(state_summary, f, indent=2)
+        summary = self.results_summary(self.uls_results)
         
-        high_risk = self.uls_results[self.uls_results['risk_classification'] == 'High Risk']
-        high_risk_list = high_risk[['district_id', 'district_name', 'state', 'uls_score', 
-                                     'auth_failure_probability']].to_dict(orient='records')
-        with open(f"{output_path}high_risk_districts.json", 'w') as f:
-            json.dump(high_risk_list, f, indent=2)
+        parts = {
+            'uls_scores': self.uls_results,
+            'recommendations': recommendations,
+            'trends': trends,
+            'state_summary': state_summary,
+            'high_risk_districts': self.high_risk_records(self.uls_results),
+            'summary': summary
+        }
+        parts.update(build_serving_artifacts(self.uls_results, output_path, recommendations=recommendations,
+                                             state_summary=state_summary, cube=self.feed_cube))
+        self.write_result_parts(output_path, parts, write_legacy)
         
-        summary = {
-            'total_districts': len(self.uls_results),
-            'stable_count': len(self.uls_results[self.uls_results['risk_classification'] == 'Stable']),
-            'watchlist_count': len(self.uls_results[self.uls_results['risk_classification'] == 'Watchlist']),
-            'high_risk_count': len(self.uls_results[self.uls_results['risk_classification'] == 'High Risk']),
-            'avg_uls_score': round(self.uls_results['uls_score'].mean(), 2),
-            'avg_auth_failure_prob': round(self.uls_results['auth_failure_probability'].mean(), 2),
+        return summary
+    
+    def results_summary(self, uls):
+        return {
+            'total_districts': len(uls),
+            'stable_count': len(uls[uls['risk_classification'] == 'Stable']),
+            'watchlist_count': len(uls[uls['risk_classification'] == 'Watchlist']),
+            'high_risk_count': len(uls[uls['risk_classification'] == 'High Risk']),
+            'avg_uls_score': round(uls['uls_score'].mean(), 2),
+            'avg_auth_failure_prob': round(uls['auth_failure_probability'].mean(), 2),
             'generated_at': datetime.now().isoformat()
         }
-        with open(f"{output_path}summary.json", 'w') as f:
-            json.dump(summary, f, indent=2)
-        
-        print(f"Results exported to {output_path}")
-        print(f"Summary: {summary}")
+    
+    def high_risk_records(self, uls):
+        high_risk = uls[uls['risk_classification'] == 'High Risk']
+        return high_risk[['district_id', 'district_name', 'state', 'uls_score',
+                          'auth_failure_probability']].to_dict(orient='records')
+    
+    def write_result_parts(self, output_path, parts, write_legacy):
+        ExportBundle(output_path).write(parts, component='analytics')
         
-        return summary
+        if write_legacy:
+            write_csv_atomic(parts['uls_scores'], f"{output_path}uls_scores.csv")
+            for name in LEGACY_RESULT_FILES:
+                write_json_atomic(f"{output_path}{name}.json", parts[name])
 
 
 if __name__ == "__main__":
@@ -1,67 +1,44 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, classification_report, mean_squared_error, r2_score
-import joblib
 import json
-import warnings
-warnings.filterwarnings('ignore')
+from datetime import datetime
+from feature_store import get_feature_store
+from serving_artifacts import update_serving_predictions
+from export_bundle import ExportBundle, write_json_atomic, write_csv_atomic
+from tree_export import TreeEnsemblePredictor, export_tree_model, remove_tree_model
+from feature_attribution import TreeExplainer, attribution_key, attribution_frame, top_factors
+from drift_monitor import DriftMonitor
+from instrumentation import PipelineProfiler, instrumented
+from risk_levels import categorize_risk
+from lazy_imports import lazy_import
+
+# sklearn and joblib only load when a model is trained or unpickled
+sk_model_selection = lazy_import('sklearn.model_selection')
+sk_preprocessing = lazy_import('sklearn.preprocessing')
+sk_metrics = lazy_import('sklearn.metrics')
+joblib = lazy_import('joblib')
+model_selection = lazy_import('model_selection')
+
 
 class AuthFailurePredictor:
-    def __init__(self, data_path="datasets/"):
+    def __init__(self, data_path="datasets/", use_cache=True, profiler=None, backend='sklearn'):
         self.data_path = data_path
+        self.backend = backend
+        self.profiler = profiler if profiler is not None else PipelineProfiler('ml_predictor')
+        self.store = get_feature_store(data_path, use_cache)
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.feature_columns = []
+        self.selection = None
+        self.explainer = None
+        self.drift_monitor = DriftMonitor()
         
+    @instrumented()
     def prepare_features(self):
-        enrolment = pd.read_csv(f"{self.data_path}aadhaar_enrolment_data.csv")
-        demographic = pd.read_csv(f"{self.data_path}demographic_update_logs.csv")
-        biometric = pd.read_csv(f"{self.data_path}biometric_update_records.csv")
-        
-        latest_demo = demographic[demographic['year'] == demographic['year'].max()]
-        latest_bio = biometric[biometric['year'] == biometric['year'].max()]
-        
-        demo_agg = demographic.groupby('district_id').agg({
-            'total_demographic_updates': ['mean', 'std', 'max'],
-            'churn_rate': 'mean',
-            'update_spike_detected': 'sum'
-        }).reset_index()
-        demo_agg.columns = ['district_id', 'demo_update_mean', 'demo_update_std', 
-                           'demo_update_max', 'avg_churn_rate', 'total_spikes']
-        
-        bio_agg = biometric.groupby('district_id').agg({
-            'avg_biometric_age_days': 'mean',
-            'biometric_failure_rate': 'mean',
-            'child_refresh_gap_months': 'mean',
-            'anomaly_detected': 'sum'
-        }).reset_index()
-        bio_agg.columns = ['district_id', 'avg_bio_age', 'avg_failure_rate', 
-                          'avg_child_gap', 'total_anomalies']
-        
-        features = enrolment[['district_id', 'coverage_ratio', 'rejection_rate', 
-                              'child_enrolments', 'adult_enrolments']].copy()
-        features['child_ratio'] = features['child_enrolments'] / (features['child_enrolments'] + features['adult_enrolments'])
-        
-        features = features.merge(demo_agg, on='district_id')
-        features = features.merge(bio_agg, on='district_id')
-        latest_bio_subset = latest_bio[['district_id', 'biometric_failure_rate']].copy()
-        latest_bio_subset.columns = ['district_id', 'biometric_failure_rate_current']
-        features = features.merge(latest_bio_subset, on='district_id')
-        
-        features['auth_failure_prob'] = features['biometric_failure_rate_current'] * 100
-        
-        features['demo_volatility'] = features['demo_update_std'] / features['demo_update_mean'].replace(0, 1)
-        features['bio_age_normalized'] = features['avg_bio_age'] / 2500
-        features['spike_rate'] = features['total_spikes'] / 6
-        features['anomaly_rate'] = features['total_anomalies'] / 6
-        
-        return features
+        return self.store.district_features()
     
-    def train_model(self, model_type='random_forest'):
+    @instrumented()
+    def train_model(self, model_type='gradient_boosting'):
         features = self.prepare_features()
         
         self.feature_columns = [
@@ -74,86 +51,146 @@ class AuthFailurePredictor:
         X = features[self.feature_columns].fillna(0)
         y = features['auth_failure_prob']
         
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = sk_model_selection.train_test_split(X, y, test_size=0.2,
+                                                                               random_state=42)
         
+        self.scaler = sk_preprocessing.StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
-        if model_type == 'random_forest':
-            self.model = GradientBoostingRegressor(
-                n_estimators=100,
-                max_depth=6,
-                learning_rate=0.1,
-                random_state=42
-            )
+        if model_type == 'search':
+            selector = model_selection.ModelSelector()
+            self.model = selector.fit(X_train_scaled, y_train)
+            self.selection = selector.summary()
         else:
-            self.model = GradientBoostingRegressor(
-                n_estimators=50,
-                max_depth=4,
-                random_state=42
-            )
-        
-        self.model.fit(X_train_scaled, y_train)
+            self.model = model_selection.build_estimator(model_type)
+            self.model.fit(X_train_scaled, y_train)
+            self.selection = None
         
         y_pred = self.model.predict(X_test_scaled)
+        train_pred = np.clip(self.model.predict(X_train_scaled), 0, 100).round(2)
+        self.drift_monitor.fit_reference(self.feature_columns, X_train, train_pred)
         
-        mse = mean_squared_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-        
-        feature_importance = dict(zip(self.feature_columns, 
-                                      self.model.feature_importances_.tolist()))
+        mse = sk_metrics.mean_squared_error(y_test, y_pred)
+        r2 = sk_metrics.r2_score(y_test, y_pred)
         
         metrics = {
             'mse': round(mse, 4),
             'rmse': round(np.sqrt(mse), 4),
             'r2_score': round(r2, 4),
             'model_type': model_type,
-            'feature_importance': feature_importance
+            'feature_importance': model_selection.feature_importance(self.model, self.feature_columns)
         }
+        if self.selection is not None:
+            metrics['selection'] = self.selection
         
         print(f"Model trained successfully!")
         print(f"RMSE: {metrics['rmse']}")
         print(f"R2 Score: {metrics['r2_score']}")
+        if self.selection is not None:
+            print(f"Selected {self.selection['estimator']} {self.selection['params']} "
+                  f"(CV RMSE: {self.selection['cv_metrics']['rmse_mean']})")
         
         return metrics
     
-    def predict_all_districts(self):
-        features = self.prepare_features()
-        X = features[self.feature_columns].fillna(0)
+    def predict_features(self, X):
+        if self.backend == 'numpy':
+            predictions = self.model.predict(np.asarray(X, dtype=float))
+            return np.clip(predictions, 0, 100)
+        
+        if isinstance(X, np.ndarray) and hasattr(self.scaler, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=self.feature_columns)
         X_scaled = self.scaler.transform(X)
         
         predictions = self.model.predict(X_scaled)
-        predictions = np.clip(predictions, 0, 100)
+        return np.clip(predictions, 0, 100)
+    
+    @instrumented()
+    def predict_all_districts(self):
+        features = self.prepare_features()
+        X = features[self.feature_columns].fillna(0)
+        predictions = self.predict_features(X)
         
         results = features[['district_id']].copy()
         results['predicted_auth_failure_prob'] = predictions.round(2)
         results['actual_auth_failure_prob'] = features['auth_failure_prob'].round(2)
-        
-        def risk_category(prob):
-            if prob < 5:
-                return 'Low Risk'
-            elif prob < 15:
-                return 'Medium Risk'
-            else:
-                return 'High Risk'
-        
-        results['risk_category'] = results['predicted_auth_failure_prob'].apply(risk_category)
+        results['risk_category'] = categorize_risk(results['predicted_auth_failure_prob'])
         
         return results
     
+    def tree_explainer(self):
+        if self.explainer is None:
+            if self.backend == 'numpy':
+                self.explainer = TreeExplainer.from_predictor(self.model)
+            else:
+                self.explainer = TreeExplainer.from_model(self.model, self.scaler, self.feature_columns)
+        return self.explainer
+    
+    @instrumented()
+    def explain_all_districts(self):
+        features = self.prepare_features()
+        X = features[self.feature_columns].fillna(0).to_numpy(dtype=np.float64)
+        explainer = self.tree_explainer()
+        
+        # Attributions only change with the model or the feature snapshot, so both key the cache
+        key = attribution_key(explainer, X)
+        if self.store.cache is not None:
+            cached = self.store.cache.read_frame('feature_attributions', key)
+            if cached is not None:
+                return cached
+        
+        attributions = attribution_frame(features['district_id'], X, explainer.explain(X), explainer)
+        if self.store.cache is not None:
+            self.store.cache.write_frame(attributions, 'feature_attributions', key)
+        return attributions
+    
+    @instrumented()
+    def monitor_drift(self, predictions):
+        if self.drift_monitor.reference is None:
+            return None, None
+        features = self.prepare_features()
+        X = features[self.feature_columns].fillna(0)
+        current = self.drift_monitor.sketch(X, predictions['predicted_auth_failure_prob'])
+        return current, self.drift_monitor.compare(current)
+    
     def save_model(self, output_path="backend/analytics/"):
+        self.explainer = None
         joblib.dump(self.model, f"{output_path}auth_failure_model.joblib")
         joblib.dump(self.scaler, f"{output_path}feature_scaler.joblib")
         
+        model_version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        config = {
+            'feature_columns': self.feature_columns,
+            'model_type': type(self.model).__name__,
+            'model_version': model_version
+        }
+        if self.selection is not None:
+            config['selection'] = self.selection
         with open(f"{output_path}model_config.json", 'w') as f:
-            json.dump({
-                'feature_columns': self.feature_columns,
-                'model_type': 'GradientBoostingRegressor'
-            }, f, indent=2)
+            json.dump(config, f, indent=2)
+        if self.drift_monitor.reference is not None:
+            self.drift_monitor.save_reference(output_path)
+        
+        try:
+            export_tree_model(self.model, self.scaler, self.feature_columns, output_path, model_version)
+        except ValueError as error:
+            # A tree export left from an earlier model would otherwise keep serving its predictions
+            remove_tree_model(output_path)
+            print(f"Skipping NumPy tree export: {error}")
         
         print(f"Model saved to {output_path}")
     
-    def load_model(self, model_path="backend/analytics/"):
+    @instrumented()
+    def load_model(self, model_path="backend/analytics/", verbose=True):
+        self.explainer = None
+        self.drift_monitor.load_reference(model_path)
+        if self.backend == 'numpy':
+            self.model = TreeEnsemblePredictor.load(model_path)
+            self.feature_columns = self.model.feature_columns
+            if verbose:
+                print("Tree model loaded successfully!")
+            return
+        
         self.model = joblib.load(f"{model_path}auth_failure_model.joblib")
         self.scaler = joblib.load(f"{model_path}feature_scaler.joblib")
         
@@ -161,27 +198,41 @@ class AuthFailurePredictor:
             config = json.load(f)
             self.feature_columns = config['feature_columns']
         
-        print("Model loaded successfully!")
+        if verbose:
+            print("Model loaded successfully!")
     
-    def export_predictions(self, output_path="backend/analytics/"):
+    def export_predictions(self, output_path="backend/analytics/", write_legacy=False):
         predictions = self.predict_all_districts()
+        try:
+            attributions = self.explain_all_districts()
+        except ValueError as error:
+            print(f"Skipping feature attributions: {error}")
+            attributions = None
+        sketch, drift = self.monitor_drift(predictions)
+        
+        with self.profiler.stage('export_predictions', len(predictions)):
+            summary = self._write_predictions(predictions, output_path, write_legacy, attributions, drift)
+        if drift is not None:
+            self.drift_monitor.record_run(sketch, output_path)
+            if write_legacy:
+                self.drift_monitor.write_report(drift, output_path)
+        self.profiler.write_report(output_path)
+        
+        print(f"Predictions exported to {output_path}")
+        print(f"Summary: {summary}")
         
-        enrolment = pd.read_csv(f"{self.data_path}aadhaar_enrolment_data.csv")
+        return summary
+    
+    def _write_predictions(self, predictions, output_path, write_legacy, attributions=None, drift=None):
+        enrolment = self.store.dataset('enrolment')
         predictions = predictions.merge(
             enrolment[['district_id', 'district_name', 'state']], 
             on='district_id'
         )
         
-        predictions.to_csv(f"{output_path}ml_predictions.csv", index=False)
-        
         predictions_json = predictions.to_dict(orient='records')
-        with open(f"{output_path}ml_predictions.json", 'w') as f:
-            json.dump(predictions_json, f, indent=2)
-        
         high_risk = predictions[predictions['risk_category'] == 'High Risk']
         high_risk_json = high_risk.to_dict(orient='records')
-        with open(f"{output_path}high_risk_predictions.json", 'w') as f:
-            json.dump(high_risk_json, f, indent=2)
         
         summary = {
             'total_districts': len(predictions),
@@ -192,11 +243,31 @@ class AuthFailurePredictor:
             'max_predicted_failure_prob': round(predictions['predicted_auth_failure_prob'].max(), 2)
         }
         
-        with open(f"{output_path}prediction_summary.json", 'w') as f:
-            json.dump(summary, f, indent=2)
-        
-        print(f"Predictions exported to {output_path}")
-        print(f"Summary: {summary}")
+        parts = {
+            'ml_predictions': predictions,
+            'high_risk_predictions': high_risk_json,
+            'prediction_summary': summary
+        }
+        explanations = None
+        if attributions is not None:
+            features = self.prepare_features().set_index('district_id')
+            features = features.reindex(attributions['district_id'])[self.feature_columns].fillna(0)
+            explanations = top_factors(attributions, features)
+            parts['feature_attributions'] = attributions
+            parts['prediction_explanations'] = explanations
+        if drift is not None:
+            parts['drift_report'] = drift
+        parts.update(update_serving_predictions(predictions_json, output_path, explanations))
+        ExportBundle(output_path).write(parts, component='predictions')
+        
+        if write_legacy:
+            write_csv_atomic(predictions, f"{output_path}ml_predictions.csv")
+            write_json_atomic(f"{output_path}ml_predictions.json", predictions_json)
+            write_json_atomic(f"{output_path}high_risk_predictions.json", high_risk_json)
+            write_json_atomic(f"{output_path}prediction_summary.json", summary)
+            if attributions is not None:
+                write_csv_atomic(attributions, f"{output_path}feature_attributions.csv")
+                write_json_atomic(f"{output_path}prediction_explanations.json", explanations)
         
         return summary
 
@@ -205,7 +276,7 @@ if __name__ == "__main__":
     predictor = AuthFailurePredictor()
     
     print("Training ML model...")
-    metrics = predictor.train_model('random_forest')
+    metrics = predictor.train_model()
     
     print("\nSaving model...")
     predictor.save_model()
@@ -0,0 +1,127 @@
+import pandas as pd
+import numpy as np
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV, KFold, cross_validate
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+
+def build_estimator(model_type, random_state=42):
+    if model_type == 'gradient_boosting':
+        return GradientBoostingRegressor(n_estimators=100, max_depth=6, learning_rate=0.1,
+                                         random_state=random_state)
+    if model_type == 'hist_gradient_boosting':
+        return HistGradientBoostingRegressor(max_iter=500, learning_rate=0.1, early_stopping=True,
+                                             validation_fraction=0.1, n_iter_no_change=10,
+                                             random_state=random_state)
+    if model_type == 'random_forest':
+        return RandomForestRegressor(n_estimators=200, min_samples_leaf=2, n_jobs=-1,
+                                     random_state=random_state)
+    if model_type == 'ridge':
+        return Ridge(alpha=1.0)
+    raise ValueError(f"Unknown model_type: {model_type}")
+
+
+def search_space(random_state=42):
+    return [
+        {
+            'model': [GradientBoostingRegressor(n_iter_no_change=10, validation_fraction=0.1,
+                                                random_state=random_state)],
+            'model__n_estimators': [100, 300],
+            'model__max_depth': [3, 4, 6],
+            'model__learning_rate': [0.05, 0.1]
+        },
+        {
+            'model': [HistGradientBoostingRegressor(early_stopping=True, validation_fraction=0.1,
+                                                    n_iter_no_change=10, random_state=random_state)],
+            'model__max_iter': [200, 500],
+            'model__learning_rate': [0.05, 0.1],
+            'model__max_leaf_nodes': [15, 31]
+        },
+        {
+            'model': [RandomForestRegressor(n_estimators=200, random_state=random_state)],
+            'model__max_depth': [None, 8],
+            'model__min_samples_leaf': [1, 5]
+        },
+        {
+            'model': [Ridge()],
+            'model__alpha': [0.1, 1.0, 10.0]
+        }
+    ]
+
+
+def feature_importance(model, feature_columns):
+    importances = getattr(model, 'feature_importances_', None)
+    if importances is None and hasattr(model, 'coef_'):
+        coefficients = np.abs(np.ravel(model.coef_))
+        importances = coefficients / coefficients.sum() if coefficients.sum() else coefficients
+    if importances is None:
+        return {}
+    return dict(zip(feature_columns, np.asarray(importances, dtype=float).tolist()))
+
+
+def describe_params(params):
+    described = {}
+    for key, value in params.items():
+        name = key.replace('model__', '')
+        described[name] = type(value).__name__ if key == 'model' else value
+    return described
+
+
+class ModelSelector:
+    def __init__(self, param_grid=None, n_splits=5, factor=3, min_resources=100, n_jobs=-1,
+                 random_state=42):
+        self.param_grid = param_grid if param_grid is not None else search_space(random_state)
+        self.n_splits = n_splits
+        self.factor = factor
+        self.min_resources = min_resources
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.search = None
+        self.cv_metrics = None
+
+    def fit(self, X, y):
+        cv = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        self.search = HalvingGridSearchCV(
+            Pipeline([('model', GradientBoostingRegressor())]),
+            self.param_grid,
+            factor=self.factor,
+            min_resources=min(self.min_resources, len(X)),
+            cv=cv,
+            scoring='neg_root_mean_squared_error',
+            n_jobs=self.n_jobs,
+            random_state=self.random_state
+        )
+        self.search.fit(X, y)
+
+        best = self.search.best_estimator_.named_steps['model']
+        scores = cross_validate(best, X, y, cv=cv, n_jobs=self.n_jobs,
+                                scoring={'rmse': 'neg_root_mean_squared_error', 'r2': 'r2'})
+        self.cv_metrics = {
+            'n_splits': self.n_splits,
+            'rmse_mean': round(float(-scores['test_rmse'].mean()), 4),
+            'rmse_std': round(float(scores['test_rmse'].std()), 4),
+            'r2_mean': round(float(scores['test_r2'].mean()), 4),
+            'r2_std': round(float(scores['test_r2'].std()), 4)
+        }
+        return best
+
+    def summary(self, top=5):
+        results = pd.DataFrame(self.search.cv_results_)
+        final = results[results['iter'] == results['iter'].max()]
+        final = final.sort_values('rank_test_score', kind='stable').head(top)
+        return {
+            'estimator': type(self.search.best_estimator_.named_steps['model']).__name__,
+            'params': describe_params(self.search.best_params_),
+            'cv_metrics': self.cv_metrics,
+            'n_candidates': int(self.search.n_candidates_[0]),
+            'n_iterations': int(self.search.n_iterations_),
+            'n_resources': [int(n) for n in self.search.n_resources_],
+            'leaderboard': [
+                {'params': describe_params(row['params']),
+                 'rmse': round(float(-row['mean_test_score']), 4),
+                 'n_resources': int(row['n_resources'])}
+                for _, row in final.iterrows()
+            ]
+        }
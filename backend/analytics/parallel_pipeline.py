@@ -0,0 +1,140 @@
+import pandas as pd
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from lifecycle_analytics import LifecycleAnalytics
+
+
+def partition_by_state(analytics):
+    enrolment = analytics.enrolment_df
+    enrolment_states = enrolment['state'].astype(str).to_numpy()
+    demo_states = analytics.district_states(analytics.demographic_df['district_id']).to_numpy()
+    bio_states = analytics.district_states(analytics.biometric_df['district_id']).to_numpy()
+
+    # Workers rebuild their own LifecycleAnalytics, so scoring settings travel with each partition
+    settings = {
+        'uls_weights': dict(analytics.uls_weights),
+        'risk_bands': list(analytics.risk_bands),
+        'pincode_anomaly_weight': analytics.pincode_anomaly_weight
+    }
+    latest_years = {
+        'demographic': analytics.demographic_df['year'].max(),
+        'biometric': analytics.biometric_df['year'].max()
+    }
+
+    for state in sorted(set(enrolment_states) | set(demo_states) | set(bio_states)):
+        positions = np.flatnonzero(enrolment_states == state)
+        yield {
+            'state': state,
+            'positions': positions,
+            'enrolment': enrolment.iloc[positions],
+            'demographic': analytics.demographic_df[demo_states == state],
+            'biometric': analytics.biometric_df[bio_states == state],
+            'latest_years': latest_years,
+            'settings': settings,
+            'pincode_anomalies': analytics.pincode_anomalies
+        }
+
+
+def score_partition(partition):
+    settings = partition['settings']
+    analytics = LifecycleAnalytics(use_cache=False, uls_weights=settings['uls_weights'],
+                                   risk_bands=settings['risk_bands'])
+    analytics.pincode_anomaly_weight = settings['pincode_anomaly_weight']
+    analytics.enrolment_df = partition['enrolment']
+    analytics.demographic_df = partition['demographic']
+    analytics.biometric_df = partition['biometric']
+    analytics.latest_years = partition['latest_years']
+    analytics.pincode_anomalies = partition['pincode_anomalies']
+
+    result = {
+        'state': partition['state'],
+        'positions': partition['positions'],
+        'uls': None,
+        'state_summary': None,
+        'trends': analytics.trend_partials()
+    }
+    if len(partition['enrolment']):
+        uls = analytics.compute_universal_lifecycle_score()
+        result['uls'] = uls
+        result['state_summary'] = analytics.state_summary_frame(uls)
+    return result
+
+
+class ParallelPipeline:
+    def __init__(self, analytics, workers=None):
+        self.analytics = analytics
+        self.workers = workers or os.cpu_count()
+
+    def run(self):
+        partitions = list(partition_by_state(self.analytics))
+
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(score_partition, partitions))
+        else:
+            results = [score_partition(p) for p in partitions]
+
+        scored = [r for r in results if r['uls'] is not None]
+        positions = np.concatenate([r['positions'] for r in scored])
+        uls = pd.concat([r['uls'] for r in scored], ignore_index=True)
+        uls = uls.iloc[np.argsort(positions, kind='stable')].reset_index(drop=True)
+
+        state_summary = pd.concat([r['state_summary'] for r in scored], ignore_index=True)
+        trends = LifecycleAnalytics.merge_trend_partials([r['trends'] for r in results])
+
+        self.analytics.uls_results = uls
+        self.analytics.merged_partials = {'state_summary': state_summary, 'trends': trends}
+        print(f"Scored {len(uls)} districts across {len(partitions)} state partitions "
+              f"with {self.workers} workers")
+        return uls
+
+
+def check_parity(analytics, workers=2, tolerance=1e-9):
+    # Scores the same analytics serially and across workers and reports the largest disagreement
+    serial = analytics.compute_universal_lifecycle_score().copy()
+    serial_summary = analytics.state_summary_frame(serial)
+    parallel = ParallelPipeline(analytics, workers).run()
+    parallel_summary = analytics.merged_partials['state_summary']
+
+    numeric = serial.select_dtypes('number').columns
+    uls_diff = float(np.nanmax(np.abs(serial[numeric].to_numpy(dtype=np.float64) -
+                                      parallel[numeric].to_numpy(dtype=np.float64)), initial=0))
+    serial_summary = serial_summary.set_index('state').sort_index()
+    parallel_summary = parallel_summary.set_index('state').sort_index()
+    summary_numeric = serial_summary.select_dtypes('number').columns
+    summary_diff = float(np.nanmax(np.abs(serial_summary[summary_numeric].to_numpy(dtype=np.float64) -
+                                          parallel_summary[summary_numeric].to_numpy(dtype=np.float64)), initial=0))
+    report = {
+        'max_uls_difference': uls_diff,
+        'max_state_summary_difference': summary_diff,
+        'risk_mismatches': int((serial['risk_classification'].to_numpy() !=
+                                parallel['risk_classification'].to_numpy()).sum()),
+        'state_risk_mismatches': int((serial_summary['risk_level'].to_numpy() !=
+                                      parallel_summary['risk_level'].to_numpy()).sum())
+    }
+    report['match'] = (uls_diff <= tolerance and summary_diff <= tolerance and
+                       report['risk_mismatches'] == 0 and report['state_risk_mismatches'] == 0)
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    if '--check-parity' in sys.argv:
+        # Non-default weights and bands catch settings that fail to reach the workers
+        analytics = LifecycleAnalytics(uls_weights={'coverage_score': 0.4, 'demographic_volatility': 0.05,
+                                                    'biometric_age_score': 0.3,
+                                                    'child_vulnerability_score': 0.15, 'anomaly_score': 0.1},
+                                       risk_bands=[(75, 'Stable'), (55, 'Watchlist')])
+        analytics.load_data()
+        analytics.pincode_anomaly_weight = 0.3
+        report = check_parity(analytics)
+        print(report)
+        if not report['match']:
+            raise SystemExit("Parallel and serial scoring disagree")
+    else:
+        analytics = LifecycleAnalytics()
+        analytics.load_data()
+
+        ParallelPipeline(analytics).run()
+        summary = analytics.export_results()
@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ingestion import ShardIngestor, RAW_FEEDS
+from district_index import DistrictIndex
+
+MAD_SCALE = 1.4826
+
+
+def parse_days(dates):
+    parsed = pd.to_datetime(dates, format='%d-%m-%Y', errors='coerce')
+    return parsed.to_numpy().astype('datetime64[D]').astype('int64')
+
+
+def group_starts(keys):
+    # keys must be sorted; returns, for every row, the position where its group begins
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    lengths = np.diff(np.r_[boundaries, len(keys)])
+    return np.repeat(boundaries, lengths)
+
+
+def reduce_daily_partials(partials, locations):
+    series = pd.concat(partials).groupby(level=['pincode', 'day']).sum()
+    return [series], [pd.concat(locations).drop_duplicates('pincode', keep='last')]
+
+
+def daily_pincode_series(chunks, feed='demographic', max_partials=32):
+    measures = RAW_FEEDS[feed]['measures']
+    partials = []
+    locations = []
+    for chunk in chunks:
+        chunk = chunk.assign(day=parse_days(chunk['date']),
+                             count=chunk[measures].sum(axis=1).astype('int64'))
+        chunk = chunk[chunk['day'] >= 0]
+        partials.append(chunk.groupby(['pincode', 'day'], observed=True)['count'].sum())
+        locations.append(chunk.drop_duplicates('pincode', keep='last')[['pincode', 'state', 'district']])
+
+        # Bounded like the ingestion rollups: memory tracks distinct (pincode, day) pairs, not chunks read
+        if len(partials) >= max_partials:
+            partials, locations = reduce_daily_partials(partials, locations)
+
+    if not partials:
+        return (pd.DataFrame(columns=['pincode', 'day', 'count']),
+                pd.DataFrame(columns=['pincode', 'state', 'district']))
+
+    partials, locations = reduce_daily_partials(partials, locations)
+    series = partials[0].reset_index()
+    locations = locations[0]
+    locations[['state', 'district']] = locations[['state', 'district']].astype(str)
+    return series.sort_values(['pincode', 'day'], kind='stable').reset_index(drop=True), locations
+
+
+def sorted_median(windows, counts):
+    # windows are sorted row-wise with the first `counts` entries valid
+    lower = np.take_along_axis(windows, np.maximum((counts - 1) // 2, 0)[:, None], axis=1)[:, 0]
+    upper = np.take_along_axis(windows, np.maximum(counts // 2, 0)[:, None], axis=1)[:, 0]
+    return np.where(counts > 0, (lower + upper) / 2, np.nan)
+
+
+class PincodeAnomalyDetector:
+    def __init__(self, window=28, min_periods=7, threshold=6.0, min_count=10, method='mad',
+                 alpha=0.1, block_rows=250000, share_scale=200):
+        if method not in ('mad', 'ewma'):
+            raise ValueError(f"Unknown method: {method}")
+        self.window = window
+        self.min_periods = min_periods
+        self.threshold = threshold
+        self.min_count = min_count
+        self.method = method
+        self.alpha = alpha
+        self.block_rows = block_rows
+        self.share_scale = share_scale
+
+    def daily_series(self, ingestor, feed='demographic', directory=None):
+        return daily_pincode_series(ingestor.iter_chunks(feed, directory), feed, ingestor.max_partials)
+
+    def _mad_baseline(self, values, starts):
+        n = len(values)
+        baseline = np.full(n, np.nan)
+        spread = np.full(n, np.nan)
+        offsets = np.arange(self.window)
+
+        for start in range(0, n, self.block_rows):
+            stop = min(start + self.block_rows, n)
+            context = max(0, start - self.window)
+            padded = np.concatenate([np.full(self.window, np.inf), values[context:stop]])
+            rows = np.arange(start, stop)
+            # Row i sees the previous `window` observations of its own pincode only; anything
+            # else becomes +inf so a row-wise sort pushes it past the valid entries
+            windows = sliding_window_view(padded, self.window)[start - context:stop - context]
+            first_valid = (starts[rows] - rows + self.window)[:, None]
+            windows = np.sort(np.where(offsets[None, :] >= first_valid, windows, np.inf), axis=1)
+
+            valid = np.minimum(rows - starts[rows], self.window)
+            median = sorted_median(windows, valid)
+            deviations = np.sort(np.abs(windows - median[:, None]), axis=1)
+            baseline[start:stop] = median
+            spread[start:stop] = sorted_median(deviations, valid) * MAD_SCALE
+
+        return baseline, spread
+
+    def _ewma_baseline(self, values, keys, starts):
+        grouped = pd.Series(values).groupby(keys, sort=True).ewm(alpha=self.alpha)
+        mean = grouped.mean().to_numpy()
+        std = grouped.std().to_numpy()
+        # Shift by one row within each pincode so a day never contributes to its own baseline
+        first = np.arange(len(values)) == starts
+        baseline = np.where(first, np.nan, np.r_[np.nan, mean[:-1]])
+        spread = np.where(first, np.nan, np.r_[np.nan, std[:-1]])
+        return baseline, spread
+
+    def score(self, series):
+        keys = series['pincode'].to_numpy()
+        values = series['count'].to_numpy(dtype=np.float64)
+        starts = group_starts(keys)
+
+        if self.method == 'mad':
+            baseline, spread = self._mad_baseline(values, starts)
+        else:
+            baseline, spread = self._ewma_baseline(values, keys, starts)
+
+        # Poisson floor keeps flat low-volume pincodes from producing infinite scores
+        spread = np.fmax(spread, np.sqrt(np.fmax(baseline, 1.0)))
+        history = np.arange(len(values)) - starts
+        z_score = (values - baseline) / spread
+
+        scored = series.copy()
+        scored['baseline'] = baseline
+        scored['z_score'] = z_score
+        scored['spike'] = ((history >= self.min_periods) & (values >= self.min_count) &
+                           (z_score > self.threshold))
+        return scored
+
+    def rollup(self, scored, locations, index):
+        per_pincode = scored.groupby('pincode').agg(
+            days=('day', 'size'),
+            spike_days=('spike', 'sum'),
+            max_z_score=('z_score', 'max')
+        ).reset_index()
+        per_pincode = per_pincode.merge(locations, on='pincode', how='left')
+        per_pincode['flagged'] = per_pincode['spike_days'] > 0
+        per_pincode = index.assign(per_pincode, 'days')
+
+        districts = per_pincode.groupby('district_id', observed=True).agg(
+            state=('state', 'first'),
+            district=('district', 'first'),
+            pincode_count=('pincode', 'size'),
+            flagged_pincodes=('flagged', 'sum'),
+            spike_days=('spike_days', 'sum'),
+            observed_days=('days', 'sum'),
+            max_z_score=('max_z_score', 'max')
+        ).reset_index()
+        districts['district_id'] = districts['district_id'].astype(str)
+        share = districts['flagged_pincodes'] / districts['pincode_count']
+        districts['pincode_anomaly_score'] = (share * self.share_scale).clip(0, 100).round(2)
+        return districts
+
+    def detect(self, ingestor, enrolment, feed='demographic', directory=None, index=None):
+        if index is None:
+            index = DistrictIndex.from_frame(enrolment)
+        series, locations = self.daily_series(ingestor, feed, directory)
+        scored = self.score(series)
+        matched = self.rollup(scored, locations, index)
+        print(f"Scanned {len(series)} pincode-days across {series['pincode'].nunique()} pincodes, "
+              f"{int(scored['spike'].sum())} spikes, {len(matched)} districts matched")
+        return matched
+
+if __name__ == "__main__":
+    from lifecycle_analytics import LifecycleAnalytics
+    analytics = LifecycleAnalytics()
+    analytics.load_data()
+    anomalies = analytics.detect_pincode_anomalies()
+    print(anomalies.sort_values('pincode_anomaly_score', ascending=False).head(10))
@@ -0,0 +1,132 @@
+import numpy as np
+import json
+
+OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+
+DEFAULT_RULES = [
+    {
+        'type': 'BIOMETRIC_CAMP',
+        'priority': 'HIGH',
+        'action': 'Organize district-level biometric update camps',
+        'reason': 'High biometric ageing detected (avg age: {avg_biometric_age_days:.0f} days)',
+        'conditions': [{'column': 'biometric_age_score', 'op': '<', 'value': 50}]
+    },
+    {
+        'type': 'AWARENESS_DRIVE',
+        'priority': 'MEDIUM',
+        'action': 'Launch demographic data correction awareness campaign',
+        'reason': 'High demographic churn rate ({demographic_volatility:.1f}%)',
+        'conditions': [{'column': 'demographic_volatility', 'op': '>', 'value': 20}]
+    },
+    {
+        'type': 'SCHOOL_INITIATIVE',
+        'priority': 'HIGH',
+        'action': 'Initiate school-based Aadhaar update program for children',
+        'reason': 'Child biometric refresh gap: {child_refresh_gap_months:.0f} months',
+        'conditions': [{'column': 'child_vulnerability_score', 'op': '>', 'value': 60}]
+    },
+    {
+        'type': 'FRAUD_AUDIT',
+        'priority': 'CRITICAL',
+        'action': 'Flag for fraud investigation and detailed audit',
+        'reason': 'Abnormal update spike or anomaly pattern detected',
+        'match': 'any',
+        'conditions': [
+            {'column': 'spike_flag', 'op': '==', 'value': 1},
+            {'column': 'anomaly_score', 'op': '>', 'value': 50}
+        ]
+    },
+    {
+        'type': 'ENROLMENT_DRIVE',
+        'priority': 'MEDIUM',
+        'action': 'Conduct special enrolment drive in low-coverage areas',
+        'reason': 'Coverage ratio below target ({coverage_score:.1f}%)',
+        'conditions': [{'column': 'coverage_score', 'op': '<', 'value': 85}]
+    },
+    {
+        'type': 'MONITORING',
+        'priority': 'LOW',
+        'action': 'Continue regular monitoring',
+        'reason': 'District lifecycle health is stable',
+        'fallback': True
+    }
+]
+
+DISTRICT_FIELDS = ['district_id', 'district_name', 'state', 'uls_score', 'risk_classification']
+
+
+def load_rules(rules_path=None):
+    if rules_path is None:
+        return DEFAULT_RULES
+    with open(rules_path, 'r') as f:
+        return json.load(f)
+
+
+class RecommendationEngine:
+    def __init__(self, rules=None, rules_path=None):
+        self.rules = rules if rules is not None else load_rules(rules_path)
+        for rule in self.rules:
+            for condition in rule.get('conditions', []):
+                if condition['op'] not in OPERATORS:
+                    raise ValueError(f"Unsupported operator in rule {rule['type']}: {condition['op']}")
+
+    def condition_mask(self, df, condition):
+        values = df[condition['column']].to_numpy(dtype=float, na_value=np.nan)
+        return OPERATORS[condition['op']](values, condition['value'])
+
+    def evaluate(self, df):
+        masks = np.zeros((len(df), len(self.rules)), dtype=bool)
+
+        for i, rule in enumerate(self.rules):
+            if rule.get('fallback'):
+                continue
+            condition_masks = [self.condition_mask(df, c) for c in rule['conditions']]
+            if rule.get('match', 'all') == 'any':
+                masks[:, i] = np.logical_or.reduce(condition_masks)
+            else:
+                masks[:, i] = np.logical_and.reduce(condition_masks)
+
+        matched_any = masks.any(axis=1)
+        for i, rule in enumerate(self.rules):
+            if rule.get('fallback'):
+                masks[:, i] = ~matched_any
+
+        return masks
+
+    def _reasons(self, df, rule, rows):
+        template = rule['reason']
+        columns = [c for c in df.columns if '{' + c in template]
+        if not columns:
+            return [template] * len(rows)
+        values = {c: df[c].to_numpy()[rows].tolist() for c in columns}
+        return [template.format(**{c: values[c][k] for c in columns}) for k in range(len(rows))]
+
+    def generate(self, df):
+        masks = self.evaluate(df)
+
+        district_recs = [[] for _ in range(len(df))]
+        for i, rule in enumerate(self.rules):
+            rows = np.flatnonzero(masks[:, i])
+            if not len(rows):
+                continue
+            reasons = self._reasons(df, rule, rows)
+            for row, reason in zip(rows.tolist(), reasons):
+                district_recs[row].append({
+                    'type': rule['type'],
+                    'priority': rule['priority'],
+                    'action': rule['action'],
+                    'reason': reason
+                })
+
+        fields = {field: df[field].tolist() for field in DISTRICT_FIELDS}
+        return [
+            {**{field: fields[field][row] for field in DISTRICT_FIELDS}, 'recommendations': recs}
+            for row, recs in enumerate(district_recs)
+        ]
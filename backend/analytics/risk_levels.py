@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def categorize_risk(probabilities):
+    probabilities = np.asarray(probabilities, dtype=float)
+    return np.select([probabilities < 5, probabilities < 15],
+                     ['Low Risk', 'Medium Risk'], default='High Risk')
+
+
+# Component weights for the Universal Lifecycle Score; inverted components count against the score
+ULS_WEIGHTS = {
+    'coverage_score': 0.30,
+    'demographic_volatility': 0.15,
+    'biometric_age_score': 0.25,
+    'child_vulnerability_score': 0.15,
+    'anomaly_score': 0.15
+}
+INVERTED_COMPONENTS = {'demographic_volatility', 'child_vulnerability_score', 'anomaly_score'}
+
+# Bands are (minimum score, label), checked from the top; scores below every band get the default
+ULS_RISK_BANDS = [(70, 'Stable'), (50, 'Watchlist')]
+ULS_DEFAULT_RISK = 'High Risk'
+STATE_RISK_BANDS = [(70, 'Low'), (50, 'Medium')]
+STATE_DEFAULT_RISK = 'High'
+
+
+def weighted_uls_score(components, weights=ULS_WEIGHTS):
+    unknown = [column for column in weights if column not in components]
+    if unknown:
+        raise ValueError(f"Missing ULS components: {unknown}")
+    score = None
+    for column, weight in weights.items():
+        values = components[column]
+        term = ((100 - values) if column in INVERTED_COMPONENTS else values) * weight
+        score = term if score is None else score + term
+    return score
+
+
+def classify_scores(scores, bands=ULS_RISK_BANDS, default=ULS_DEFAULT_RISK):
+    scores = np.asarray(scores, dtype=float)
+    bands = sorted(bands, key=lambda band: band[0], reverse=True)
+    return np.select([scores >= threshold for threshold, _ in bands],
+                     [label for _, label in bands], default=default)
@@ -0,0 +1,220 @@
+import pandas as pd
+import numpy as np
+import itertools
+import json
+from lifecycle_analytics import (coverage_score, demographic_volatility, biometric_age_score,
+                                 child_vulnerability_score, auth_failure_probability)
+from risk_levels import weighted_uls_score, classify_scores, categorize_risk, ULS_DEFAULT_RISK
+
+# Each lever perturbs the latest-year ULS input and the matching multi-year model feature together
+SCENARIO_LEVERS = {
+    'coverage_ratio': {'uls': 'coverage_ratio', 'feature': 'coverage_ratio'},
+    'churn_rate': {'uls': 'churn_rate', 'feature': 'avg_churn_rate'},
+    'avg_biometric_age_days': {'uls': 'avg_biometric_age_days', 'feature': 'avg_bio_age'},
+    'child_refresh_gap_months': {'uls': 'child_refresh_gap_months', 'feature': 'avg_child_gap'},
+    'biometric_failure_rate': {'uls': 'biometric_failure_rate', 'feature': 'avg_failure_rate'},
+    'rejection_rate': {'uls': None, 'feature': 'rejection_rate'},
+    'anomaly_score': {'uls': 'anomaly_score', 'feature': None}
+}
+DERIVED_FEATURES = {'bio_age_normalized': ('avg_bio_age', 2500)}
+OPERATIONS = ['scale', 'add', 'set']
+
+
+def parse_changes(changes):
+    parsed = []
+    for lever, change in changes.items():
+        if lever not in SCENARIO_LEVERS:
+            raise ValueError(f"Unknown scenario lever: {lever}; expected one of {list(SCENARIO_LEVERS)}")
+        if len(change) != 1 or next(iter(change)) not in OPERATIONS:
+            raise ValueError(f"Change for {lever} must be one of {OPERATIONS}, got {change}")
+        operation, value = next(iter(change.items()))
+        parsed.append((lever, operation, float(value)))
+    return parsed
+
+
+def scenario_grid(lever, operation, values, filters=None, prefix=None):
+    prefix = prefix or f"{lever}_{operation}"
+    return [{'name': f"{prefix}_{value:g}", 'filter': filters or {}, 'changes': {lever: {operation: value}}}
+            for value in values]
+
+
+class ScenarioEngine:
+    def __init__(self, analytics, predictor=None, batch_rows=250000):
+        if analytics.uls_results is None:
+            analytics.compute_universal_lifecycle_score()
+        self.analytics = analytics
+        self.predictor = predictor
+        self.batch_rows = batch_rows
+
+        self.base = analytics.uls_results
+        self.district_ids = self.base['district_id'].astype(str).to_numpy()
+        self.inputs = {lever: self.base[spec['uls']].to_numpy(dtype=np.float64)
+                       for lever, spec in SCENARIO_LEVERS.items() if spec['uls'] is not None}
+
+        self.features = None
+        if predictor is not None and predictor.model is not None:
+            features = predictor.prepare_features().set_index('district_id')
+            features.index = features.index.astype(str)
+            self.features = features.reindex(self.district_ids)[predictor.feature_columns].fillna(0)
+            self.features = self.features.to_numpy(dtype=np.float64)
+            self.feature_index = {column: i for i, column in enumerate(predictor.feature_columns)}
+
+        self.baseline = self._evaluate_batch([{'name': 'baseline', 'changes': {}}])
+        self.baseline = {key: values[0] for key, values in self.baseline.items()}
+
+    def district_mask(self, filters):
+        mask = np.ones(len(self.base), dtype=bool)
+        for column, allowed in (filters or {}).items():
+            allowed = allowed if isinstance(allowed, (list, tuple, set)) else [allowed]
+            mask &= self.base[column].astype(str).isin([str(a) for a in allowed]).to_numpy()
+        return mask
+
+    def perturbations(self, scenarios):
+        # One (scenarios x districts) multiplier/offset/override triple per lever
+        shape = (len(scenarios), len(self.base))
+        levers = {}
+        for i, scenario in enumerate(scenarios):
+            mask = self.district_mask(scenario.get('filter'))
+            for lever, operation, value in parse_changes(scenario.get('changes', {})):
+                if lever not in levers:
+                    levers[lever] = (np.ones(shape), np.zeros(shape), np.full(shape, np.nan))
+                scale, offset, override = levers[lever]
+                if operation == 'scale':
+                    scale[i, mask] *= value
+                elif operation == 'add':
+                    offset[i, mask] += value
+                else:
+                    override[i, mask] = value
+        return levers
+
+    def apply(self, base, perturbation):
+        if perturbation is None:
+            return np.broadcast_to(base, base.shape if base.ndim == 2 else (1,) + base.shape)
+        scale, offset, override = perturbation
+        if base.ndim == 1:
+            values = base[None, :] * scale + offset
+            return np.where(np.isnan(override), values, override)
+        values = base[None, :, :] * scale[:, :, None] + offset[:, :, None]
+        return np.where(np.isnan(override)[:, :, None], values, override[:, :, None])
+
+    def _evaluate_batch(self, scenarios):
+        return self.evaluate_levers(self.perturbations(scenarios), len(scenarios))
+
+    def evaluate_levers(self, levers, n_scenarios):
+        # levers maps each lever to (scale, offset, override) arrays of shape (scenarios x districts)
+        inputs = {lever: np.broadcast_to(self.apply(base, levers.get(lever)),
+                                         (n_scenarios, len(self.base)))
+                  for lever, base in self.inputs.items()}
+
+        components = {
+            'coverage_score': coverage_score(inputs['coverage_ratio']),
+            'demographic_volatility': demographic_volatility(inputs['churn_rate']),
+            'biometric_age_score': biometric_age_score(inputs['avg_biometric_age_days']),
+            'child_vulnerability_score': child_vulnerability_score(inputs['child_refresh_gap_months']),
+            'anomaly_score': inputs['anomaly_score']
+        }
+        uls_score = weighted_uls_score(components, self.analytics.uls_weights).clip(0, 100).round(2)
+        result = {
+            'uls_score': uls_score,
+            'auth_failure_probability': auth_failure_probability(uls_score, inputs['biometric_failure_rate']),
+            'risk_classification': classify_scores(uls_score, self.analytics.risk_bands, ULS_DEFAULT_RISK)
+        }
+
+        if self.features is not None:
+            result['predicted_auth_failure_prob'] = self.predict(levers, n_scenarios)
+        return result
+
+    def predict(self, levers, n_scenarios):
+        features = np.repeat(self.features[None, :, :], n_scenarios, axis=0)
+        for lever, perturbation in levers.items():
+            column = SCENARIO_LEVERS[lever]['feature']
+            if column is None or column not in self.feature_index:
+                continue
+            j = self.feature_index[column]
+            features[:, :, j] = self.apply(self.features[:, j], perturbation)
+        for column, (source, divisor) in DERIVED_FEATURES.items():
+            if column in self.feature_index and source in self.feature_index:
+                features[:, :, self.feature_index[column]] = features[:, :, self.feature_index[source]] / divisor
+
+        flat = features.reshape(-1, features.shape[2])
+        predictions = self.predictor.predict_features(flat)
+        return np.asarray(predictions, dtype=np.float64).round(2).reshape(n_scenarios, -1)
+
+    def evaluate(self, scenarios, details=False):
+        names = [scenario.get('name', f"scenario_{i}") for i, scenario in enumerate(scenarios)]
+        per_batch = max(1, self.batch_rows // max(len(self.base), 1))
+
+        summaries = []
+        district_frames = []
+        for start in range(0, len(scenarios), per_batch):
+            batch = scenarios[start:start + per_batch]
+            result = self._evaluate_batch(batch)
+            masks = np.stack([self.district_mask(s.get('filter')) for s in batch])
+            deltas = {key: result[key] - self.baseline[key]
+                      for key in ('uls_score', 'auth_failure_probability', 'predicted_auth_failure_prob')
+                      if key in result}
+
+            summary = pd.DataFrame({
+                'scenario': names[start:start + per_batch],
+                'districts_targeted': masks.sum(axis=1),
+                'avg_uls_score': np.nanmean(result['uls_score'], axis=1).round(2),
+                'avg_uls_delta': np.nanmean(deltas['uls_score'], axis=1).round(4),
+                'avg_auth_failure_delta': np.nanmean(deltas['auth_failure_probability'], axis=1).round(4),
+                'high_risk_count': (result['risk_classification'] == ULS_DEFAULT_RISK).sum(axis=1),
+                'high_risk_delta': ((result['risk_classification'] == ULS_DEFAULT_RISK).sum(axis=1) -
+                                    (self.baseline['risk_classification'] == ULS_DEFAULT_RISK).sum()),
+                'risk_changes': (result['risk_classification'] != self.baseline['risk_classification']).sum(axis=1)
+            })
+            if 'predicted_auth_failure_prob' in deltas:
+                summary['avg_predicted_failure_delta'] = np.nanmean(deltas['predicted_auth_failure_prob'],
+                                                                    axis=1).round(4)
+                summary['predicted_high_risk_count'] = (
+                    categorize_risk(result['predicted_auth_failure_prob']) == 'High Risk').sum(axis=1)
+            summaries.append(summary)
+
+            if details:
+                rows = len(batch) * len(self.base)
+                frame = pd.DataFrame({
+                    'scenario': np.repeat(names[start:start + per_batch], len(self.base)),
+                    'district_id': np.tile(self.district_ids, len(batch)),
+                    'uls_score': result['uls_score'].reshape(rows),
+                    'uls_delta': deltas['uls_score'].reshape(rows),
+                    'auth_failure_delta': deltas['auth_failure_probability'].reshape(rows),
+                    'risk_classification': result['risk_classification'].reshape(rows)
+                })
+                if 'predicted_auth_failure_prob' in deltas:
+                    frame['predicted_failure_delta'] = deltas['predicted_auth_failure_prob'].reshape(rows)
+                district_frames.append(frame[masks.reshape(rows)])
+
+        summary = pd.concat(summaries, ignore_index=True)
+        if details:
+            return summary, pd.concat(district_frames, ignore_index=True)
+        return summary
+
+
+def load_scenarios(path):
+    with open(path, 'r') as f:
+        payload = json.load(f)
+    scenarios = payload['scenarios'] if isinstance(payload, dict) else payload
+    expanded = []
+    for scenario in scenarios:
+        if 'grid' in scenario:
+            grid = scenario['grid']
+            expanded.extend(scenario_grid(grid['lever'], grid['operation'], grid['values'],
+                                          scenario.get('filter'), scenario.get('name')))
+        else:
+            expanded.append(scenario)
+    return expanded
+
+
+if __name__ == "__main__":
+    from lifecycle_analytics import LifecycleAnalytics
+    analytics = LifecycleAnalytics()
+    analytics.load_data()
+    engine = ScenarioEngine(analytics)
+    scenarios = list(itertools.chain(
+        scenario_grid('avg_biometric_age_days', 'scale', np.arange(0.5, 1.0, 0.05).round(2),
+                      {'risk_classification': 'High Risk'}, 'bio_camps_high_risk'),
+        scenario_grid('child_refresh_gap_months', 'add', [-12, -6, -3], prefix='child_drive')
+    ))
+    print(engine.evaluate(scenarios).to_string(index=False))
@@ -0,0 +1,148 @@
+import pandas as pd
+from aggregation_cube import AggregationCube
+from export_bundle import ExportBundle
+
+# Serving payloads are export bundle parts, so the API serves whatever bundles/CURRENT points at, rollbacks included
+SERVING_PARTS = ['districts', 'indexes', 'views']
+CHILD_VULNERABILITY_FIELDS = ['district_id', 'district_name', 'state', 'child_vulnerability_score',
+                              'child_refresh_gap_months', 'uls_score']
+HEATMAP_FIELDS = {'state': 'state', 'avg_uls_score': 'value', 'risk_level': 'risk_level',
+                  'district_count': 'district_count', 'avg_coverage': 'avg_coverage',
+                  'avg_bio_freshness': 'avg_bio_freshness'}
+
+
+def json_records(df):
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient='records')
+
+
+def id_lists(ids, keys):
+    lists = {}
+    for key, group in pd.Series(ids).groupby(keys.to_numpy(), sort=True):
+        lists[str(key)] = group.tolist()
+    return lists
+
+
+def pincode_hotspots(cube, n=10):
+    cells = cube.cuboid(['state', 'district', 'pincode'])
+    if not len(cells):
+        return {}
+    totals = cells[[f"{m}_sum" for m in cube.measures]].sum(axis=1).rename('total_updates')
+    ranked = pd.concat([totals, cells['rows'].rename('records')], axis=1).reset_index()
+    ranked = ranked.sort_values(['state', 'total_updates'], ascending=[True, False], kind='stable')
+    ranked = ranked.groupby('state', sort=True).head(n)
+    return {str(state): json_records(group.drop(columns='state'))
+            for state, group in ranked.groupby('state', sort=True)}
+
+
+def load_serving_artifacts(output_path="backend/analytics/"):
+    bundle = ExportBundle(output_path)
+    try:
+        return {part: bundle.read(f"serving_{part}") for part in SERVING_PARTS}
+    except (KeyError, FileNotFoundError):
+        return None
+
+
+def serving_parts(records, indexes, views):
+    return {'serving_districts': records, 'serving_indexes': indexes, 'serving_views': views}
+
+
+def prediction_high_risk(predictions):
+    return [p for p in predictions if p.get('risk_category') == 'High Risk']
+
+
+def build_serving_artifacts(uls_df, output_path="backend/analytics/", recommendations=None, state_summary=None,
+                            cube=None):
+    # Predictions and explanations are carried over from the current bundle's serving parts;
+    # update_serving_predictions is the only writer of those fields. Returns the parts to bundle
+    previous = load_serving_artifacts(output_path)
+    previous_records = previous['districts'] if previous is not None else {}
+    prediction_views = previous['views'].get('prediction_high_risk', []) if previous is not None else []
+    recommendations = recommendations or []
+    state_summary = state_summary or []
+    if cube is None:
+        cube = AggregationCube.load(output_path)
+
+    recs_by_id = {r['district_id']: r['recommendations'] for r in recommendations}
+    records = {}
+    for district_id, row in zip(uls_df['district_id'].astype(str), json_records(uls_df)):
+        records[district_id] = {
+            'uls': row,
+            'recommendations': recs_by_id.get(district_id, []),
+            'prediction': previous_records.get(district_id, {}).get('prediction'),
+            'explanation': previous_records.get(district_id, {}).get('explanation')
+        }
+
+    views = uls_views(uls_df, state_summary)
+    views['prediction_high_risk'] = prediction_views
+    views['pincode_hotspots'] = pincode_hotspots(cube) if cube is not None else {}
+    return serving_parts(records, serving_indexes(uls_df), views)
+
+
+def patch_serving_artifacts(uls_df, changed, output_path="backend/analytics/", recommendations=None,
+                            state_summary=None):
+    # Replaces the ULS rows and recommendations of the changed districts only; predictions, explanations
+    # and pincode hotspots stay as they are. Returns None when there are no serving parts to patch
+    current = load_serving_artifacts(output_path)
+    if current is None:
+        return None
+    records, views = current['districts'], current['views']
+    recs_by_id = {r['district_id']: r['recommendations'] for r in recommendations or []}
+    for district_id, row in zip(changed['district_id'].astype(str), json_records(changed)):
+        record = records.setdefault(district_id, {'prediction': None, 'explanation': None})
+        record['uls'] = row
+        record['recommendations'] = recs_by_id.get(district_id, [])
+
+    views.update(uls_views(uls_df, state_summary or []))
+    return serving_parts(records, serving_indexes(uls_df), views)
+
+
+def serving_indexes(uls_df):
+    uls_sorted = uls_df.sort_values('uls_score', kind='stable', na_position='last')
+    ids = uls_sorted['district_id'].astype(str).to_numpy()
+    return {
+        'order': ids.tolist(),
+        'by_state': id_lists(ids, uls_sorted['state'].astype(str)),
+        'by_risk': id_lists(ids, uls_sorted['risk_classification'].astype(str))
+    }
+
+
+def uls_views(uls_df, state_summary):
+    vulnerable = uls_df[uls_df['child_vulnerability_score'] > 50]
+    vulnerable = vulnerable.sort_values('child_vulnerability_score', ascending=False, kind='stable').head(50)
+    high_risk = uls_df[uls_df['risk_classification'] == 'High Risk']
+    return {
+        'child_vulnerability': json_records(vulnerable[CHILD_VULNERABILITY_FIELDS]),
+        'high_risk': json_records(high_risk[['district_id', 'district_name', 'state', 'uls_score',
+                                             'auth_failure_probability']]),
+        'heatmap': [{target: s.get(source) for source, target in HEATMAP_FIELDS.items()}
+                    for s in state_summary],
+        'states': state_summary
+    }
+
+
+def update_serving_predictions(predictions, output_path="backend/analytics/", explanations=None):
+    # Only the prediction fields change; ULS records, indexes and views stay as the last analytics export
+    # left them. Without one, districts are served with predictions alone until ULS scores are exported
+    if isinstance(predictions, pd.DataFrame):
+        predictions = json_records(predictions)
+    explanations = explanations or {}
+    preds_by_id = {str(p['district_id']): p for p in predictions}
+
+    current = load_serving_artifacts(output_path)
+    if current is None:
+        records = {district_id: {'uls': None, 'recommendations': [], 'prediction': prediction,
+                                 'explanation': explanations.get(district_id)}
+                   for district_id, prediction in preds_by_id.items()}
+        indexes = {'order': [], 'by_state': {}, 'by_risk': {}}
+        views = {'child_vulnerability': [], 'high_risk': [], 'heatmap': [], 'states': [], 'pincode_hotspots': {}}
+    else:
+        records, indexes, views = current['districts'], current['indexes'], current['views']
+        for district_id, record in records.items():
+            record['prediction'] = preds_by_id.get(district_id)
+            record['explanation'] = explanations.get(district_id)
+        for district_id in preds_by_id.keys() - records.keys():
+            records[district_id] = {'uls': None, 'recommendations': [], 'prediction': preds_by_id[district_id],
+                                    'explanation': explanations.get(district_id)}
+    views['prediction_high_risk'] = prediction_high_risk(predictions)
+    return serving_parts(records, indexes, views)
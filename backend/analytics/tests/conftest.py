@@ -0,0 +1,42 @@
+import os
+import sys
+import pytest
+
+ANALYTICS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(os.path.dirname(ANALYTICS_DIR))
+sys.path.insert(0, ANALYTICS_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'datasets'))
+
+from generate_datasets import SyntheticDataGenerator
+from lifecycle_analytics import LifecycleAnalytics
+from ml_predictor import AuthFailurePredictor
+
+
+@pytest.fixture(scope='session')
+def data_path(tmp_path_factory):
+    path = f"{tmp_path_factory.mktemp('datasets')}/"
+    SyntheticDataGenerator(districts=60, years=4, pincodes=4, days=6, seed=7).write_reference(path)
+    return path
+
+
+@pytest.fixture
+def analytics(data_path):
+    analytics = LifecycleAnalytics(data_path, use_cache=False)
+    analytics.load_data()
+    return analytics
+
+
+@pytest.fixture(scope='session')
+def model_path(data_path, tmp_path_factory):
+    path = f"{tmp_path_factory.mktemp('model')}/"
+    predictor = AuthFailurePredictor(data_path, use_cache=False)
+    predictor.train_model('gradient_boosting')
+    predictor.save_model(path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def predictor(data_path, model_path):
+    predictor = AuthFailurePredictor(data_path, use_cache=False)
+    predictor.load_model(model_path, verbose=False)
+    return predictor
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from aggregation_cube import AggregationCube
+
+DIMENSIONS = ['state', 'district_id', 'year']
+MEASURES = ['total_demographic_updates', 'churn_rate']
+
+
+def test_cube_matches_pandas_groupby(analytics):
+    demographic = analytics.demographic_df
+    cube = AggregationCube.from_frame(demographic, DIMENSIONS[1:], MEASURES)
+
+    stats = cube.stats(['year'], statistics=('sum', 'count', 'mean', 'std'))
+    expected = demographic.groupby('year')[MEASURES].agg(['sum', 'count', 'mean', 'std'])
+    for measure in MEASURES:
+        for statistic in ('sum', 'count', 'mean', 'std'):
+            np.testing.assert_allclose(stats[f"{measure}_{statistic}"].to_numpy(dtype=np.float64),
+                                       expected[(measure, statistic)].to_numpy(dtype=np.float64), rtol=1e-9)
+    np.testing.assert_array_equal(stats['rows'], demographic.groupby('year').size())
+
+
+def test_cube_rollups_match_across_levels(analytics):
+    demographic = analytics.demographic_df.merge(analytics.enrolment_df[['district_id', 'state']], on='district_id')
+    demographic['state'] = demographic['state'].astype(str)
+    cube = AggregationCube.from_frame(demographic, DIMENSIONS, MEASURES)
+
+    by_state = cube.stats(['state'], statistics=('sum', 'mean'))
+    expected = demographic.groupby('state')[MEASURES].agg(['sum', 'mean'])
+    np.testing.assert_allclose(by_state['total_demographic_updates_sum'],
+                               expected[('total_demographic_updates', 'sum')], rtol=1e-12)
+    np.testing.assert_allclose(by_state['churn_rate_mean'], expected[('churn_rate', 'mean')], rtol=1e-9)
+
+    total = cube.stats([], statistics=('sum',))
+    assert float(total['total_demographic_updates_sum'].iloc[0]) == float(demographic['total_demographic_updates'].sum())
+
+    state = by_state.index[0]
+    filtered = cube.stats(['year'], statistics=('sum',), filters={'state': state})
+    expected_years = demographic[demographic['state'] == state].groupby('year')['total_demographic_updates'].sum()
+    np.testing.assert_allclose(filtered['total_demographic_updates_sum'].to_numpy(), expected_years.to_numpy())
+
+
+def test_incremental_cube_matches_single_pass(analytics):
+    demographic = analytics.demographic_df
+    whole = AggregationCube.from_frame(demographic, DIMENSIONS[1:], MEASURES)
+    parts = AggregationCube(DIMENSIONS[1:], MEASURES)
+    halves = np.array_split(np.arange(len(demographic)), 2)
+    parts.add_frame(demographic.iloc[halves[0]])
+    parts.cuboid(['year'])
+    parts.add_frame(demographic.iloc[halves[1]])
+
+    pd.testing.assert_frame_equal(parts.stats(['year'], statistics=('sum', 'count', 'mean')),
+                                  whole.stats(['year'], statistics=('sum', 'count', 'mean')))
@@ -0,0 +1,37 @@
+import numpy as np
+from feature_attribution import TreeExplainer, attribution_frame
+from tree_export import TreeEnsemblePredictor
+
+
+def test_attributions_sum_to_model_output(predictor):
+    features = predictor.prepare_features()
+    frame = features[predictor.feature_columns].fillna(0)
+    X = frame.to_numpy(dtype=np.float64)
+    explainer = predictor.tree_explainer()
+    contributions = explainer.explain(X)
+
+    expected = predictor.model.predict(predictor.scaler.transform(frame))
+    np.testing.assert_allclose(explainer.expected_value + contributions.sum(axis=1), expected,
+                               rtol=0, atol=1e-6)
+
+    frame = attribution_frame(features['district_id'], X, contributions, explainer)
+    np.testing.assert_allclose(frame['model_output'], expected, rtol=0, atol=1e-5)
+
+
+def test_exported_model_explains_like_sklearn(predictor, model_path):
+    features = predictor.prepare_features()
+    X = features[predictor.feature_columns].fillna(0).to_numpy(dtype=np.float64)
+    from_model = TreeExplainer.from_model(predictor.model, predictor.scaler, predictor.feature_columns)
+    from_export = TreeExplainer.from_predictor(TreeEnsemblePredictor.load(model_path))
+
+    assert from_model.version == from_export.version
+    np.testing.assert_allclose(from_export.explain(X), from_model.explain(X), rtol=0, atol=1e-9)
+
+
+def test_table_and_direct_paths_agree(predictor):
+    X = predictor.prepare_features()[predictor.feature_columns].fillna(0).to_numpy(dtype=np.float64)[:20]
+    tabled = TreeExplainer.from_model(predictor.model, predictor.scaler, predictor.feature_columns)
+    direct = TreeExplainer.from_model(predictor.model, predictor.scaler, predictor.feature_columns,
+                                      max_table_elements=0)
+    assert tabled.table is not None and direct.table is None
+    np.testing.assert_allclose(direct.explain(X), tabled.explain(X), rtol=0, atol=1e-9)
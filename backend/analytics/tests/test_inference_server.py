@@ -0,0 +1,74 @@
+import threading
+import pytest
+from inference_server import InferenceService
+
+
+@pytest.fixture(scope='module')
+def service(model_path):
+    return InferenceService(model_path, max_wait_ms=50)
+
+
+def instance(service, value=1.0):
+    return {column: value for column in service.feature_columns}
+
+
+def test_predict_accepts_dicts_and_lists(service):
+    single = service.predict(instance(service))
+    assert len(single) == 1 and 0 <= single[0]['auth_failure_prob'] <= 100
+    rows = service.predict([[1.0] * len(service.feature_columns), instance(service, 2.0)])
+    assert len(rows) == 2
+    assert rows[0] == single[0]
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), float('-inf')])
+def test_non_finite_values_are_rejected(service, value):
+    bad = instance(service)
+    bad[service.feature_columns[3]] = value
+    with pytest.raises(ValueError, match='Instance 1 has non-finite'):
+        service.to_matrix([instance(service), bad])
+
+
+def test_malformed_instances_are_rejected(service):
+    missing = instance(service)
+    missing.pop(service.feature_columns[0])
+    with pytest.raises(ValueError, match='missing features'):
+        service.to_matrix([missing])
+    with pytest.raises(ValueError, match='expected'):
+        service.to_matrix([[1.0] * (len(service.feature_columns) - 1)])
+
+
+def test_none_values_default_to_zero(service):
+    row = instance(service)
+    row[service.feature_columns[0]] = None
+    assert service.to_matrix(row)[0, 0] == 0
+
+
+def test_failing_request_does_not_fail_its_batch(model_path):
+    service = InferenceService(model_path, max_wait_ms=200)
+    score = service.score
+
+    def fragile_score(X):
+        # Stands in for a model failure triggered by one request's rows
+        if (X == -1).any():
+            raise RuntimeError("model rejected a row")
+        return score(X)
+    service.score = fragile_score
+
+    results = {}
+
+    def send(name, value):
+        try:
+            results[name] = service.predict(instance(service, value))
+        except Exception as error:
+            results[name] = error
+
+    threads = [threading.Thread(target=send, args=(name, value)) for name, value in [('good', 1.0), ('bad', -1.0)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert service.batches_scored == 1
+    assert isinstance(results['bad'], RuntimeError)
+    probabilities, _ = score(service.to_matrix(instance(service)))
+    assert results['good'][0]['auth_failure_prob'] == float(probabilities[0])
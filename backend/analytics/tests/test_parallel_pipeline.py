@@ -0,0 +1,21 @@
+from parallel_pipeline import ParallelPipeline, check_parity
+
+
+def test_check_parity_with_custom_settings(analytics):
+    # Non-default weights and bands only match when they reach the worker processes
+    analytics.uls_weights = {'coverage_score': 0.4, 'demographic_volatility': 0.05, 'biometric_age_score': 0.3,
+                             'child_vulnerability_score': 0.15, 'anomaly_score': 0.1}
+    analytics.risk_bands = [(75, 'Stable'), (55, 'Watchlist')]
+    analytics.pincode_anomaly_weight = 0.3
+
+    report = check_parity(analytics, workers=2)
+    assert report['match'], report
+    assert report['max_uls_difference'] == 0
+    assert report['risk_mismatches'] == 0
+
+
+def test_parallel_run_keeps_enrolment_order(analytics):
+    serial = analytics.compute_universal_lifecycle_score().copy()
+    parallel = ParallelPipeline(analytics, workers=1).run()
+    assert parallel['district_id'].tolist() == serial['district_id'].tolist()
+    assert set(analytics.merged_partials['state_summary']['state']) == set(serial['state'].astype(str))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from ml_predictor import AuthFailurePredictor
+from tree_export import TreeEnsemblePredictor, stale_tree_model
+
+
+def feature_matrix(predictor):
+    return predictor.prepare_features()[predictor.feature_columns].fillna(0).to_numpy(dtype=np.float64)
+
+
+def test_tree_export_matches_sklearn(predictor, model_path):
+    assert stale_tree_model(model_path) is None
+    tree_model = TreeEnsemblePredictor.load(model_path)
+    assert tree_model.feature_columns == predictor.feature_columns
+
+    frame = predictor.prepare_features()[predictor.feature_columns].fillna(0)
+    X = frame.to_numpy(dtype=np.float64)
+    expected = predictor.model.predict(predictor.scaler.transform(frame))
+    np.testing.assert_allclose(tree_model.predict(X), expected, rtol=0, atol=1e-9)
+
+
+def test_numpy_backend_matches_sklearn_backend(predictor, data_path, model_path):
+    numpy_predictor = AuthFailurePredictor(data_path, use_cache=False, backend='numpy')
+    numpy_predictor.load_model(model_path, verbose=False)
+
+    X = feature_matrix(predictor)
+    np.testing.assert_allclose(numpy_predictor.predict_features(X), predictor.predict_features(X),
+                               rtol=0, atol=1e-9)
+
+
+def test_single_row_and_wrong_width(model_path, predictor):
+    tree_model = TreeEnsemblePredictor.load(model_path)
+    X = feature_matrix(predictor)
+    assert tree_model.predict(X[0]).shape == (1,)
+    with pytest.raises(ValueError, match='features'):
+        tree_model.predict(X[:, :-1])
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from validation import SeenSet, ValidationStage, SEEN_FILE
+
+
+def random_hashes(count, seed):
+    return np.random.default_rng(seed).integers(0, np.iinfo(np.int64).max, count, dtype=np.int64).astype(np.uint64)
+
+
+def test_seen_set_is_exact_within_windows():
+    seen = SeenSet(window_days=10, max_windows=3)
+    hashes = random_hashes(3000, 0)
+    days = np.repeat([0, 10, 20], 1000)
+    seen.add(hashes[:2000], days[:2000])
+    assert seen.filter is None and len(seen) == 2000
+    assert seen.contains(hashes[:2000], days[:2000]).all()
+    assert not seen.contains(hashes[2000:], days[2000:]).any()
+    # A hash only matches inside its own window
+    assert not seen.contains(hashes[:1000], days[:1000] + 10).any()
+
+
+def test_seen_set_folds_old_windows_without_false_negatives():
+    seen = SeenSet(window_days=10, max_windows=2, filter_bits=1 << 20)
+    hashes = random_hashes(5000, 1)
+    days = np.repeat(np.arange(5) * 10, 1000)
+    for window in range(5):
+        rows = slice(window * 1000, (window + 1) * 1000)
+        seen.add(hashes[rows], days[rows])
+
+    assert sorted(seen.windows) == [3, 4]
+    assert seen.folded == 3000 and len(seen) == 5000
+    assert seen.contains(hashes, days).all()
+    # Folded hashes are found whatever date a late duplicate carries
+    assert seen.contains(hashes[:3000], np.zeros(3000, dtype=np.int64)).all()
+
+    unseen = random_hashes(20000, 2)
+    false_positives = seen.contains(unseen, np.zeros(len(unseen), dtype=np.int64)).mean()
+    expected = (1 - np.exp(-seen.filter_hashes * 3000 / seen.filter_bits)) ** seen.filter_hashes
+    assert false_positives <= max(10 * expected, 1e-3)
+
+
+def test_seen_set_save_load_roundtrip(tmp_path):
+    seen = SeenSet(window_days=10, max_windows=2, filter_bits=1 << 16)
+    hashes = random_hashes(400, 3)
+    days = np.repeat(np.arange(4) * 10, 100)
+    seen.add(hashes[:200], days[:200])
+    seen.add(hashes[200:], days[200:])
+    path = tmp_path / SEEN_FILE
+    seen.save(path)
+
+    loaded = SeenSet(window_days=10, max_windows=2, filter_bits=1 << 16).load(path)
+    assert sorted(loaded.windows) == sorted(seen.windows)
+    assert loaded.folded == seen.folded and len(loaded) == len(seen)
+    np.testing.assert_array_equal(loaded.filter, seen.filter)
+    assert loaded.contains(hashes, days).all()
+
+
+def test_legacy_hashes_are_folded_on_load(tmp_path):
+    hashes = random_hashes(500, 4)
+    np.save(tmp_path / 'demographic_seen_hashes.npy', hashes)
+    seen = SeenSet(filter_bits=1 << 16).load(str(tmp_path / f"demographic_{SEEN_FILE}"))
+    assert seen.folded == 500 and not seen.windows
+    assert seen.contains(hashes, np.arange(500)).all()
+
+
+def raw_chunk(dates, pincode_offset=0):
+    return pd.DataFrame({
+        'date': pd.array(dates, dtype='string'),
+        'state': pd.array(['Kerala'] * len(dates), dtype='string'),
+        'district': pd.array(['District 1'] * len(dates), dtype='string'),
+        'pincode': 100000 + pincode_offset + np.arange(len(dates)),
+        'demo_age_5_17': np.arange(len(dates)),
+        'demo_age_17_': np.arange(len(dates)) * 2
+    })
+
+
+def test_validation_rejects_duplicates_across_chunks_and_runs(tmp_path):
+    reject_path = f"{tmp_path}/validation/"
+    dates = [f"{day:02d}-{month:02d}-2024" for month in range(1, 13) for day in (1, 15)]
+    chunk = raw_chunk(dates)
+
+    stage = ValidationStage(reject_path, persist_seen=True, max_date='2025-01-01')
+    assert len(stage.validate(chunk, 'demographic')) == len(dates)
+    assert len(stage.validate(pd.concat([chunk, chunk]), 'demographic')) == 0
+    fresh = raw_chunk(dates, pincode_offset=len(dates))
+    assert len(stage.validate(fresh, 'demographic')) == len(dates)
+    report = stage.close()
+    assert report['demographic']['duplicate'] == 2 * len(dates)
+
+    # The persisted seen-set keeps rejecting the same rows in a later run
+    rerun = ValidationStage(reject_path, persist_seen=True, max_date='2025-01-01')
+    assert len(rerun.validate(chunk, 'demographic')) == 0
+    rerun.close()
+
+
+def test_validation_rejects_bad_rows(tmp_path):
+    chunk = raw_chunk(['01-01-2024', '31-02-2024', '01-01-2009', '02-01-2024', '03-01-2024'])
+    chunk.loc[3, 'pincode'] = 99
+    chunk.loc[4, 'demo_age_5_17'] = -1
+    stage = ValidationStage(f"{tmp_path}/validation/", max_date='2025-01-01')
+    valid = stage.validate(chunk, 'demographic')
+    assert valid['date'].tolist() == ['01-01-2024']
+    counts = stage.close()['demographic']
+    assert (counts['bad_date'], counts['date_out_of_range'], counts['bad_pincode'], counts['bad_measure']) == (1, 1, 1, 1)
@@ -0,0 +1,204 @@
+import numpy as np
+import json
+import os
+import shutil
+
+TREE_MODEL_DIR = 'tree_model/'
+TREE_ARRAYS = ['feature', 'threshold', 'children', 'value', 'roots']
+# Node cover only feeds attributions; models exported before it was added still load and predict
+OPTIONAL_ARRAYS = ['cover']
+FORMAT_VERSION = 1
+
+
+def ensemble_trees(model):
+    name = type(model).__name__
+    if name == 'GradientBoostingRegressor':
+        if model.init_ == 'zero':
+            baseline = 0.0
+        else:
+            baseline = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+        return [e.tree_ for e in model.estimators_[:, 0]], float(model.learning_rate), baseline
+    if name == 'RandomForestRegressor':
+        return [e.tree_ for e in model.estimators_], 1.0 / len(model.estimators_), 0.0
+    raise ValueError(f"Cannot export {name}; only GradientBoostingRegressor and "
+                     f"RandomForestRegressor are supported")
+
+
+def folded_thresholds(threshold, mean, scale):
+    # sklearn compares float32((x - mean) / scale) <= t; find the largest raw x that still
+    # satisfies it so folded comparisons on raw float64 features reproduce its splits exactly
+    def passes(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    guess = threshold * scale + mean
+    width = np.abs(guess) * 1e-6 + np.abs(scale) * 1e-6 + 1e-12
+    lo = guess - width
+    hi = guess + width
+    while not passes(lo).all():
+        width = np.where(passes(lo), width, width * 2)
+        lo = guess - width
+    while passes(hi).any():
+        width = np.where(passes(hi), width * 2, width)
+        hi = guess + width
+
+    for _ in range(128):
+        mid = lo + (hi - lo) / 2
+        ok = passes(mid)
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+        if (np.nextafter(lo, np.inf) >= hi).all():
+            break
+    return lo
+
+
+def flatten_trees(trees, learning_rate, mean=None, scale=None):
+    sizes = [tree.node_count for tree in trees]
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+    offsets = np.repeat(roots, sizes)
+
+    feature = np.concatenate([tree.feature for tree in trees]).astype(np.int32)
+    threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+    left = np.concatenate([tree.children_left for tree in trees])
+    right = np.concatenate([tree.children_right for tree in trees])
+    value = np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64) * learning_rate
+    cover = np.concatenate([tree.weighted_n_node_samples for tree in trees]).astype(np.float64)
+
+    # Leaves point at themselves, so every sample can walk max_depth steps without branching
+    is_leaf = left == -1
+    nodes = np.arange(len(feature))
+    children = np.column_stack([np.where(is_leaf, nodes, left + offsets),
+                                np.where(is_leaf, nodes, right + offsets)]).astype(np.int32)
+    feature = np.where(is_leaf, 0, feature).astype(np.int32)
+
+    threshold = np.where(is_leaf, 0.0, threshold)
+    if scale is not None:
+        split = ~is_leaf
+        threshold[split] = folded_thresholds(threshold[split], mean[feature[split]], scale[feature[split]])
+
+    return {
+        'feature': feature,
+        'threshold': threshold,
+        'children': children,
+        'value': value,
+        'cover': cover,
+        'roots': roots
+    }
+
+
+def tree_depth(children, roots):
+    depth = 0
+    nodes = roots
+    while True:
+        split = children[nodes, 0] != nodes
+        if not split.any():
+            return depth
+        nodes = children[nodes[split]].ravel()
+        depth += 1
+
+
+def export_tree_model(model, scaler, feature_columns, output_path="backend/analytics/", model_version=None):
+    trees, learning_rate, baseline = ensemble_trees(model)
+    if scaler is not None:
+        arrays = flatten_trees(trees, learning_rate, np.asarray(scaler.mean_, dtype=np.float64),
+                               np.asarray(scaler.scale_, dtype=np.float64))
+    else:
+        arrays = flatten_trees(trees, learning_rate)
+
+    model_dir = f"{output_path}{TREE_MODEL_DIR}"
+    os.makedirs(model_dir, exist_ok=True)
+    for name in TREE_ARRAYS + OPTIONAL_ARRAYS:
+        np.save(os.path.join(model_dir, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'model_version': model_version,
+        'feature_columns': list(feature_columns),
+        'baseline': baseline,
+        'n_trees': len(trees),
+        'n_nodes': int(len(arrays['feature'])),
+        'max_depth': tree_depth(arrays['children'], arrays['roots']),
+        'scaler_folded': scaler is not None
+    }
+    with open(os.path.join(model_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def remove_tree_model(output_path="backend/analytics/"):
+    model_dir = f"{output_path}{TREE_MODEL_DIR}"
+    if os.path.isdir(model_dir):
+        shutil.rmtree(model_dir)
+
+
+def stale_tree_model(model_path="backend/analytics/"):
+    # The tree export belongs to the saved model only when model_config.json names the same type and version;
+    # returns the reason it does not, or None when it is current
+    meta_path = f"{model_path}{TREE_MODEL_DIR}meta.json"
+    if not os.path.exists(meta_path):
+        return "no tree export"
+    config_path = f"{model_path}model_config.json"
+    if not os.path.exists(config_path):
+        return None
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    for key in ('model_type', 'model_version'):
+        if meta.get(key) != config.get(key):
+            return f"tree export {key} {meta.get(key)} does not match model_config {config.get(key)}"
+    return None
+
+
+class TreeEnsemblePredictor:
+    def __init__(self, arrays, meta, chunk_size=4096):
+        self.arrays = arrays
+        self.meta = meta
+        self.feature_columns = meta['feature_columns']
+        self.baseline = meta['baseline']
+        self.max_depth = meta['max_depth']
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def load(cls, model_path="backend/analytics/", mmap=True, chunk_size=4096):
+        model_dir = f"{model_path}{TREE_MODEL_DIR}"
+        stale = stale_tree_model(model_path)
+        if stale is not None:
+            raise ValueError(f"Cannot load the tree model from {model_dir}: {stale}")
+        with open(os.path.join(model_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree model format: {meta['format_version']}")
+        arrays = {name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode='r' if mmap else None)
+                  for name in TREE_ARRAYS}
+        for name in OPTIONAL_ARRAYS:
+            path = os.path.join(model_dir, f"{name}.npy")
+            if os.path.exists(path):
+                arrays[name] = np.load(path, mmap_mode='r' if mmap else None)
+        return cls(arrays, meta, chunk_size)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected {len(self.feature_columns)} features, got {X.shape[1]}")
+
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.chunk_size):
+            predictions[start:start + self.chunk_size] = self._predict_chunk(X[start:start + self.chunk_size])
+        return predictions
+
+    def _predict_chunk(self, X):
+        feature = self.arrays['feature']
+        threshold = self.arrays['threshold']
+        children = self.arrays['children'].reshape(-1)
+
+        flat = np.ascontiguousarray(X).reshape(-1)
+        row_offsets = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.arrays['roots'], (len(X), len(self.arrays['roots']))).astype(np.int64)
+        for _ in range(self.max_depth):
+            go_right = ~(flat[row_offsets + feature[nodes]] <= threshold[nodes])
+            nodes = children[nodes * 2 + go_right]
+
+        return self.baseline + self.arrays['value'][nodes].sum(axis=1)
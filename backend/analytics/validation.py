@@ -0,0 +1,249 @@
+import pandas as pd
+import numpy as np
+import gzip
+import os
+from ingestion import RAW_FEEDS, KEY_COLUMNS
+from export_bundle import write_json_atomic
+
+DATE_FORMAT = '%d-%m-%Y'
+MIN_DATE = '2010-01-01'
+PINCODE_RANGE = (100000, 999999)
+REJECT_REASONS = ['bad_date', 'date_out_of_range', 'bad_pincode', 'missing_location', 'bad_measure', 'duplicate']
+SEEN_FILE = 'seen_hashes.npz'
+
+
+class SeenSet:
+    # Row hashes are partitioned by date window. The newest `max_windows` windows keep exact sorted uint64
+    # hashes in a few blocks (8 bytes per distinct row, small blocks merge so lookups stay a handful of binary
+    # searches); older windows are folded into a fixed-size Bloom filter, so memory and the persisted file stay
+    # bounded however many shards a feed accumulates. The filter never misses a duplicate but may reject a new
+    # row dated before the exact windows as one: with k hashes, m bits and n folded rows the false-positive rate
+    # is about (1 - exp(-k * n / m)) ** k, roughly 0.4% for 10M folded rows in the default 16 MiB. Rows inside
+    # the exact windows are never misclassified; raise max_windows or filter_bits if late rows are common
+    def __init__(self, window_days=31, max_windows=12, filter_bits=1 << 27, filter_hashes=4, max_blocks=8):
+        self.window_days = window_days
+        self.max_windows = max_windows
+        self.filter_bits = filter_bits
+        self.filter_hashes = filter_hashes
+        self.max_blocks = max_blocks
+        self.windows = {}
+        self.filter = None
+        self.folded = 0
+
+    def __len__(self):
+        return sum(len(block) for blocks in self.windows.values() for block in blocks) + self.folded
+
+    def window_keys(self, hashes, days):
+        if days is None:
+            return np.zeros(len(hashes), dtype=np.int64)
+        return np.asarray(days, dtype=np.int64) // self.window_days
+
+    def filter_positions(self, hashes):
+        low = hashes & np.uint64(0xFFFFFFFF)
+        step = (hashes >> np.uint64(32)) | np.uint64(1)
+        probes = np.arange(self.filter_hashes, dtype=np.uint64)
+        return (low[:, None] + probes[None, :] * step[:, None]) & np.uint64(self.filter_bits - 1)
+
+    def filter_contains(self, hashes):
+        if self.filter is None or not len(hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = self.filter_positions(hashes)
+        bits = self.filter[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)
+        return (bits & 1).astype(bool).all(axis=1)
+
+    def fold(self, hashes):
+        if not len(hashes):
+            return
+        if self.filter is None:
+            self.filter = np.zeros(self.filter_bits // 8, dtype=np.uint8)
+        positions = self.filter_positions(hashes).ravel()
+        np.bitwise_or.at(self.filter, positions >> np.uint64(3),
+                         np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.folded += len(hashes)
+
+    def contains(self, hashes, days=None):
+        keys = self.window_keys(hashes, days)
+        found = self.filter_contains(hashes)
+        for key in np.unique(keys):
+            rows = np.flatnonzero(keys == key)
+            for block in self.windows.get(int(key), []):
+                positions = np.searchsorted(block, hashes[rows]).clip(max=len(block) - 1)
+                found[rows] |= block[positions] == hashes[rows]
+        return found
+
+    def add(self, hashes, days=None):
+        if not len(hashes):
+            return
+        keys = self.window_keys(hashes, days)
+        for key in np.unique(keys):
+            blocks = self.windows.setdefault(int(key), [])
+            blocks.append(np.unique(hashes[keys == key]))
+            if len(blocks) > self.max_blocks:
+                self.windows[int(key)] = [np.unique(np.concatenate(blocks))]
+        while len(self.windows) > self.max_windows:
+            self.fold(np.concatenate(self.windows.pop(min(self.windows))))
+
+    def save(self, path):
+        keys = sorted(self.windows)
+        merged = [np.unique(np.concatenate(self.windows[key])) for key in keys]
+        self.windows = {key: [block] for key, block in zip(keys, merged)}
+        np.savez(path, keys=np.asarray(keys, dtype=np.int64),
+                 sizes=np.asarray([len(block) for block in merged], dtype=np.int64),
+                 hashes=np.concatenate(merged) if merged else np.empty(0, dtype=np.uint64),
+                 filter=self.filter if self.filter is not None else np.empty(0, dtype=np.uint8),
+                 folded=np.int64(self.folded))
+
+    def load(self, path):
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                blocks = np.split(saved['hashes'], np.cumsum(saved['sizes'])[:-1]) if len(saved['keys']) else []
+                self.windows = {int(key): [block] for key, block in zip(saved['keys'], blocks)}
+                self.filter = saved['filter'] if len(saved['filter']) else None
+                self.folded = int(saved['folded'])
+        elif os.path.exists(f"{os.path.splitext(path)[0]}.npy"):
+            # Hashes persisted before date partitioning carry no dates, so they go straight into the filter
+            self.fold(np.load(f"{os.path.splitext(path)[0]}.npy"))
+        return self
+
+
+class ValidationStage:
+    def __init__(self, reject_path="backend/analytics/validation/", dedup_columns=None, min_date=MIN_DATE,
+                 max_date=None, persist_seen=False):
+        self.reject_path = reject_path
+        self.dedup_columns = dedup_columns
+        self.min_date = np.datetime64(min_date, 'D')
+        self.max_date = np.datetime64(max_date or pd.Timestamp.now().date().isoformat(), 'D')
+        self.persist_seen = persist_seen
+        self.seen = {}
+        self.counts = {}
+        self.reject_files = {}
+
+    def seen_set(self, feed):
+        if feed not in self.seen:
+            self.seen[feed] = SeenSet()
+            if self.persist_seen:
+                self.seen[feed].load(os.path.join(self.reject_path, f"{feed}_{SEEN_FILE}"))
+        return self.seen[feed]
+
+    def reset(self, feed):
+        self.seen[feed] = SeenSet()
+
+    def read_chunks(self, shard, feed, chunksize):
+        measures = RAW_FEEDS[feed]['measures']
+        columns = KEY_COLUMNS + measures
+        header = pd.read_csv(shard, nrows=0).columns
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise ValueError(f"{shard} is missing required columns: {missing}")
+
+        dtypes = {'date': 'string', 'state': 'string', 'district': 'string'}
+        line = 2
+        for chunk in pd.read_csv(shard, usecols=columns, dtype=dtypes, chunksize=chunksize):
+            valid = self.validate(chunk, feed, shard, line)
+            line += len(chunk)
+            yield valid
+
+    def validate(self, chunk, feed, shard="", first_line=2):
+        measures = RAW_FEEDS[feed]['measures']
+        counts = self.counts.setdefault(feed, {'rows_in': 0, 'rows_out': 0, **{r: 0 for r in REJECT_REASONS}})
+        counts['rows_in'] += len(chunk)
+
+        dates = pd.to_datetime(chunk['date'], format=DATE_FORMAT, errors='coerce').to_numpy().astype('datetime64[D]')
+        pincode = pd.to_numeric(chunk['pincode'], errors='coerce').to_numpy(dtype=np.float64)
+        values = np.column_stack([pd.to_numeric(chunk[m], errors='coerce').to_numpy(dtype=np.float64)
+                                  for m in measures])
+        state = chunk['state'].str.strip()
+        district = chunk['district'].str.strip()
+
+        bad_date = np.isnat(dates)
+        checks = [
+            bad_date,
+            ~bad_date & ((dates < self.min_date) | (dates > self.max_date)),
+            np.isnan(pincode) | (pincode < PINCODE_RANGE[0]) | (pincode > PINCODE_RANGE[1]) | (pincode % 1 != 0),
+            (state.isna() | (state == '') | district.isna() | (district == '')).to_numpy(),
+            (np.isnan(values) | (values < 0) | (values % 1 != 0)).any(axis=1)
+        ]
+        reason = np.select(checks, range(len(checks)), default=-1)
+
+        # Row hashes only for rows that passed every check; duplicates within the chunk and
+        # against every earlier chunk or shard of the feed are rejected
+        # Hashed on parsed values so a shard whose measure column fell back to text still matches
+        candidates = np.flatnonzero(reason == -1)
+        canonical = pd.DataFrame({
+            'date': dates[candidates].astype(np.int64),
+            'state': state.to_numpy()[candidates],
+            'district': district.to_numpy()[candidates],
+            'pincode': pincode[candidates].astype(np.int64),
+            **{m: values[candidates, i].astype(np.int64) for i, m in enumerate(measures)}
+        })
+        dedup_columns = self.dedup_columns or KEY_COLUMNS + measures
+        hashes = pd.util.hash_pandas_object(canonical[dedup_columns], index=False).to_numpy()
+        _, first = np.unique(hashes, return_index=True)
+        repeated = np.ones(len(hashes), dtype=bool)
+        repeated[first] = False
+        # Exact duplicates share their date, so the seen-set can be partitioned by it
+        days = dates[candidates].astype(np.int64) if 'date' in dedup_columns else None
+        seen = self.seen_set(feed)
+        repeated |= seen.contains(hashes, days)
+        seen.add(hashes[~repeated], days[~repeated] if days is not None else None)
+        reason[candidates[repeated]] = REJECT_REASONS.index('duplicate')
+
+        rejected = reason != -1
+        if rejected.any():
+            self.write_rejects(feed, shard, chunk[rejected], reason[rejected],
+                               np.flatnonzero(rejected) + first_line)
+            for code, count in zip(*np.unique(reason[rejected], return_counts=True)):
+                counts[REJECT_REASONS[code]] += int(count)
+
+        keep = ~rejected
+        valid = pd.DataFrame({
+            'date': pd.array(chunk['date'].to_numpy()[keep], dtype='string'),
+            'state': pd.Categorical(state.to_numpy()[keep]),
+            'district': pd.Categorical(district.to_numpy()[keep]),
+            'pincode': pincode[keep].astype('int32')
+        })
+        for i, measure in enumerate(measures):
+            valid[measure] = values[keep, i].astype('int32')
+        counts['rows_out'] += len(valid)
+        return valid
+
+    def write_rejects(self, feed, shard, rows, reasons, lines):
+        rejects = rows.astype(str).assign(shard=os.path.basename(shard), line=lines,
+                                          reason=np.asarray(REJECT_REASONS)[reasons])
+        rejects = rejects[['shard', 'line', 'reason'] + list(rows.columns)]
+        if feed not in self.reject_files:
+            os.makedirs(self.reject_path, exist_ok=True)
+            self.reject_files[feed] = gzip.open(os.path.join(self.reject_path, f"rejected_{feed}.csv.gz"), 'wt')
+            rejects.to_csv(self.reject_files[feed], index=False)
+        else:
+            rejects.to_csv(self.reject_files[feed], index=False, header=False)
+
+    def report(self):
+        return {feed: {**counts, 'rejected': counts['rows_in'] - counts['rows_out']}
+                for feed, counts in self.counts.items()}
+
+    def close(self):
+        for handle in self.reject_files.values():
+            handle.close()
+        self.reject_files = {}
+        if not self.counts:
+            return {}
+        os.makedirs(self.reject_path, exist_ok=True)
+        if self.persist_seen:
+            for feed, seen in self.seen.items():
+                seen.save(os.path.join(self.reject_path, f"{feed}_{SEEN_FILE}"))
+        report = self.report()
+        write_json_atomic(os.path.join(self.reject_path, 'validation_report.json'), report)
+        for feed, counts in report.items():
+            print(f"Validated {counts['rows_in']} {feed} rows: {counts['rejected']} rejected "
+                  f"({counts['duplicate']} duplicates)")
+        return report
+
+
+if __name__ == "__main__":
+    import sys
+    from ingestion import ShardIngestor
+    validator = ValidationStage()
+    ingestor = ShardIngestor(sys.argv[1] if len(sys.argv) > 1 else "./", validator=validator)
+    ingestor.load_all()
+    validator.close()
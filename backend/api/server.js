@@ -2,6 +2,7 @@ const express = require('express');
 const cors = require('cors');
 const fs = require('fs');
 const path = require('path');
+const crypto = require('crypto');
 
 const app = express();
 const PORT = process.env.PORT || 3001;
@@ -10,19 +11,117 @@ app.use(cors());
 app.use(express.json());
 
 const analyticsPath = path.join(__dirname, '..', 'analytics');
+const bundlesPath = path.join(analyticsPath, 'bundles');
+const currentPath = path.join(bundlesPath, 'CURRENT');
 
+const jsonCache = new Map();
+let bundle = null;
+let artifacts = null;
+
+function readBundlePart(target, name) {
+    const entry = target.manifest.parts[name];
+    const body = fs.readFileSync(path.join(target.dir, entry.file));
+    const digest = crypto.createHash('sha256').update(body).digest('hex');
+    if (digest !== entry.sha256) {
+        throw new Error(`${entry.file} does not match manifest checksum`);
+    }
+    return JSON.parse(body.toString('utf8'));
+}
+
+// Flat files next to the bundles are only read when no export bundle exists yet
 function loadJsonFile(filename) {
     try {
+        const name = path.basename(filename, '.json');
+        const entry = bundle && bundle.manifest.parts[name];
+        if (entry && entry.format === 'json') {
+            const cached = jsonCache.get(name);
+            if (cached && cached.version === bundle.version) {
+                return cached.data;
+            }
+            const data = readBundlePart(bundle, name);
+            jsonCache.set(name, { version: bundle.version, data });
+            return data;
+        }
+        if (bundle) {
+            return null;
+        }
+
         const filePath = path.join(analyticsPath, filename);
-        const data = fs.readFileSync(filePath, 'utf8');
-        return JSON.parse(data);
+        const { mtimeMs } = fs.statSync(filePath);
+        const cached = jsonCache.get(filePath);
+        if (cached && cached.mtimeMs === mtimeMs) {
+            return cached.data;
+        }
+        const data = JSON.parse(fs.readFileSync(filePath, 'utf8'));
+        jsonCache.set(filePath, { mtimeMs, data });
+        return data;
     } catch (error) {
         console.error(`Error loading ${filename}:`, error.message);
         return null;
     }
 }
 
+// Follows bundles/CURRENT, so a new export or a rollback is picked up without a restart
+function loadBundle() {
+    try {
+        if (!fs.existsSync(currentPath)) {
+            return;
+        }
+        const version = fs.readFileSync(currentPath, 'utf8').trim();
+        if (bundle && bundle.version === version) {
+            return;
+        }
+        const dir = path.join(bundlesPath, version);
+        const manifest = JSON.parse(fs.readFileSync(path.join(dir, 'manifest.json'), 'utf8'));
+        const next = { version, dir, manifest };
+
+        let loaded = null;
+        if (manifest.parts.serving_districts) {
+            const records = readBundlePart(next, 'serving_districts');
+            const indexes = readBundlePart(next, 'serving_indexes');
+            const views = readBundlePart(next, 'serving_views');
+            const digests = ['serving_districts', 'serving_indexes', 'serving_views']
+                .map(name => manifest.parts[name].sha256).join('');
+            loaded = {
+                etag: crypto.createHash('sha256').update(digests).digest('hex'),
+                version,
+                districts: new Map(Object.entries(records)),
+                order: indexes.order,
+                byState: new Map(Object.entries(indexes.by_state)),
+                byRisk: new Map(Object.entries(indexes.by_risk)),
+                views
+            };
+        }
+
+        bundle = next;
+        artifacts = loaded;
+        jsonCache.clear();
+        console.log(`Loaded export bundle ${version} (${artifacts ? artifacts.districts.size : 0} districts)`);
+    } catch (error) {
+        console.error('Error loading export bundle:', error.message);
+    }
+}
+
+loadBundle();
+fs.watchFile(currentPath, { interval: 1000 }, loadBundle);
+
+function districtIds(state, risk) {
+    let ids = artifacts.order;
+    if (state) {
+        ids = artifacts.byState.get(state) || [];
+        if (risk) {
+            ids = ids.filter(id => artifacts.districts.get(id).uls.risk_classification === risk);
+        }
+    } else if (risk) {
+        ids = artifacts.byRisk.get(risk) || [];
+    }
+    return ids;
+}
+
 function loadCsvAsJson(filename) {
+    if (bundle) {
+        return null;
+    }
     try {
         const filePath = path.join(analyticsPath, filename);
         const data = fs.readFileSync(filePath, 'utf8');
@@ -50,7 +149,11 @@ function loadCsvAsJson(filename) {
 }
 
 app.get('/api/health', (req, res) => {
-    res.json({ status: 'healthy', timestamp: new Date().toISOString() });
+    res.json({
+        status: 'healthy',
+        timestamp: new Date().toISOString(),
+        artifacts_version: artifacts?.version || null
+    });
 });
 
 app.get('/api/summary', (req, res) => {
@@ -68,6 +171,20 @@ app.get('/api/summary', (req, res) => {
 });
 
 app.get('/api/districts', (req, res) => {
+    if (artifacts) {
+        const { state, risk, limit = 100, offset = 0 } = req.query;
+        const ids = districtIds(state, risk);
+        const start = parseInt(offset);
+        const page = ids.slice(start, start + parseInt(limit));
+        res.set('ETag', `"${artifacts.etag}"`);
+        return res.json({
+            total: ids.length,
+            limit: parseInt(limit),
+            offset: start,
+            data: page.map(id => artifacts.districts.get(id).uls)
+        });
+    }
+    
     const ulsData = loadCsvAsJson('uls_scores.csv');
     
     if (!ulsData) {
@@ -99,9 +216,23 @@ app.get('/api/districts', (req, res) => {
 });
 
 app.get('/api/districts/:districtId', (req, res) => {
+    if (artifacts) {
+        const record = artifacts.districts.get(req.params.districtId);
+        if (!record) {
+            return res.status(404).json({ error: 'District not found' });
+        }
+        return res.json({
+            ...record.uls,
+            recommendations: record.recommendations,
+            prediction: record.prediction || undefined,
+            explanation: record.explanation || undefined
+        });
+    }
+    
     const ulsData = loadCsvAsJson('uls_scores.csv');
     const recommendations = loadJsonFile('recommendations.json');
     const predictions = loadJsonFile('ml_predictions.json');
+    const explanations = loadJsonFile('prediction_explanations.json');
     
     const district = ulsData?.find(d => d.district_id === req.params.districtId);
     
@@ -115,11 +246,19 @@ app.get('/api/districts/:districtId', (req, res) => {
     res.json({
         ...district,
         recommendations: districtRecs?.recommendations || [],
-        prediction: districtPred
+        prediction: districtPred,
+        explanation: explanations?.[req.params.districtId]
     });
 });
 
 app.get('/api/high-risk', (req, res) => {
+    if (artifacts) {
+        return res.json({
+            lifecycle_high_risk: artifacts.views.high_risk,
+            prediction_high_risk: artifacts.views.prediction_high_risk
+        });
+    }
+    
     const highRisk = loadJsonFile('high_risk_districts.json');
     const highRiskPred = loadJsonFile('high_risk_predictions.json');
     
@@ -165,6 +304,10 @@ app.get('/api/trends', (req, res) => {
 });
 
 app.get('/api/states', (req, res) => {
+    if (artifacts && artifacts.views.states) {
+        return res.json(artifacts.views.states);
+    }
+    
     const stateSummary = loadJsonFile('state_summary.json');
     
     if (!stateSummary) {
@@ -174,8 +317,25 @@ app.get('/api/states', (req, res) => {
     res.json(stateSummary);
 });
 
+app.get('/api/states/:state/pincodes', (req, res) => {
+    const hotspots = artifacts && artifacts.views.pincode_hotspots;
+    if (!hotspots || Object.keys(hotspots).length === 0) {
+        return res.status(404).json({ error: 'Pincode aggregation cube has not been built' });
+    }
+    
+    const pincodes = hotspots[req.params.state];
+    if (!pincodes) {
+        return res.status(404).json({ error: 'State not found' });
+    }
+    
+    const limit = Math.min(parseInt(req.query.limit) || pincodes.length, pincodes.length);
+    res.json(pincodes.slice(0, limit));
+});
+
 app.get('/api/predictions', (req, res) => {
-    const predictions = loadJsonFile('ml_predictions.json');
+    const predictions = artifacts
+        ? Array.from(artifacts.districts.values(), record => record.prediction).filter(Boolean)
+        : loadJsonFile('ml_predictions.json');
     
     if (!predictions) {
         return res.status(500).json({ error: 'Failed to load predictions' });
@@ -192,7 +352,10 @@ app.get('/api/predictions', (req, res) => {
 });
 
 app.get('/api/heatmap', (req, res) => {
-    const ulsData = loadCsvAsJson('uls_scores.csv');
+    if (artifacts) {
+        return res.json(artifacts.views.heatmap);
+    }
+    
     const stateSummary = loadJsonFile('state_summary.json');
     
     if (!stateSummary) {
@@ -212,6 +375,10 @@ app.get('/api/heatmap', (req, res) => {
 });
 
 app.get('/api/child-vulnerability', (req, res) => {
+    if (artifacts) {
+        return res.json(artifacts.views.child_vulnerability);
+    }
+    
     const ulsData = loadCsvAsJson('uls_scores.csv');
     
     if (!ulsData) {
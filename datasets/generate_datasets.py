@@ -0,0 +1,232 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+
+STATES = [
+    'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa', 'Gujarat',
+    'Haryana', 'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala', 'Madhya Pradesh',
+    'Maharashtra', 'Manipur', 'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab', 'Rajasthan',
+    'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura', 'Uttar Pradesh', 'Uttarakhand', 'West Bengal',
+    'Andaman and Nicobar Islands', 'Chandigarh', 'Dadra and Nagar Haveli and Daman and Diu',
+    'Delhi', 'Jammu and Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry'
+]
+
+REGIONS = ['North', 'South', 'East', 'West', 'Central', 'North East']
+
+RAW_MEASURES = {
+    'demographic': ['demo_age_5_17', 'demo_age_17_'],
+    'enrolment': ['age_0_5', 'age_5_17', 'age_18_greater'],
+    'biometric': ['bio_age_5_17', 'bio_age_17_']
+}
+
+# Mean daily count per pincode for each raw measure
+RAW_RATES = {
+    'demo_age_5_17': 3.0,
+    'demo_age_17_': 25.0,
+    'age_0_5': 4.0,
+    'age_5_17': 2.0,
+    'age_18_greater': 1.0,
+    'bio_age_5_17': 20.0,
+    'bio_age_17_': 18.0
+}
+
+
+class SyntheticDataGenerator:
+    def __init__(self, districts=700, years=6, pincodes=10, days=12, seed=42, start_year=2020):
+        self.districts = districts
+        self.years = list(range(start_year, start_year + years))
+        self.pincodes = pincodes
+        self.days = days
+        self.seed = seed
+        self.master = self._district_master()
+
+    def rng(self, stream):
+        return np.random.default_rng([self.seed, stream])
+
+    def _district_master(self):
+        rng = self.rng(0)
+        n = self.districts
+        state_codes = rng.integers(0, len(STATES), n)
+        state_codes[:min(n, len(STATES))] = np.arange(min(n, len(STATES)))
+
+        return pd.DataFrame({
+            'district_id': [f"D{i + 1:04d}" for i in range(n)],
+            'district_name': [f"District {i + 1}" for i in range(n)],
+            'state': np.array(STATES)[state_codes],
+            'state_code': state_codes + 1,
+            'region': np.array(REGIONS)[state_codes % len(REGIONS)],
+            'population': rng.integers(100000, 5000000, n),
+            'area_sq_km': rng.integers(500, 20000, n)
+        })
+
+    def enrolment(self):
+        rng = self.rng(1)
+        n = self.districts
+        population = self.master['population'].to_numpy()
+        child_share = rng.uniform(0.05, 0.15, n)
+
+        return pd.DataFrame({
+            'district_id': self.master['district_id'],
+            'district_name': self.master['district_name'],
+            'state': self.master['state'],
+            'coverage_ratio': rng.beta(18, 2, n).round(4),
+            'rejection_rate': rng.uniform(0.01, 0.1, n).round(4),
+            'child_enrolments': (population * child_share).astype('int64'),
+            'adult_enrolments': (population * rng.uniform(0.5, 0.9, n)).astype('int64')
+        })
+
+    def demographic(self):
+        rng = self.rng(2)
+        n = self.districts
+        base_updates = self.master['population'].to_numpy() * rng.uniform(0.02, 0.12, n)
+        base_churn = rng.uniform(0.05, 0.25, n)
+
+        frames = []
+        for year in self.years:
+            frames.append(pd.DataFrame({
+                'district_id': self.master['district_id'],
+                'year': year,
+                'total_demographic_updates': (base_updates * rng.lognormal(0, 0.2, n)).astype('int64'),
+                'churn_rate': (base_churn * rng.uniform(0.8, 1.2, n)).clip(0, 1).round(4),
+                'update_spike_detected': rng.random(n) < 0.08
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def biometric(self):
+        rng = self.rng(3)
+        n = self.districts
+        base_age = rng.uniform(300, 2200, n)
+        base_gap = rng.uniform(0, 48, n)
+
+        frames = []
+        for year in self.years:
+            age = (base_age * rng.uniform(0.9, 1.1, n)).astype('int64')
+            failure = (0.02 + age / 2500 * 0.15 + rng.normal(0, 0.01, n)).clip(0.01, 0.3)
+            total_updates = (self.master['population'].to_numpy() * rng.uniform(0.02, 0.15, n)).astype('int64')
+            frames.append(pd.DataFrame({
+                'district_id': self.master['district_id'],
+                'year': year,
+                'avg_biometric_age_days': age,
+                'biometric_freshness_score': (100 - age / 25).clip(0, 100).round(2),
+                'biometric_failure_rate': failure.round(4),
+                'authentication_success_rate': (1 - failure).round(4),
+                'total_biometric_updates': total_updates,
+                'child_biometric_updates': (total_updates * rng.uniform(0.05, 0.3, n)).astype('int64'),
+                'child_refresh_gap_months': (base_gap + rng.integers(0, 12, n)).astype('int64'),
+                'anomaly_detected': rng.random(n) < 0.05
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def write_reference(self, output_path="datasets/"):
+        os.makedirs(output_path, exist_ok=True)
+        datasets = {
+            'aadhaar_enrolment_data.csv': self.enrolment(),
+            'demographic_update_logs.csv': self.demographic(),
+            'biometric_update_records.csv': self.biometric(),
+            'district_master.csv': self.master
+        }
+        rows = {}
+        for filename, df in datasets.items():
+            df.to_csv(f"{output_path}{filename}", index=False)
+            rows[filename] = len(df)
+            print(f"Wrote {len(df)} rows to {output_path}{filename}")
+        return rows
+
+    def sample_days(self, rng, year):
+        calendar = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq='D')
+        count = min(self.days, len(calendar))
+        return calendar[np.sort(rng.choice(len(calendar), count, replace=False))]
+
+    def raw_blocks(self, feed):
+        rng = self.rng(10 + list(RAW_MEASURES).index(feed))
+        n = self.districts * self.pincodes
+        states = np.repeat(self.master['state'].to_numpy(), self.pincodes)
+        districts = np.repeat(self.master['district_name'].to_numpy(), self.pincodes)
+        pincodes = 100000 + np.arange(n, dtype='int64')
+        activity = rng.lognormal(0, 0.5, n)
+
+        for year in self.years:
+            for day in self.sample_days(rng, year):
+                block = pd.DataFrame({
+                    'date': day.strftime('%d-%m-%Y'),
+                    'state': states,
+                    'district': districts,
+                    'pincode': pincodes
+                })
+                for measure in RAW_MEASURES[feed]:
+                    block[measure] = rng.poisson(RAW_RATES[measure] * activity)
+                yield block
+
+    def write_raw(self, raw_path="./", shard_rows=500000, feeds=None):
+        rows = {}
+        for feed in feeds or list(RAW_MEASURES):
+            directory = os.path.join(raw_path, f"api_data_aadhar_{feed}")
+            os.makedirs(directory, exist_ok=True)
+            writer = ShardWriter(directory, f"api_data_aadhar_{feed}", shard_rows)
+            for block in self.raw_blocks(feed):
+                writer.write(block)
+            writer.close()
+            rows[feed] = writer.rows
+            print(f"Wrote {writer.rows} {feed} rows across {len(writer.shards)} shards to {directory}")
+        return rows
+
+
+class ShardWriter:
+    def __init__(self, directory, prefix, shard_rows=500000):
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_rows = shard_rows
+        self.rows = 0
+        self.shards = []
+        self.handle = None
+        self.shard_start = 0
+
+    def _open(self):
+        self.shard_start = self.rows
+        self.handle = open(os.path.join(self.directory, f"{self.prefix}.partial"), 'w', newline='')
+
+    def _finish(self):
+        self.handle.close()
+        path = os.path.join(self.directory, f"{self.prefix}_{self.shard_start}_{self.rows}.csv")
+        os.replace(self.handle.name, path)
+        self.shards.append(path)
+        self.handle = None
+
+    def write(self, block):
+        offset = 0
+        while offset < len(block):
+            if self.handle is None:
+                self._open()
+            room = self.shard_start + self.shard_rows - self.rows
+            part = block.iloc[offset:offset + room]
+            part.to_csv(self.handle, header=self.rows == self.shard_start, index=False)
+            self.rows += len(part)
+            offset += len(part)
+            if self.rows - self.shard_start >= self.shard_rows:
+                self._finish()
+
+    def close(self):
+        if self.handle is not None:
+            self._finish()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate seeded synthetic ALIS datasets')
+    parser.add_argument('--districts', type=int, default=700)
+    parser.add_argument('--years', type=int, default=6)
+    parser.add_argument('--pincodes', type=int, default=10, help='pincodes per district in raw shards')
+    parser.add_argument('--days', type=int, default=12, help='reporting days per year in raw shards')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='datasets/', help='directory for the reference datasets')
+    parser.add_argument('--raw-output', default=None, help='directory for raw API shards (skipped if unset)')
+    parser.add_argument('--shard-rows', type=int, default=500000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    generator = SyntheticDataGenerator(args.districts, args.years, args.pincodes, args.days, args.seed)
+    generator.write_reference(os.path.join(args.output, ''))
+    if args.raw_output:
+        generator.write_raw(args.raw_output, shard_rows=args.shard_rows)
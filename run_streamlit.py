@@ -1,4 +1,11 @@
 import sys
-sys.argv = ['streamlit', 'run', 'UI/udai.py', '--server.port', '8501', '--server.headless', 'true']
+
+APPS = {
+    'udai': 'UI/udai.py',
+    'dashboard': 'UI/dashboard.py'
+}
+
+app = APPS.get(sys.argv[1], sys.argv[1]) if len(sys.argv) > 1 else APPS['udai']
+sys.argv = ['streamlit', 'run', app, '--server.port', '8501', '--server.headless', 'true']
 from streamlit.web.cli import main
 main()